@@ -0,0 +1,125 @@
+"""
+    Планы GET /api/v1/admins/users/search на засеянных пользователях: для каждого запроса -
+    индексы из плана, время выполнения и прочитанные страницы (EXPLAIN ANALYZE, BUFFERS).
+    Seq Scan по users - код выхода 1. Данные засеваются в транзакции и откатываются.
+    --drop-name-pattern-index показывает прежний план префиксного поиска (имя - только триграммы)
+
+    python -m benchmarks.users_search --users 200000
+"""
+from argparse import ArgumentParser, Namespace
+from asyncio import run as asyncio_run
+from logging import basicConfig, getLogger, Logger, INFO
+from typing import Any, Dict, Iterator, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+
+from databases.postgres.config import postgres
+from src.admins.core.constants import USERS_SEARCH_MODE_PREFIX, USERS_SEARCH_MODE_SUBSTRING
+from src.admins.versions.v1.dependencies import _search_users_statement
+
+logger: Logger = getLogger(__name__)
+
+PAGE_SIZE = 20
+
+# Имена и email из букв a-p (md5 с заменой цифр): префикс в 1 символ - ~6% строк, в 2 - ~0.4%;
+# q, начинающийся с q-z, не совпадает ни с чем - худший случай для обхода по первичному ключу
+SEED = text(
+    """
+        INSERT INTO users (role_id, email, first_name, last_name, hash_password, is_active)
+        SELECT
+            1,
+            translate(substr(md5(n || 'email'), 1, 12), '0123456789', 'ghijklmnop') || '@example.com',
+            translate(substr(md5(n || 'first'), 1, 7), '0123456789', 'ghijklmnop'),
+            translate(substr(md5(n || 'last'), 1, 9), '0123456789', 'ghijklmnop'),
+            '\\x00'::bytea,
+            1
+        FROM generate_series(1, :users) n
+    """
+)
+CASES: List[Tuple[str, str]] = [
+    (USERS_SEARCH_MODE_PREFIX, "k"),
+    (USERS_SEARCH_MODE_PREFIX, "ka"),
+    (USERS_SEARCH_MODE_PREFIX, "kab"),
+    (USERS_SEARCH_MODE_PREFIX, "z"),
+    (USERS_SEARCH_MODE_PREFIX, "zz"),
+    (USERS_SEARCH_MODE_PREFIX, "kab ke"),
+    (USERS_SEARCH_MODE_SUBSTRING, "kab"),
+    (USERS_SEARCH_MODE_SUBSTRING, "zzz"),
+    (USERS_SEARCH_MODE_SUBSTRING, "example"),
+]
+
+
+def _nodes(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _nodes(child)
+
+
+async def explain(connection: AsyncConnection, mode: str, q: str) -> Dict[str, Any]:
+    statement = _search_users_statement(q=q, mode=mode, after_id=None, page_size=PAGE_SIZE)
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True})
+
+    return (await connection.scalar(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {compiled}")))[0]  # type: ignore
+
+
+async def run(connection: AsyncConnection, arguments: Namespace) -> bool:
+    await connection.execute(SEED, {"users": arguments.users})
+    await connection.execute(text("ANALYZE users"))
+    if arguments.drop_name_pattern_index:
+        await connection.execute(text("DROP INDEX ix_users_search_name_pattern"))  # Откатится вместе с данными
+
+    seq_scans: bool = False
+    logger.info("%s users, page size %s", arguments.users, PAGE_SIZE)
+
+    for mode, q in CASES:
+        result: Dict[str, Any] = await explain(connection=connection, mode=mode, q=q)
+        nodes: List[Dict[str, Any]] = list(_nodes(result["Plan"]))
+
+        indexes: List[str] = sorted({node["Index Name"] for node in nodes if "Index Name" in node})
+        seq_scan: bool = any(node["Node Type"] == "Seq Scan" for node in nodes)
+        buffers: int = result["Plan"].get("Shared Hit Blocks", 0) + result["Plan"].get("Shared Read Blocks", 0)
+        seq_scans = seq_scans or seq_scan
+
+        logger.info(
+            "%-9s %-10s %8.2f ms %7s pages  %s%s",
+            mode,
+            repr(q),
+            result["Execution Time"],
+            buffers,
+            ", ".join(indexes) or "-",
+            "  SEQ SCAN" if seq_scan else "",
+        )
+
+    return seq_scans
+
+
+async def main(arguments: Namespace) -> None:
+    engine: AsyncEngine = create_async_engine(url=postgres.DSN)
+
+    try:
+        async with engine.connect() as connection:
+            transaction = await connection.begin()
+            try:
+                seq_scans: bool = await run(connection=connection, arguments=arguments)
+            finally:
+                await transaction.rollback()  # Засеянные строки не остаются в базе
+
+        async with engine.connect() as connection:
+            # Откаченные строки - мертвые версии: без VACUUM следующий запуск обходил бы их по первичному ключу
+            await connection.execution_options(isolation_level="AUTOCOMMIT")
+            await connection.execute(text("VACUUM users"))
+    finally:
+        await engine.dispose()
+
+    if seq_scans:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser(description="Планы поиска пользователей администратором")
+    parser.add_argument("--users", type=int, default=200000, help="Засеваемых пользователей")
+    parser.add_argument("--drop-name-pattern-index", action="store_true", help="Без btree-индекса по имени")
+
+    basicConfig(level=INFO, format="%(message)s")
+    asyncio_run(main(parser.parse_args()))
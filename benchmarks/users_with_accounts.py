@@ -0,0 +1,193 @@
+"""
+    Стоимость страницы GET /api/v1/admins/users: прежний путь (selectinload + ORM-объекты + модели ответа)
+    против json_agg (счета собираются в Postgres, строки сразу валидируются pydantic).
+    Данные засеваются в транзакции и откатываются. Время - на страницу целиком (запросы + сборка ответа),
+    память - пик tracemalloc на страницу (tracemalloc замедляет оба пути, сравнивать их между собой).
+
+    python -m benchmarks.users_with_accounts --users 20000 --accounts-per-user 5 --page-size 100 --pages 50
+"""
+from argparse import ArgumentParser, Namespace
+from asyncio import run as asyncio_run
+from dataclasses import dataclass, field
+from logging import basicConfig, getLogger, Logger, INFO
+from statistics import mean, quantiles
+from time import perf_counter
+from tracemalloc import get_traced_memory, reset_peak, start as tracemalloc_start, stop as tracemalloc_stop
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import selectinload, with_expression
+
+from databases.postgres.config import postgres
+from databases.postgres.models import Accounts, Users
+from databases.postgres.utils import account_total_balance
+from src.admins.core.models import UserWithAccount
+from src.admins.versions.v1.dependencies import _users_with_accounts_statement
+from src.sso.core.models import UserAccount
+
+logger: Logger = getLogger(__name__)
+
+SEED = text(
+    """
+        WITH seeded_users AS (
+            INSERT INTO users (role_id, email, first_name, last_name, hash_password, is_active)
+            SELECT 1, 'benchmark_' || n || '@example.com', 'Benchmark', 'User ' || n, '\\x00'::bytea, 1
+            FROM generate_series(1, :users) n
+            RETURNING id
+        )
+        INSERT INTO accounts (user_id, name, balance, is_active)
+        SELECT u.id, 'benchmark_' || a, round((random() * 10000)::numeric, 2), 1
+        FROM seeded_users u, generate_series(1, :accounts_per_user) a
+    """
+)
+
+Page = Tuple[List[UserWithAccount], Optional[int]]
+
+
+@dataclass
+class PathStats:
+    seconds: List[float] = field(default_factory=list)
+    peak_bytes: List[int] = field(default_factory=list)
+
+    def report(self, name: str) -> str:
+        p95: float = quantiles(self.seconds, n=20)[-1] if len(self.seconds) > 1 else self.seconds[0]
+
+        return (
+            f"{name:>9}: {mean(self.seconds) * 1000:8.2f} ms/page (p95 {p95 * 1000:8.2f} ms), "
+            f"peak {mean(self.peak_bytes) / 1024:9.1f} KiB/page (max {max(self.peak_bytes) / 1024:9.1f} KiB)"
+        )
+
+
+async def orm_page(db_session: AsyncSession, page_size: int, after_id: Optional[int]) -> Page:
+    """Прежняя реализация: ORM-объекты пользователей и счетов в identity map, затем модели ответа"""
+    users_page = select(Users).where(Users.is_active == 1).order_by(Users.id).limit(page_size + 1)
+    if after_id is not None:
+        users_page = users_page.where(Users.id > after_id)
+
+    users: List[Users] = list((await db_session.scalars(
+        users_page.options(
+            selectinload(Users.accounts).options(with_expression(Accounts.total_balance, account_total_balance()))
+        )
+    )).all())
+
+    page: List[UserWithAccount] = [
+        UserWithAccount(
+            id=user.id,
+            email=user.email,
+            role_id=user.role_id,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+            accounts=[
+                UserAccount(
+                    id=account.id,
+                    name=account.name,
+                    balance=account.total_balance,
+                    created_at=account.created_at,
+                    updated_at=account.updated_at,
+                    is_active=account.is_active,
+                ) for account in user.accounts
+            ],
+        ) for user in users[:page_size]
+    ]
+    db_session.expunge_all()  # Как по завершении запроса: identity map не копится между страницами
+
+    return page, users[page_size - 1].id if len(users) > page_size else None
+
+
+async def json_page(db_session: AsyncSession, page_size: int, after_id: Optional[int]) -> Page:
+    """Текущая реализация: тот же запрос, что у get_users_with_accounts"""
+    rows = (await db_session.execute(
+        _users_with_accounts_statement(page_size=page_size, after_id=after_id, page=None)
+    )).mappings().all()
+
+    page: List[UserWithAccount] = [UserWithAccount.model_validate(row) for row in rows[:page_size]]
+
+    return page, rows[page_size - 1]["id"] if len(rows) > page_size else None
+
+
+async def measure(
+        db_session: AsyncSession,
+        load_page: Callable[[AsyncSession, int, Optional[int]], Awaitable[Page]],
+        page_size: int,
+        pages: int,
+) -> PathStats:
+    stats: PathStats = PathStats()
+    after_id: Optional[int] = None
+
+    for _ in range(pages):
+        reset_peak()
+        baseline, _ = get_traced_memory()
+        started_at: float = perf_counter()
+
+        page, after_id = await load_page(db_session, page_size, after_id)
+
+        stats.seconds.append(perf_counter() - started_at)
+        stats.peak_bytes.append(get_traced_memory()[1] - baseline)
+        del page
+
+        if after_id is None:
+            break
+
+    return stats
+
+
+async def main(arguments: Namespace) -> None:
+    engine: AsyncEngine = create_async_engine(url=postgres.DSN)
+
+    try:
+        async with engine.connect() as connection:
+            transaction = await connection.begin()
+            try:
+                await run(connection=connection, arguments=arguments)
+            finally:
+                await transaction.rollback()  # Засеянные строки не остаются в базе
+    finally:
+        await engine.dispose()
+
+
+async def run(connection: AsyncConnection, arguments: Namespace) -> None:
+    await connection.execute(SEED, {"users": arguments.users, "accounts_per_user": arguments.accounts_per_user})
+    await connection.execute(text("ANALYZE users"))
+    await connection.execute(text("ANALYZE accounts"))
+
+    db_session: AsyncSession = AsyncSession(bind=connection, join_transaction_mode="create_savepoint")
+
+    for warm_up in (json_page, orm_page):  # Кэш страниц Postgres и скомпилированных запросов SQLAlchemy
+        await measure(db_session=db_session, load_page=warm_up, page_size=arguments.page_size, pages=2)
+
+    tracemalloc_start()
+    try:
+        results: List[Tuple[str, PathStats]] = [
+            (name, await measure(
+                db_session=db_session,
+                load_page=load_page,
+                page_size=arguments.page_size,
+                pages=arguments.pages,
+            )) for name, load_page in (("orm", orm_page), ("json_agg", json_page))
+        ]
+    finally:
+        tracemalloc_stop()
+
+    logger.info(
+        "%s users x %s accounts, page size %s, %s pages",
+        arguments.users,
+        arguments.accounts_per_user,
+        arguments.page_size,
+        arguments.pages,
+    )
+    for name, stats in results:
+        logger.info(stats.report(name))
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser(description="Бенчмарк страницы пользователей со счетами")
+    parser.add_argument("--users", type=int, default=20000, help="Засеваемых пользователей")
+    parser.add_argument("--accounts-per-user", type=int, default=5)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=50, help="Страниц на каждый путь (подряд, по after_id)")
+
+    basicConfig(level=INFO, format="%(message)s")
+    asyncio_run(main(parser.parse_args()))
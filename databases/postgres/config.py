@@ -1,9 +1,9 @@
 from os import getenv as os_getenv
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from dotenv import load_dotenv, find_dotenv
 
-from databases.postgres.dto import PostgresDTO
+from databases.postgres.dto import PostgresDTO, PostgresPoolDTO
 
 load_dotenv(find_dotenv(".env.test"))
 
@@ -22,6 +22,30 @@ class PostgreSQL:
         return f"postgresql+psycopg://{self._USER}:{self._PASSWORD}@{self._HOST}:{self._PORT}/{self._DATABASE}"
 
 
+class PostgreSQLPool:
+    def __init__(self, pool_dto: PostgresPoolDTO) -> None:
+        self.POOL_SIZE: int = pool_dto.POOL_SIZE  # Max количество постоянных соединений
+        self.MAX_OVERFLOW: int = pool_dto.MAX_OVERFLOW  # Дополнительные соединения при нагрузке
+        self.POOL_TIMEOUT: float = pool_dto.POOL_TIMEOUT  # Время ожидания соединения (сек)
+        self.POOL_RECYCLE: int = pool_dto.POOL_RECYCLE  # Пересоздавать соединения каждые N секунд
+        self.POOL_PRE_PING: bool = pool_dto.POOL_PRE_PING  # Проверка соединения при выдаче из пула
+        self.STATEMENT_TIMEOUT_MS: int = pool_dto.STATEMENT_TIMEOUT_MS  # 0 - без ограничения
+
+    def engine_options(self) -> Dict[str, Any]:
+        """Аргументы create_async_engine; statement_timeout задается при подключении (libpq options)"""
+        options: Dict[str, Any] = {
+            "pool_size": self.POOL_SIZE,
+            "max_overflow": self.MAX_OVERFLOW,
+            "pool_timeout": self.POOL_TIMEOUT,
+            "pool_recycle": self.POOL_RECYCLE,
+            "pool_pre_ping": self.POOL_PRE_PING,
+        }
+        if self.STATEMENT_TIMEOUT_MS > 0:
+            options["connect_args"] = {"options": f"-c statement_timeout={self.STATEMENT_TIMEOUT_MS}"}
+
+        return options
+
+
 postgres: PostgreSQL = PostgreSQL(
     PostgresDTO(
         HOST=os_getenv("POSTGRES_HOST", "localhost"),
@@ -31,3 +55,14 @@ postgres: PostgreSQL = PostgreSQL(
         DATABASE=os_getenv("POSTGRES_DATABASE", "postgres")
     )
 )
+
+postgres_pool: PostgreSQLPool = PostgreSQLPool(
+    PostgresPoolDTO(
+        POOL_SIZE=int(os_getenv("POSTGRES_POOL_SIZE", "5")),
+        MAX_OVERFLOW=int(os_getenv("POSTGRES_MAX_OVERFLOW", "10")),
+        POOL_TIMEOUT=float(os_getenv("POSTGRES_POOL_TIMEOUT", "30")),
+        POOL_RECYCLE=int(os_getenv("POSTGRES_POOL_RECYCLE", "300")),
+        POOL_PRE_PING=os_getenv("POSTGRES_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+        STATEMENT_TIMEOUT_MS=int(os_getenv("POSTGRES_STATEMENT_TIMEOUT_MS", "30000"))
+    )
+)
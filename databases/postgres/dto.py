@@ -9,3 +9,13 @@ class PostgresDTO:
     USER: str
     PASSWORD: Optional[str]
     DATABASE: str
+
+
+@dataclass
+class PostgresPoolDTO:
+    POOL_SIZE: int
+    MAX_OVERFLOW: int
+    POOL_TIMEOUT: float
+    POOL_RECYCLE: int
+    POOL_PRE_PING: bool
+    STATEMENT_TIMEOUT_MS: int
@@ -0,0 +1,31 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '302a6953794d'
+down_revision: Union[str, Sequence[str], None] = '9b77635b5062'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Константный server_default: колонка добавляется без перезаписи таблицы
+    op.add_column('accounts',
+                  sa.Column('balance_stripes', sa.SmallInteger(), server_default='0', nullable=False,
+                            comment='0 - баланс только в balance; '
+                                    'N - начисления размазываются по N строкам account_balance_stripes'))
+    op.create_check_constraint('chk_account_balance_stripes', 'accounts', 'balance_stripes >= 0')
+    op.create_table('account_balance_stripes',
+                    sa.Column('account_id', sa.Integer(), nullable=False),
+                    sa.Column('stripe', sa.SmallInteger(), nullable=False),
+                    sa.Column('balance', sa.Numeric(precision=15, scale=2), nullable=False),
+                    sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+                    sa.PrimaryKeyConstraint('account_id', 'stripe')
+                    )
+
+
+def downgrade() -> None:
+    op.drop_table('account_balance_stripes')
+    op.drop_constraint('chk_account_balance_stripes', 'accounts', type_='check')
+    op.drop_column('accounts', 'balance_stripes')
@@ -0,0 +1,59 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '5d0e4c1a7b93'
+down_revision: Union[str, Sequence[str], None] = '302a6953794d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Дубликаты (user_id, name), созданные гонкой при обработке вебхуков, сливаются в счет с меньшим id
+    op.execute(sa.text(
+        """
+            CREATE TEMPORARY TABLE duplicate_accounts ON COMMIT DROP AS
+            SELECT id, min(id) OVER (PARTITION BY user_id, name) AS keep_id
+            FROM accounts
+        """
+    ))
+    op.execute(sa.text("DELETE FROM duplicate_accounts WHERE id = keep_id"))
+    op.execute(sa.text(
+        """
+            UPDATE accounts
+            SET balance = accounts.balance + merged.balance
+            FROM (
+                SELECT d.keep_id, sum(a.balance + coalesce(s.balance, 0)) AS balance
+                FROM duplicate_accounts d
+                JOIN accounts a ON a.id = d.id
+                LEFT JOIN (
+                    SELECT account_id, sum(balance) AS balance FROM account_balance_stripes GROUP BY account_id
+                ) s ON s.account_id = d.id
+                GROUP BY d.keep_id
+            ) merged
+            WHERE accounts.id = merged.keep_id
+        """
+    ))
+    op.execute(sa.text(
+        """
+            UPDATE transactions SET account_id = d.keep_id
+            FROM duplicate_accounts d
+            WHERE transactions.account_id = d.id
+        """
+    ))
+    op.execute(sa.text(
+        "DELETE FROM account_balance_stripes WHERE account_id IN (SELECT id FROM duplicate_accounts)"
+    ))
+    op.execute(sa.text("DELETE FROM accounts WHERE id IN (SELECT id FROM duplicate_accounts)"))
+
+    # CONCURRENTLY недоступен внутри транзакции: слияние выше коммитится до построения индекса
+    with op.get_context().autocommit_block():
+        op.create_index('ix_accounts_user_id_name', 'accounts', ['user_id', 'name'],
+                        unique=True, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_accounts_user_id_name', table_name='accounts',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,164 @@
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '8e3f5a2c9d41'
+down_revision: Union[str, Sequence[str], None] = '5d0e4c1a7b93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS_AHEAD_MONTHS = 3  # Дальше секции создает TransactionsPartitionsMaintainer
+
+CLAIM_EXTERNAL_ID_FUNCTION = """
+    CREATE OR REPLACE FUNCTION transactions_claim_external_id() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF NEW.external_id IS NULL THEN
+            RETURN NEW;
+        END IF;
+
+        INSERT INTO transaction_external_ids (external_id, created_at)
+        VALUES (NEW.external_id, NEW.created_at)
+        ON CONFLICT (external_id) DO NOTHING;
+
+        IF NOT FOUND THEN
+            RETURN NULL;  -- Дубликат: строка пропускается, как при ON CONFLICT DO NOTHING
+        END IF;
+
+        RETURN NEW;
+    END
+    $$
+"""
+
+
+def _add_months(moment: datetime, months: int) -> datetime:
+    month_index: int = moment.year * 12 + moment.month - 1 + months
+
+    return moment.replace(year=month_index // 12, month=month_index % 12 + 1)
+
+
+def _bound(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%d %H:%M:%S+00")
+
+
+def upgrade() -> None:
+    """
+        transactions -> секционированная по месяцам таблица без копирования данных:
+        старая таблица подключается целиком как секция transactions_legacy (все до следующего месяца),
+        новые строки со следующего месяца идут в помесячные секции
+    """
+    now: datetime = datetime.now(timezone.utc)
+    first_month: datetime = _add_months(now.replace(day=1, hour=0, minute=0, second=0, microsecond=0), 1)
+
+    op.create_table('transaction_external_ids',
+                    sa.Column('external_id', sa.String(length=100), nullable=False),
+                    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'),
+                              nullable=False),
+                    sa.PrimaryKeyConstraint('external_id')
+                    )
+    op.execute(
+        "INSERT INTO transaction_external_ids (external_id, created_at) "
+        "SELECT external_id, created_at FROM transactions WHERE external_id IS NOT NULL"
+    )
+    op.create_index('ix_transaction_external_ids_created_at', 'transaction_external_ids', ['created_at'])
+
+    op.execute("ALTER TABLE transactions RENAME TO transactions_legacy")
+    op.execute("ALTER TABLE transactions_legacy RENAME CONSTRAINT transactions_pkey TO transactions_legacy_pkey")
+    op.execute("ALTER TABLE transactions_legacy "
+               "RENAME CONSTRAINT transactions_external_id_key TO transactions_legacy_external_id_key")
+    op.execute("ALTER TABLE transactions_legacy "
+               "RENAME CONSTRAINT transactions_account_id_fkey TO transactions_legacy_account_id_fkey")
+    op.execute("ALTER TABLE transactions_legacy ALTER COLUMN id DROP DEFAULT")
+
+    op.execute(
+        """
+            CREATE TABLE transactions (
+                id integer NOT NULL DEFAULT nextval('transactions_id_seq'::regclass),
+                account_id integer NOT NULL,
+                type varchar(10) NOT NULL,
+                amount numeric(15, 2) NOT NULL,
+                status varchar(20) NOT NULL,
+                external_id varchar(100),
+                created_at timestamp with time zone NOT NULL DEFAULT now(),
+                updated_at timestamp with time zone NOT NULL DEFAULT now(),
+                CONSTRAINT transactions_pkey PRIMARY KEY (id, created_at),
+                CONSTRAINT transactions_account_id_fkey FOREIGN KEY (account_id) REFERENCES accounts (id),
+                CONSTRAINT chk_transaction_type CHECK (type IN ('debit', 'credit')),
+                CONSTRAINT chk_transaction_status CHECK (status IN ('pending', 'completed', 'failed', 'cancelled'))
+            ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute("COMMENT ON COLUMN transactions.external_id IS "
+               "'ID транзакции во внешней системе (банк, платежный шлюз и т.д.)'")
+    op.execute("ALTER SEQUENCE transactions_id_seq OWNED BY transactions.id")
+    op.create_index('ix_transactions_account_id_created_at', 'transactions', ['account_id', 'created_at'])
+
+    # CHECK с границей секции позволяет ATTACH не сканировать старую таблицу под блокировкой
+    op.execute(f"ALTER TABLE transactions_legacy ADD CONSTRAINT chk_transactions_legacy_range "
+               f"CHECK (created_at < '{_bound(first_month)}')")
+    # Индексы, совпадающие с индексами родителя, переиспользуются при ATTACH вместо построения под блокировкой
+    op.execute("CREATE UNIQUE INDEX transactions_legacy_id_created_at ON transactions_legacy (id, created_at)")
+    # У секции может быть только первичный ключ родителя (id, created_at): ключ по id заменяется готовым индексом
+    op.execute("ALTER TABLE transactions_legacy DROP CONSTRAINT transactions_legacy_pkey, "
+               "ADD CONSTRAINT transactions_legacy_pkey PRIMARY KEY USING INDEX transactions_legacy_id_created_at")
+    op.execute("CREATE INDEX transactions_legacy_account_id_created_at ON transactions_legacy (account_id, created_at)")
+    op.execute(f"ALTER TABLE transactions ATTACH PARTITION transactions_legacy "
+               f"FOR VALUES FROM (MINVALUE) TO ('{_bound(first_month)}')")
+    op.execute("ALTER TABLE transactions_legacy DROP CONSTRAINT chk_transactions_legacy_range")
+
+    for months in range(PARTITIONS_AHEAD_MONTHS + 1):
+        month: datetime = _add_months(first_month, months)
+        op.execute(
+            f"CREATE TABLE transactions_p{month:%Y%m} PARTITION OF transactions "
+            f"FOR VALUES FROM ('{_bound(month)}') TO ('{_bound(_add_months(month, 1))}')"
+        )
+    op.execute("CREATE TABLE transactions_default PARTITION OF transactions DEFAULT")
+
+    op.execute("CREATE SCHEMA IF NOT EXISTS transactions_archive")  # Сюда уходят отсоединенные старые секции
+
+    op.execute(CLAIM_EXTERNAL_ID_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER trg_transactions_claim_external_id BEFORE INSERT ON transactions "
+        "FOR EACH ROW EXECUTE FUNCTION transactions_claim_external_id()"
+    )
+    # Уникальность теперь держит transaction_external_ids
+    op.execute("ALTER TABLE transactions_legacy DROP CONSTRAINT transactions_legacy_external_id_key")
+
+
+def downgrade() -> None:
+    """Обратно в одну таблицу копированием (архивные секции из transactions_archive не возвращаются)"""
+    op.execute(
+        """
+            CREATE TABLE transactions_plain (
+                id integer NOT NULL,
+                account_id integer NOT NULL REFERENCES accounts (id),
+                type varchar(10) NOT NULL,
+                amount numeric(15, 2) NOT NULL,
+                status varchar(20) NOT NULL,
+                external_id varchar(100),
+                created_at timestamp with time zone NOT NULL DEFAULT now(),
+                updated_at timestamp with time zone NOT NULL DEFAULT now(),
+                CONSTRAINT chk_transaction_type CHECK (type IN ('debit', 'credit')),
+                CONSTRAINT chk_transaction_status CHECK (status IN ('pending', 'completed', 'failed', 'cancelled'))
+            )
+        """
+    )
+    op.execute("INSERT INTO transactions_plain SELECT * FROM transactions")
+    op.execute("ALTER SEQUENCE transactions_id_seq OWNED BY NONE")
+    op.execute("DROP TABLE transactions")
+    op.execute("DROP FUNCTION IF EXISTS transactions_claim_external_id()")
+
+    op.execute("ALTER TABLE transactions_plain RENAME TO transactions")
+    op.execute("ALTER TABLE transactions ADD CONSTRAINT transactions_pkey PRIMARY KEY (id)")
+    op.execute("ALTER TABLE transactions ADD CONSTRAINT transactions_external_id_key UNIQUE (external_id)")
+    op.execute("ALTER TABLE transactions "
+               "RENAME CONSTRAINT transactions_plain_account_id_fkey TO transactions_account_id_fkey")
+    op.execute("ALTER TABLE transactions ALTER COLUMN id SET DEFAULT nextval('transactions_id_seq'::regclass)")
+    op.execute("ALTER SEQUENCE transactions_id_seq OWNED BY transactions.id")
+    op.execute("COMMENT ON COLUMN transactions.external_id IS "
+               "'ID транзакции во внешней системе (банк, платежный шлюз и т.д.)'")
+
+    op.drop_index('ix_transaction_external_ids_created_at', table_name='transaction_external_ids')
+    op.drop_table('transaction_external_ids')
@@ -0,0 +1,26 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '9b77635b5062'
+down_revision: Union[str, Sequence[str], None] = 'cca10aaca1c0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('users_sessions_revocations',
+                    sa.Column('user_id', sa.Integer(), nullable=False),
+                    sa.Column('not_before', sa.DateTime(timezone=True), nullable=False),
+                    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'),
+                              nullable=False),
+                    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+                    sa.PrimaryKeyConstraint('user_id')
+                    )
+    op.create_index('ix_users_sessions_revocations_updated_at', 'users_sessions_revocations', ['updated_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_sessions_revocations_updated_at', table_name='users_sessions_revocations')
+    op.drop_table('users_sessions_revocations')
@@ -0,0 +1,36 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'a8c1e7f4d253'
+down_revision: Union[str, Sequence[str], None] = 'f3d6a9b20c14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_deletion_jobs',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('user_id', sa.Integer(), nullable=False),
+                    sa.Column('email', sa.String(length=255), nullable=False),
+                    sa.Column('status', sa.String(length=20), nullable=False),
+                    sa.Column('stage', sa.String(length=50), nullable=True),
+                    sa.Column('deleted_rows', sa.BigInteger(), nullable=False),
+                    sa.Column('error', sa.Text(), nullable=True),
+                    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'),
+                              nullable=False),
+                    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'),
+                              nullable=False),
+                    sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+                    sa.CheckConstraint("status IN ('pending', 'running', 'completed')",
+                                       name='chk_user_deletion_job_status'),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index('ix_user_deletion_jobs_user_id_unfinished', 'user_deletion_jobs', ['user_id'],
+                    unique=True, postgresql_where=sa.text("status IN ('pending', 'running')"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_deletion_jobs_user_id_unfinished', table_name='user_deletion_jobs')
+    op.drop_table('user_deletion_jobs')
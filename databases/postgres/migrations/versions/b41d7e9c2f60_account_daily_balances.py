@@ -0,0 +1,38 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'b41d7e9c2f60'
+down_revision: Union[str, Sequence[str], None] = '8e3f5a2c9d41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('account_daily_balances',
+                    sa.Column('account_id', sa.Integer(), nullable=False),
+                    sa.Column('day', sa.Date(), nullable=False),
+                    sa.Column('stripe', sa.SmallInteger(), nullable=False),
+                    sa.Column('delta', sa.Numeric(precision=15, scale=2), nullable=False),
+                    sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+                    sa.PrimaryKeyConstraint('account_id', 'day', 'stripe')
+                    )
+    # Начальное заполнение по уже проведенным транзакциям, дальше таблицу ведет PaymentProcessor
+    op.execute(
+        """
+            INSERT INTO account_daily_balances (account_id, day, stripe, delta)
+            SELECT
+                account_id,
+                CAST(created_at AT TIME ZONE 'UTC' AS date),
+                0,
+                sum(CASE WHEN type = 'debit' THEN amount ELSE -amount END)
+            FROM transactions
+            WHERE status = 'completed'
+            GROUP BY account_id, CAST(created_at AT TIME ZONE 'UTC' AS date)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('account_daily_balances')
@@ -0,0 +1,25 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'b9e4c2d7a815'
+down_revision: Union[str, Sequence[str], None] = 'd4f1b8a6c392'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NAME_EXPRESSION = "lower(first_name || ' ' || coalesce(last_name, ''))"  # Совпадает с USERS_SEARCH_NAME_SQL
+
+
+def upgrade() -> None:
+    # Префикс имени: из 1-2 символов триграммы не извлекаются, и GIN-индекс сканировался бы целиком
+    with op.get_context().autocommit_block():
+        op.execute(sa.text(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_search_name_pattern "
+            f"ON users (({NAME_EXPRESSION}) text_pattern_ops)"
+        ))
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_search_name_pattern', table_name='users', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,39 @@
+from typing import List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'c7a92e4d1b58'
+down_revision: Union[str, Sequence[str], None] = 'b41d7e9c2f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS_QUERY = sa.text(
+    "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+    "WHERE i.inhparent = 'transactions'::regclass"
+)
+
+
+def _create_partitioned_index(name: str, columns: str) -> None:
+    """
+        CONCURRENTLY для секционированной таблицы: пустой индекс только на родителе (ON ONLY),
+        индексы секций строятся конкурентно и подключаются к нему - после последней секции индекс валиден
+    """
+    partitions: List[str] = list(op.get_bind().scalars(PARTITIONS_QUERY))
+
+    op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY transactions ({columns})")
+
+    with op.get_context().autocommit_block():
+        for partition in partitions:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition}_{name} ON {partition} ({columns})")
+            op.execute(f"ALTER INDEX {name} ATTACH PARTITION {partition}_{name}")
+
+
+def upgrade() -> None:
+    _create_partitioned_index(name="ix_transactions_account_id_created_at_id", columns="account_id, created_at, id")
+    op.drop_index('ix_transactions_account_id_created_at', table_name='transactions')
+
+
+def downgrade() -> None:
+    _create_partitioned_index(name="ix_transactions_account_id_created_at", columns="account_id, created_at")
+    op.drop_index('ix_transactions_account_id_created_at_id', table_name='transactions')
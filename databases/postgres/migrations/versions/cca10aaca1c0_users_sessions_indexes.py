@@ -0,0 +1,29 @@
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = 'cca10aaca1c0'
+down_revision: Union[str, Sequence[str], None] = '592c2bfc2ad5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY недоступен внутри транзакции, зато не блокирует запись в users_sessions
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_sessions_session_token', 'users_sessions', ['session_token'],
+                        unique=True, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_users_sessions_user_id_expires_at', 'users_sessions', ['user_id', 'expires_at'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_users_sessions_expires_at', 'users_sessions', ['expires_at'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_sessions_expires_at', table_name='users_sessions',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_users_sessions_user_id_expires_at', table_name='users_sessions',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_users_sessions_session_token', table_name='users_sessions',
+                      postgresql_concurrently=True, if_exists=True)
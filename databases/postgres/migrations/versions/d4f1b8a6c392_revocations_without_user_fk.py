@@ -0,0 +1,21 @@
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = 'd4f1b8a6c392'
+down_revision: Union[str, Sequence[str], None] = 'a8c1e7f4d253'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Отзыв переживает удаление пользователя (UserDeletionWorker), строку вычищает SessionRevocations
+    op.drop_constraint('users_sessions_revocations_user_id_fkey', 'users_sessions_revocations', type_='foreignkey')
+
+
+def downgrade() -> None:
+    op.execute(
+        "DELETE FROM users_sessions_revocations r WHERE NOT EXISTS (SELECT 1 FROM users u WHERE u.id = r.user_id)"
+    )
+    op.create_foreign_key('users_sessions_revocations_user_id_fkey', 'users_sessions_revocations', 'users',
+                          ['user_id'], ['id'])
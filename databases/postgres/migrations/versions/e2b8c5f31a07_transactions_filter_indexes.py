@@ -0,0 +1,50 @@
+from typing import List, Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'e2b8c5f31a07'
+down_revision: Union[str, Sequence[str], None] = 'c7a92e4d1b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS_QUERY = sa.text(
+    "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+    "WHERE i.inhparent = 'transactions'::regclass"
+)
+
+
+def _create_partitioned_index(name: str, columns: str, where: Optional[str] = None) -> None:
+    """То же, что в c7a92e4d1b58, плюс частичные индексы (WHERE одинаковый у родителя и секций)"""
+    partitions: List[str] = list(op.get_bind().scalars(PARTITIONS_QUERY))
+    predicate: str = f" WHERE {where}" if where else ""
+
+    op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY transactions ({columns}){predicate}")
+
+    with op.get_context().autocommit_block():
+        for partition in partitions:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition}_{name} ON {partition} ({columns}){predicate}"
+            )
+            op.execute(f"ALTER INDEX {name} ATTACH PARTITION {partition}_{name}")
+
+
+def upgrade() -> None:
+    # Редкие статусы и тип credit: частичные индексы маленькие и сохраняют порядок (created_at, id)
+    _create_partitioned_index(
+        name="ix_transactions_account_id_status_created_at_id",
+        columns="account_id, status, created_at, id",
+        where="status <> 'completed'",
+    )
+    _create_partitioned_index(
+        name="ix_transactions_account_id_type_created_at_id",
+        columns="account_id, type, created_at, id",
+        where="type <> 'debit'",
+    )
+    _create_partitioned_index(name="ix_transactions_account_id_amount", columns="account_id, amount")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_account_id_amount', table_name='transactions')
+    op.drop_index('ix_transactions_account_id_type_created_at_id', table_name='transactions')
+    op.drop_index('ix_transactions_account_id_status_created_at_id', table_name='transactions')
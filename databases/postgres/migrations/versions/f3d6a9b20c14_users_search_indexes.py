@@ -0,0 +1,37 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'f3d6a9b20c14'
+down_revision: Union[str, Sequence[str], None] = 'e2b8c5f31a07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NAME_EXPRESSION = "lower(first_name || ' ' || coalesce(last_name, ''))"  # Совпадает с USERS_SEARCH_NAME_SQL
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    with op.get_context().autocommit_block():
+        # Префикс email (LIKE 'abc%') - btree, работает и для 1-2 символов
+        op.execute(sa.text(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_lower_email_pattern "
+            "ON users (lower(email) text_pattern_ops)"
+        ))
+        # Подстрока (LIKE '%abc%') в email и имени - триграммы
+        op.execute(sa.text(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_lower_email_trgm "
+            "ON users USING gin (lower(email) gin_trgm_ops)"
+        ))
+        op.execute(sa.text(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_search_name_trgm "
+            f"ON users USING gin (({NAME_EXPRESSION}) gin_trgm_ops)"
+        ))
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in ('ix_users_search_name_trgm', 'ix_users_lower_email_trgm', 'ix_users_lower_email_pattern'):
+            op.drop_index(name, table_name='users', postgresql_concurrently=True, if_exists=True)
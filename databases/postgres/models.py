@@ -5,11 +5,17 @@ from sqlalchemy import (
     Numeric,
     CheckConstraint,
     SmallInteger,
-    LargeBinary
+    LargeBinary,
+    Index,
+    PrimaryKeyConstraint,
+    Date,
+    BigInteger,
+    Text,
+    text
 )
-from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase, relationship
+from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase, relationship, query_expression
 from sqlalchemy.sql import func
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, timezone, timedelta
 from decimal import Decimal
 from typing import Optional, List
 
@@ -20,10 +26,19 @@ class BaseMeta(DeclarativeBase):
     pass
 
 
+# Имя для поиска: выражение запроса должно совпадать с выражением индексов ix_users_search_name_*
+USERS_SEARCH_NAME_SQL: str = "lower(first_name || ' ' || coalesce(last_name, ''))"
+
+
 class Users(BaseMeta):
     __tablename__: str = "users"
     __table_args__ = (
         CheckConstraint("is_active IN (0, 1)", name="chk_user_is_active"),
+        # Поиск администратором: префикс email/имени - btree, подстрока в email/имени - триграммы (pg_trgm)
+        Index("ix_users_lower_email_pattern", text("lower(email) text_pattern_ops")),
+        Index("ix_users_search_name_pattern", text(f"({USERS_SEARCH_NAME_SQL}) text_pattern_ops")),
+        Index("ix_users_lower_email_trgm", text("lower(email) gin_trgm_ops"), postgresql_using="gin"),
+        Index("ix_users_search_name_trgm", text(f"({USERS_SEARCH_NAME_SQL}) gin_trgm_ops"), postgresql_using="gin"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -73,6 +88,9 @@ class Accounts(BaseMeta):
     __tablename__: str = "accounts"
     __table_args__ = (
         CheckConstraint("is_active IN (0, 1)", name="chk_account_is_active"),
+        CheckConstraint("balance_stripes >= 0", name="chk_account_balance_stripes"),
+        # Не больше одного счета с таким именем у пользователя: цель ON CONFLICT при создании счета из вебхука
+        Index("ix_accounts_user_id_name", "user_id", "name", unique=True),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -94,6 +112,16 @@ class Accounts(BaseMeta):
         onupdate=func.now(),
     )
     is_active: Mapped[int] = mapped_column(SmallInteger, default=1, nullable=False)
+    balance_stripes: Mapped[int] = mapped_column(
+        SmallInteger,
+        default=0,
+        server_default="0",
+        nullable=False,
+        comment="0 - баланс только в balance; N - начисления размазываются по N строкам account_balance_stripes"
+    )
+
+    # Баланс с учетом под-балансов, заполняется через with_expression(Accounts.total_balance, ...)
+    total_balance: Mapped[Optional[Decimal]] = query_expression()
 
     # Relationships
     user: Mapped["Users"] = relationship("Users", back_populates="accounts")
@@ -103,11 +131,74 @@ class Accounts(BaseMeta):
         return f"<Accounts(id={self.id}, user_id={self.user_id}, balance={self.balance})>"
 
 
+class AccountBalanceStripes(BaseMeta):
+    """Под-балансы 'горячих' счетов: запись в случайную строку, чтение - сумма всех строк + Accounts.balance"""
+    __tablename__: str = "account_balance_stripes"
+    __table_args__ = (
+        PrimaryKeyConstraint("account_id", "stripe"),
+    )
+
+    account_id: Mapped[int] = mapped_column(ForeignKey("accounts.id"), nullable=False)
+    stripe: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+    balance: Mapped[Decimal] = mapped_column(
+        Numeric(precision=15, scale=2),
+        default=Decimal('0.00'),
+        nullable=False
+    )
+
+    def __repr__(self):
+        return f"<AccountBalanceStripes(account_id={self.account_id}, stripe={self.stripe}, balance={self.balance})>"
+
+
+class AccountDailyBalances(BaseMeta):
+    """
+        Суточные изменения баланса счетов (день - по UTC), ведутся PaymentProcessor вместе с начислением.
+        Striped-счета пишут в свою строку stripe, как и под-балансы; итог дня - сумма по stripe.
+        Баланс на конец дня = текущий баланс - сумма delta за более поздние дни
+    """
+    __tablename__: str = "account_daily_balances"
+    __table_args__ = (
+        PrimaryKeyConstraint("account_id", "day", "stripe"),
+    )
+
+    account_id: Mapped[int] = mapped_column(ForeignKey("accounts.id"), nullable=False)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    stripe: Mapped[int] = mapped_column(SmallInteger, default=0, nullable=False)
+    delta: Mapped[Decimal] = mapped_column(
+        Numeric(precision=15, scale=2),
+        default=Decimal('0.00'),
+        nullable=False
+    )
+
+    def __repr__(self):
+        return f"<AccountDailyBalances(account_id={self.account_id}, day={self.day}, delta={self.delta})>"
+
+
 class Transactions(BaseMeta):
+    """
+        Журнал операций, секционирован по месяцам created_at (RANGE, UTC) + секция по умолчанию.
+        Глобальная уникальность external_id держится таблицей transaction_external_ids:
+        BEFORE INSERT триггер занимает в ней external_id и молча пропускает строку-дубликат
+        (как ON CONFLICT DO NOTHING - RETURNING не возвращает строку)
+    """
     __tablename__: str = "transactions"
     __table_args__ = (
         CheckConstraint("type IN ('debit', 'credit')", name="chk_transaction_type"),
         CheckConstraint("status IN ('pending', 'completed', 'failed', 'cancelled')", name="chk_transaction_status"),
+        Index("ix_transactions_account_id_created_at_id", "account_id", "created_at", "id"),  # Keyset-пагинация
+        # Фильтры выдачи транзакций: частичные индексы по редким значениям status/type, диапазон сумм
+        Index(
+            "ix_transactions_account_id_status_created_at_id",
+            "account_id", "status", "created_at", "id",
+            postgresql_where=text("status <> 'completed'"),
+        ),
+        Index(
+            "ix_transactions_account_id_type_created_at_id",
+            "account_id", "type", "created_at", "id",
+            postgresql_where=text("type <> 'debit'"),
+        ),
+        Index("ix_transactions_account_id_amount", "account_id", "amount"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -121,11 +212,11 @@ class Transactions(BaseMeta):
     external_id: Mapped[Optional[str]] = mapped_column(
         String(100),
         nullable=True,
-        unique=True,
         comment="ID транзакции во внешней системе (банк, платежный шлюз и т.д.)"
     )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
+        primary_key=True,  # Ключ секционирования обязан входить в первичный ключ
         server_default=func.now(),
     )
     updated_at: Mapped[datetime] = mapped_column(
@@ -141,8 +232,28 @@ class Transactions(BaseMeta):
         return f"<Transactions(id={self.id}, account_id={self.account_id}, type={self.type}, amount={self.amount})>"
 
 
+class TransactionExternalIds(BaseMeta):
+    """Занятые external_id всех секций transactions (заполняется триггером, строки не удаляются)"""
+    __tablename__: str = "transaction_external_ids"
+    __table_args__ = (
+        Index("ix_transaction_external_ids_created_at", "created_at"),
+    )
+
+    external_id: Mapped[str] = mapped_column(String(100), primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+
+
 class UsersSessions(BaseMeta):
     __tablename__: str = "users_sessions"
+    __table_args__ = (
+        Index("ix_users_sessions_session_token", "session_token", unique=True),
+        Index("ix_users_sessions_user_id_expires_at", "user_id", "expires_at"),
+        Index("ix_users_sessions_expires_at", "expires_at"),  # Для фоновой очистки истекших сессий
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     session_token: Mapped[str] = mapped_column(String(100), nullable=False)
@@ -172,3 +283,65 @@ class UsersSessions(BaseMeta):
         instance.expires_at = now + timedelta(minutes=minutes)
 
         return instance
+
+
+class UsersSessionsRevocations(BaseMeta):
+    """
+        Отзыв stateless-сессий: токены пользователя, выпущенные раньше not_before, недействительны.
+        user_id без внешнего ключа: отзыв должен пережить удаление пользователя, строку вычищает
+        SessionRevocations по истечении времени жизни сессии
+    """
+    __tablename__: str = "users_sessions_revocations"
+    __table_args__ = (
+        Index("ix_users_sessions_revocations_updated_at", "updated_at"),
+    )
+
+    user_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    not_before: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+    def __repr__(self):
+        return f"<UsersSessionsRevocations(user_id={self.user_id}, not_before={self.not_before})>"
+
+
+class UserDeletionJobs(BaseMeta):
+    """
+        Фоновое удаление пользователя: пользователь сразу деактивируется, зависимые строки удаляются
+        UserDeletionWorker пачками. user_id без внешнего ключа - в конце пользователь удаляется, задача остается
+    """
+    __tablename__: str = "user_deletion_jobs"
+    __table_args__ = (
+        CheckConstraint("status IN ('pending', 'running', 'completed')", name="chk_user_deletion_job_status"),
+        # Одна незавершенная задача на пользователя; по этому же индексу воркер выбирает задачи
+        Index(
+            "ix_user_deletion_jobs_user_id_unfinished",
+            "user_id",
+            unique=True,
+            postgresql_where=text("status IN ('pending', 'running')"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(nullable=False)
+    email: Mapped[str] = mapped_column(String(255), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), default="pending", nullable=False)
+    stage: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)  # Текущая таблица
+    deleted_rows: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # Последняя ошибка, задача повторяется
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<UserDeletionJobs(id={self.id}, user_id={self.user_id}, status={self.status})>"
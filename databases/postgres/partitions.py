@@ -0,0 +1,132 @@
+from datetime import datetime, timezone
+from logging import getLogger, Logger
+from re import compile as re_compile, Pattern
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from src.background import PeriodicWorker
+
+logger: Logger = getLogger(__name__)
+
+UPPER_BOUND_PATTERN: Pattern = re_compile(r"TO \('([^']+)'\)")
+
+
+def month_start(moment: datetime) -> datetime:
+    return moment.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(moment: datetime, months: int) -> datetime:
+    month_index: int = moment.year * 12 + moment.month - 1 + months
+
+    return moment.replace(year=month_index // 12, month=month_index % 12 + 1)
+
+
+def month_partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+async def create_month_partition(connection: AsyncConnection, table: str, month: datetime) -> bool:
+    """
+        Секция на месяц [month, month + 1): отдельная таблица + ATTACH, а не CREATE ... PARTITION OF,
+        чтобы не брать ACCESS EXCLUSIVE на родителя. False - секция уже есть
+    """
+    name: str = month_partition_name(table=table, month=month)
+    exists: Optional[str] = await connection.scalar(text("SELECT to_regclass(:name)::text"), {"name": name})
+    if exists is not None:
+        return False
+
+    lower: str = month.strftime("%Y-%m-%d %H:%M:%S+00")
+    upper: str = add_months(month, 1).strftime("%Y-%m-%d %H:%M:%S+00")
+
+    await connection.execute(text(
+        f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    ))
+    await connection.execute(text(
+        f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    ))
+
+    return True
+
+
+async def list_partitions(connection: AsyncConnection, table: str) -> List[Tuple[str, Optional[datetime]]]:
+    """(имя секции, верхняя граница); у секции по умолчанию граница None"""
+    rows = (await connection.execute(
+        text(
+            """
+                SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = CAST(:table AS regclass)
+            """
+        ),
+        {"table": table},
+    )).all()
+
+    partitions: List[Tuple[str, Optional[datetime]]] = []
+    for name, bound in rows:
+        upper_bound = UPPER_BOUND_PATTERN.search(bound)
+        partitions.append((name, datetime.fromisoformat(upper_bound.group(1)) if upper_bound else None))
+
+    return partitions
+
+
+async def archive_partition(connection: AsyncConnection, table: str, name: str, archive_schema: str) -> None:
+    """Отсоединенная секция не видна запросам к родителю, но остается в archive_schema для выгрузки/удаления"""
+    await connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+    await connection.execute(text(f"ALTER TABLE {name} SET SCHEMA {archive_schema}"))
+
+
+class TransactionsPartitionsMaintainer(PeriodicWorker):
+    """
+        Обслуживание помесячных секций transactions:
+         - заранее создает секции на months_ahead месяцев вперед (строки не должны попадать в секцию по умолчанию);
+         - при заданном retention_months отсоединяет секции старше срока и переносит их в archive_schema.
+        DDL выполняется в autocommit с коротким lock_timeout: при конкуренции за блокировку повтор на следующем проходе
+    """
+
+    def __init__(
+            self,
+            engine: AsyncEngine,
+            interval_seconds: float,
+            months_ahead: int,
+            retention_months: Optional[int],
+            archive_schema: str,
+            lock_timeout: str = "5s",
+            table: str = "transactions",
+    ) -> None:
+        super().__init__(interval_seconds=interval_seconds)
+
+        self._engine: AsyncEngine = engine
+        self._months_ahead: int = months_ahead
+        self._retention_months: Optional[int] = retention_months
+        self._archive_schema: str = archive_schema
+        self._lock_timeout: str = lock_timeout
+        self._table: str = table
+
+    async def run_once(self) -> None:
+        current_month: datetime = month_start(datetime.now(timezone.utc))
+
+        async with self._engine.connect() as connection:
+            await connection.execution_options(isolation_level="AUTOCOMMIT")
+            await connection.execute(text(f"SET lock_timeout = '{self._lock_timeout}'"))
+
+            for months in range(self._months_ahead + 1):
+                month: datetime = add_months(current_month, months)
+                if await create_month_partition(connection=connection, table=self._table, month=month):
+                    logger.info("Partition %s created", month_partition_name(table=self._table, month=month))
+
+            if self._retention_months is None:
+                return
+
+            cutoff: datetime = add_months(current_month, -self._retention_months)
+            for name, upper_bound in await list_partitions(connection=connection, table=self._table):
+                if upper_bound is not None and upper_bound <= cutoff:
+                    await archive_partition(
+                        connection=connection,
+                        table=self._table,
+                        name=name,
+                        archive_schema=self._archive_schema,
+                    )
+                    logger.info("Partition %s archived to %s", name, self._archive_schema)
@@ -0,0 +1,87 @@
+from time import monotonic
+from typing import Any, Optional
+
+from fastapi.requests import Request
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+
+from src.metrics import Histogram
+
+
+class PoolMetrics:
+    """
+        Счетчики пула по событиям SQLAlchemy (connect/checkout/checkin/invalidate)
+        и гистограмма ожидания соединения (заполняет InstrumentedQueuePool).
+        Текущее состояние (выдано/overflow/свободно) читается из самого пула в момент запроса
+    """
+
+    def __init__(self) -> None:
+        self.wait: Histogram = Histogram()  # Ожидание свободного соединения или создание нового
+        self.timeouts: int = 0  # Не дождались за pool_timeout
+        self.connects: int = 0
+        self.checkouts: int = 0
+        self.checkins: int = 0
+        self.invalidations: int = 0  # В т.ч. соединения, не прошедшие pre-ping
+
+        self._engine: Optional[AsyncEngine] = None
+
+    @property
+    def pool(self) -> AsyncAdaptedQueuePool:
+        return self._engine.sync_engine.pool  # type: ignore
+
+    def attach(self, engine: AsyncEngine) -> None:
+        """Слушатели регистрируются на engine: переживают пересоздание пула при dispose()"""
+        self._engine = engine
+        if isinstance(self.pool, InstrumentedQueuePool):
+            self.pool.metrics = self
+
+        event.listen(engine.sync_engine, "connect", self._on_connect)
+        event.listen(engine.sync_engine, "checkout", self._on_checkout)
+        event.listen(engine.sync_engine, "checkin", self._on_checkin)
+        event.listen(engine.sync_engine, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, *_: Any) -> None:
+        self.connects += 1
+
+    def _on_checkout(self, *_: Any) -> None:
+        self.checkouts += 1
+
+    def _on_checkin(self, *_: Any) -> None:
+        self.checkins += 1
+
+    def _on_invalidate(self, *_: Any) -> None:
+        self.invalidations += 1
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+        Пул с замером ожидания соединения. События "до выдачи" в SQLAlchemy нет,
+        поэтому время меряется вокруг _do_get (очередь пула + создание overflow-соединения)
+    """
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        if self.metrics is None:
+            return super()._do_get()
+
+        started_at: float = monotonic()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.wait.observe(monotonic() - started_at)
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        pool = super().recreate()
+        pool.metrics = self.metrics  # type: ignore
+
+        return pool  # type: ignore
+
+
+def pool_metrics(request: Request) -> PoolMetrics:
+    return request.app.state.pool_metrics
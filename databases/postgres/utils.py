@@ -1,9 +1,35 @@
+from decimal import Decimal
 from typing import AsyncGenerator
 
 from fastapi.requests import Request
+from sqlalchemy import ColumnElement, Select, select, func, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from databases.postgres.models import Accounts, AccountBalanceStripes
+
 
 async def async_db_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
     async with request.app.state.session_factory() as session:
         yield session
+
+
+def account_total_balance() -> ColumnElement[Decimal]:
+    """Accounts.balance + сумма под-балансов (для счетов без striped-режима подзапрос пуст)"""
+    stripes_balance = (
+        select(func.coalesce(func.sum(AccountBalanceStripes.balance), 0))
+        .where(AccountBalanceStripes.account_id == Accounts.id)
+        .scalar_subquery()
+    )
+
+    return Accounts.balance + stripes_balance
+
+
+async def estimate_rows(db_session: AsyncSession, statement: Select) -> int:
+    """
+        Оценка числа строк запроса по статистике планировщика (EXPLAIN без выполнения) вместо COUNT(*):
+        стоит как планирование, точность - как у ANALYZE/autovacuum. Параметры подставляются литералами
+    """
+    compiled = statement.compile(dialect=db_session.get_bind().dialect, compile_kwargs={"literal_binds": True})
+    plan = await db_session.scalar(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+
+    return int(plan[0]["Plan"]["Plan Rows"])  # type: ignore
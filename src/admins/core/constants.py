@@ -1,2 +1,25 @@
 ADMIN_ROLE_ID: int = 2
 USERS_PER_PAGE: int = 10
+USERS_MAX_PAGE_SIZE: int = 100
+
+USERS_IMPORT_FORMAT_NDJSON: str = "ndjson"
+USERS_IMPORT_FORMAT_CSV: str = "csv"
+USERS_IMPORT_BATCH_SIZE: int = 1000  # Строк на COPY + слияние + коммит
+USERS_IMPORT_HASH_CHUNK_SIZE: int = 16  # Паролей на одну задачу пула хеширования
+USERS_IMPORT_MAX_LINE_BYTES: int = 64 * 1024
+USERS_IMPORT_MAX_REPORTED_ERRORS: int = 10000  # Дальше ошибки только считаются (failed)
+
+USERS_BULK_ACTION_DELETE: str = "delete"
+USERS_BULK_ACTION_DEACTIVATE: str = "deactivate"
+USERS_BULK_ACTION_UPDATE: str = "update"
+USERS_BULK_CHUNK_SIZE: int = 1000  # email на один UPDATE/DELETE ... WHERE email = ANY(...) и коммит
+USERS_BULK_MAX_EMAILS: int = 100000
+
+USERS_SEARCH_MODE_PREFIX: str = "prefix"
+USERS_SEARCH_MODE_SUBSTRING: str = "substring"
+USERS_SEARCH_SUBSTRING_MIN_LENGTH: int = 3  # Короче триграммный индекс не сужает поиск
+
+USER_DELETION_INTERVAL_SECONDS: int = 5  # Как часто воркер ищет задачи удаления
+USER_DELETION_BATCH_SIZE: int = 5000  # Строк на одну транзакцию удаления
+USER_DELETION_BATCH_PAUSE_SECONDS: float = 0.2  # Пауза между пачками: ограничение нагрузки на WAL/autovacuum
+USER_DELETION_LEASE_SECONDS: int = 120  # Задача "running" без прогресса дольше - процесс упал, задачу берет другой
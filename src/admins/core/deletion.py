@@ -0,0 +1,221 @@
+from asyncio import sleep as asyncio_sleep
+from datetime import timedelta
+from logging import getLogger, Logger
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import CursorResult, Delete, Select, and_, delete, func, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from databases.postgres.models import (
+    Accounts,
+    AccountBalanceStripes,
+    AccountDailyBalances,
+    Transactions,
+    UserDeletionJobs,
+    Users,
+    UsersSessions
+)
+from src.background import PeriodicWorker
+
+logger: Logger = getLogger(__name__)
+
+JOB_STATUS_PENDING = "pending"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_COMPLETED = "completed"
+UNFINISHED_JOB_STATUSES = (JOB_STATUS_PENDING, JOB_STATUS_RUNNING)
+
+
+async def schedule_user_deletions(db_session: AsyncSession, users: Sequence[Tuple[int, str]]) -> None:
+    """
+        Задачи удаления для уже деактивированных (user_id, email), в транзакции вызывающего.
+        У пользователя с незавершенной задачей новая не создается
+    """
+    if not users:
+        return
+
+    await db_session.execute(
+        insert(UserDeletionJobs)
+        .values([{"user_id": user_id, "email": email} for user_id, email in users])
+        .on_conflict_do_nothing(
+            index_elements=[UserDeletionJobs.user_id],
+            index_where=UserDeletionJobs.status.in_(UNFINISHED_JOB_STATUSES),
+        )
+    )
+
+
+def _user_account_ids(user_id: int) -> Select:
+    return select(Accounts.id).where(Accounts.user_id == user_id)
+
+
+def _transactions_batch(user_id: int, limit: int) -> Delete:
+    batch = (
+        select(Transactions.id, Transactions.created_at)
+        .where(Transactions.account_id.in_(_user_account_ids(user_id)))
+        .limit(limit)
+    )
+
+    return delete(Transactions).where(tuple_(Transactions.id, Transactions.created_at).in_(batch))
+
+
+def _daily_balances_batch(user_id: int, limit: int) -> Delete:
+    batch = (
+        select(AccountDailyBalances.account_id, AccountDailyBalances.day, AccountDailyBalances.stripe)
+        .where(AccountDailyBalances.account_id.in_(_user_account_ids(user_id)))
+        .limit(limit)
+    )
+
+    return delete(AccountDailyBalances).where(
+        tuple_(AccountDailyBalances.account_id, AccountDailyBalances.day, AccountDailyBalances.stripe).in_(batch)
+    )
+
+
+def _balance_stripes_batch(user_id: int, limit: int) -> Delete:
+    batch = (
+        select(AccountBalanceStripes.account_id, AccountBalanceStripes.stripe)
+        .where(AccountBalanceStripes.account_id.in_(_user_account_ids(user_id)))
+        .limit(limit)
+    )
+
+    return delete(AccountBalanceStripes).where(
+        tuple_(AccountBalanceStripes.account_id, AccountBalanceStripes.stripe).in_(batch)
+    )
+
+
+def _sessions_batch(user_id: int, limit: int) -> Delete:
+    batch = select(UsersSessions.id).where(UsersSessions.user_id == user_id).limit(limit)
+
+    return delete(UsersSessions).where(UsersSessions.id.in_(batch))
+
+
+def _accounts_batch(user_id: int, limit: int) -> Delete:
+    return delete(Accounts).where(Accounts.id.in_(_user_account_ids(user_id).limit(limit)))
+
+
+# Порядок - от зависимых таблиц к счетам. external_id удаленных транзакций остаются занятыми
+# в transaction_external_ids: повтор старого вебхука не создаст транзакцию заново.
+# users_sessions_revocations не трогаем: отзыв подписанных токенов должен действовать до их истечения
+STAGES: List[Tuple[str, Callable[[int, int], Delete]]] = [
+    ("transactions", _transactions_batch),
+    ("account_daily_balances", _daily_balances_batch),
+    ("account_balance_stripes", _balance_stripes_batch),
+    ("users_sessions", _sessions_batch),
+    ("accounts", _accounts_batch),
+]
+
+
+class UserDeletionWorker(PeriodicWorker):
+    """
+        Выполнение user_deletion_jobs: зависимые строки удаляются короткими транзакциями по batch_size
+        с паузой batch_pause_seconds, прогресс (stage, deleted_rows) пишется в задачу в той же транзакции.
+        Последним удаляется сам пользователь, вместе с отметкой completed.
+        Задачу "running" без прогресса дольше lease_seconds (упавший процесс) подхватывает любой процесс;
+        повтор безопасен - каждая стадия удаляет то, что еще осталось
+    """
+
+    def __init__(
+            self,
+            session_factory: async_sessionmaker[AsyncSession],
+            interval_seconds: float,
+            batch_size: int,
+            batch_pause_seconds: float,
+            lease_seconds: float,
+    ) -> None:
+        super().__init__(interval_seconds=interval_seconds)
+
+        self._session_factory: async_sessionmaker[AsyncSession] = session_factory
+        self._batch_size: int = batch_size
+        self._batch_pause_seconds: float = batch_pause_seconds
+        self._lease: timedelta = timedelta(seconds=lease_seconds)
+
+    async def run_once(self) -> None:
+        while (job := await self._claim_job()) is not None:
+            job_id, user_id = job
+
+            try:
+                await self._run_job(job_id=job_id, user_id=user_id)
+            except Exception as error:
+                # Задача остается running и будет подхвачена повторно после истечения lease
+                logger.exception("User deletion job %s failed", job_id)
+                await self._record_error(job_id=job_id, error=str(error))
+                return
+
+    async def _claim_job(self) -> Optional[Tuple[int, int]]:
+        claimable = (
+            select(UserDeletionJobs.id)
+            .where(or_(
+                UserDeletionJobs.status == JOB_STATUS_PENDING,
+                and_(
+                    UserDeletionJobs.status == JOB_STATUS_RUNNING,
+                    UserDeletionJobs.updated_at < func.now() - self._lease,
+                ),
+            ))
+            .order_by(UserDeletionJobs.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+
+        async with self._session_factory() as db_session:
+            job = (await db_session.execute(
+                update(UserDeletionJobs)
+                .where(UserDeletionJobs.id == claimable)
+                .values(status=JOB_STATUS_RUNNING, updated_at=func.now())
+                .returning(UserDeletionJobs.id, UserDeletionJobs.user_id)
+            )).first()
+            await db_session.commit()
+
+        return (job[0], job[1]) if job is not None else None
+
+    async def _run_job(self, job_id: int, user_id: int) -> None:
+        for stage, batch_statement in STAGES:
+            while True:
+                async with self._session_factory() as db_session:
+                    deleted: CursorResult = await db_session.execute(batch_statement(user_id, self._batch_size))
+                    await db_session.execute(
+                        update(UserDeletionJobs)
+                        .where(UserDeletionJobs.id == job_id)
+                        .values(
+                            stage=stage,
+                            deleted_rows=UserDeletionJobs.deleted_rows + deleted.rowcount,
+                            updated_at=func.now(),  # Продление lease
+                        )
+                    )
+                    await db_session.commit()
+
+                if deleted.rowcount < self._batch_size:
+                    break
+
+                await asyncio_sleep(self._batch_pause_seconds)
+
+        async with self._session_factory() as db_session:
+            try:
+                await db_session.execute(delete(Users).where(Users.id == user_id))
+            except IntegrityError:
+                # Пока шло удаление, появились новые строки (например, счет из вебхука) - следующий проход
+                await db_session.rollback()
+                await self._record_error(job_id=job_id, error="New dependent rows appeared, retrying")
+                return
+
+            await db_session.execute(
+                update(UserDeletionJobs)
+                .where(UserDeletionJobs.id == job_id)
+                .values(
+                    status=JOB_STATUS_COMPLETED,
+                    stage=None,
+                    deleted_rows=UserDeletionJobs.deleted_rows + 1,
+                    error=None,
+                    completed_at=func.now(),
+                )
+            )
+            await db_session.commit()
+
+        logger.info("User %s deleted by job %s", user_id, job_id)
+
+    async def _record_error(self, job_id: int, error: str) -> None:
+        async with self._session_factory() as db_session:
+            await db_session.execute(
+                update(UserDeletionJobs).where(UserDeletionJobs.id == job_id).values(error=error)
+            )
+            await db_session.commit()
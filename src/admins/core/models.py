@@ -28,6 +28,7 @@ class CreateUserResponse(BaseModel):
 
 class DeleteUserResponse(BaseModel):
     detail: Optional[str] = None
+    job_id: Optional[int] = None  # Задача фонового удаления: /users/deletion-jobs/{job_id}
     error: Optional[ErrorDetail] = None
 
 
@@ -42,5 +43,60 @@ class UsersWithAccountsResponse(BaseModel):
     users: Optional[List[UserWithAccount]] = []
     page: Optional[int] = None
     max_user_per_page: Optional[int] = None
+    next_after_id: Optional[int] = None  # after_id следующей страницы, None - страниц больше нет
+    total_estimate: Optional[int] = None  # Приблизительно: по статистике планировщика
 
     error: Optional[ErrorDetail] = None
+
+
+class ImportUserError(BaseModel):
+    line: int  # Номер строки в загруженном файле (с 1, включая заголовок CSV)
+    email: Optional[str] = None
+    detail: str
+
+
+class ImportUsersResponse(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    errors: Optional[List[ImportUserError]] = []  # Не больше USERS_IMPORT_MAX_REPORTED_ERRORS
+    error: Optional[ErrorDetail] = None
+
+
+class BulkUsersRequest(BaseModel):
+    action: str  # delete | deactivate | update
+    emails: List[str]
+    # Только для update
+    role_id: Optional[int] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+
+
+class BulkUsersResponse(BaseModel):
+    action: Optional[str] = None
+    affected: int = 0
+    missing_emails: Optional[List[str]] = []  # Пользователь с таким email не найден
+    error: Optional[ErrorDetail] = None
+
+
+class UsersSearchResponse(BaseModel):
+    users: Optional[List[UserWithAccount]] = []  # Без счетов (accounts = None)
+    next_after_id: Optional[int] = None
+    error: Optional[ErrorDetail] = None
+
+
+class UserDeletionJob(BaseModel):
+    id: int
+    user_id: int
+    email: str
+    status: str  # pending | running | completed
+    stage: Optional[str] = None  # Таблица, из которой сейчас удаляются строки
+    deleted_rows: int = 0
+    last_error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+
+class UserDeletionJobResponse(BaseModel):
+    job: Optional[UserDeletionJob] = None
+    error: Optional[ErrorDetail] = None
@@ -0,0 +1,238 @@
+"""
+    Массовый импорт пользователей из CSV/NDJSON потоком:
+    тело читается кусками, строки копятся пачками по batch_size, пароли пачки хешируются в пуле процессов,
+    пачка грузится COPY во временную таблицу и сливается в users одним INSERT ... SELECT.
+    Память ограничена размером пачки (и отчетом об ошибках, не больше max_reported_errors строк)
+"""
+from csv import reader as csv_reader
+from dataclasses import dataclass
+from json import JSONDecodeError, loads
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from src.admins.core.constants import USERS_IMPORT_FORMAT_CSV
+from src.admins.core.models import ImportUserError
+from src.password_hasher import PasswordHasher
+
+IMPORT_FIELDS = ("email", "role_id", "password", "first_name", "last_name")
+REQUIRED_FIELDS = ("email", "role_id", "password", "first_name")
+BCRYPT_MAX_PASSWORD_BYTES = 72
+INT4_MAX = 2 ** 31 - 1  # role_id во временной таблице - integer: большее значение уронило бы COPY пачки
+
+CREATE_STAGING_TABLE = text(
+    """
+        CREATE TEMP TABLE users_import (
+            line integer NOT NULL,
+            email varchar(255) NOT NULL,
+            role_id integer NOT NULL,
+            first_name varchar(100) NOT NULL,
+            last_name varchar(100),
+            hash_password bytea NOT NULL
+        ) ON COMMIT DROP
+    """
+)
+COPY_STAGING_TABLE = "COPY users_import (line, email, role_id, first_name, last_name, hash_password) FROM STDIN"
+# Вставленные строки возвращают email (в пачке он уникален), отклоненные - номер строки и причину
+MERGE_STAGING_TABLE = text(
+    """
+        WITH inserted AS (
+            INSERT INTO users (email, role_id, first_name, last_name, hash_password, is_active)
+            SELECT s.email, s.role_id, s.first_name, s.last_name, s.hash_password, 1
+            FROM users_import s
+            JOIN roles r ON r.id = s.role_id
+            ORDER BY s.line
+            ON CONFLICT (email) DO NOTHING
+            RETURNING email
+        )
+        SELECT s.line, s.email, r.id IS NULL AS unknown_role
+        FROM users_import s
+        LEFT JOIN roles r ON r.id = s.role_id
+        WHERE NOT EXISTS (SELECT 1 FROM inserted i WHERE i.email = s.email)
+        ORDER BY s.line
+    """
+)
+
+
+class UsersImportPayloadError(Exception):
+    """Файл целиком не разбирается (формат, заголовок CSV)"""
+
+
+@dataclass
+class ImportUserRow:
+    line: int
+    email: str
+    role_id: int
+    password: str
+    first_name: str
+    last_name: Optional[str]
+
+
+async def iter_records(
+        lines: AsyncIterator[Tuple[int, bytes]],
+        import_format: str,
+) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+        (номер строки, запись, ошибка разбора). CSV - первая непустая строка заголовок,
+        поля в кавычках с переводом строки внутри не поддерживаются
+    """
+    header: Optional[List[str]] = None
+
+    async for line_number, line in lines:
+        if not line.strip():
+            continue
+
+        try:
+            decoded: str = line.decode()
+        except UnicodeDecodeError:
+            yield line_number, None, "Line is not valid UTF-8"
+            continue
+
+        if import_format != USERS_IMPORT_FORMAT_CSV:
+            try:
+                record = loads(decoded)
+            except JSONDecodeError as error:
+                yield line_number, None, f"Invalid JSON: {error.msg}"
+                continue
+
+            if isinstance(record, dict):
+                yield line_number, record, None
+            else:
+                yield line_number, None, "Line must be a JSON object"
+            continue
+
+        values: List[str] = next(csv_reader([decoded]))
+        if header is None:
+            header = [column.strip() for column in values]
+            missing: List[str] = [field for field in REQUIRED_FIELDS if field not in header]
+            if missing:
+                raise UsersImportPayloadError(f"CSV header must contain columns: {', '.join(missing)}")
+            continue
+
+        if len(values) != len(header):
+            yield line_number, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+
+        yield line_number, dict(zip(header, values)), None
+
+
+def validate_record(line: int, record: Dict[str, Any]) -> Tuple[Optional[ImportUserRow], Optional[str]]:
+    """Те же ограничения, что у столбцов users; пароль bcrypt - не длиннее 72 байт"""
+    values: Dict[str, str] = {
+        field: str(record[field]).strip() for field in IMPORT_FIELDS if record.get(field) is not None
+    }
+
+    for field in REQUIRED_FIELDS:
+        if not values.get(field):
+            return None, f"Field {field} is required"
+
+    if "@" not in values["email"] or len(values["email"]) > 255:
+        return None, "Invalid email"
+
+    # isdigit() пропускает и не-ASCII цифры ("²"), которые int() не разбирает
+    if not (values["role_id"].isascii() and values["role_id"].isdigit()) or int(values["role_id"]) > INT4_MAX:
+        return None, f"role_id must be an integer from 0 to {INT4_MAX}"
+
+    if len(values["first_name"]) > 100 or len(values.get("last_name", "")) > 100:
+        return None, "first_name and last_name must not exceed 100 characters"
+
+    password: str = str(record["password"])  # Без strip: пробелы - часть пароля
+    if len(password.encode()) > BCRYPT_MAX_PASSWORD_BYTES:
+        return None, f"Password must not exceed {BCRYPT_MAX_PASSWORD_BYTES} bytes"
+
+    return ImportUserRow(
+        line=line,
+        email=values["email"],
+        role_id=int(values["role_id"]),
+        password=password,
+        first_name=values["first_name"],
+        last_name=values.get("last_name") or None,
+    ), None
+
+
+class UsersImporter:
+    """
+        Каждая пачка - своя транзакция: при ошибке посреди файла уже загруженные пачки остаются,
+        imported/errors описывают, что именно загружено. Дубликаты email внутри пачки отсекаются до COPY,
+        с существующими пользователями и между пачками - ON CONFLICT (email) DO NOTHING
+    """
+
+    def __init__(
+            self,
+            db_session: AsyncSession,
+            password_hasher: PasswordHasher,
+            batch_size: int,
+            hash_chunk_size: int,
+            max_reported_errors: int,
+    ) -> None:
+        self._db_session: AsyncSession = db_session
+        self._password_hasher: PasswordHasher = password_hasher
+        self._batch_size: int = batch_size
+        self._hash_chunk_size: int = hash_chunk_size
+        self._max_reported_errors: int = max_reported_errors
+
+        self.imported: int = 0
+        self.failed: int = 0
+        self.errors: List[ImportUserError] = []
+
+    async def run(self, records: AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]) -> None:
+        batch: Dict[str, ImportUserRow] = {}
+
+        async for line, record, parse_error in records:
+            if record is None:
+                self._reject(line=line, email=None, detail=parse_error or "Invalid line")
+                continue
+
+            row, validation_error = validate_record(line=line, record=record)
+            if row is None:
+                email: Optional[str] = str(record["email"]) if record.get("email") is not None else None
+                self._reject(line=line, email=email, detail=validation_error or "Invalid line")
+                continue
+
+            if row.email in batch:
+                self._reject(line=line, email=row.email, detail="Duplicate email in the file")
+                continue
+
+            batch[row.email] = row
+            if len(batch) >= self._batch_size:
+                await self._import_batch(list(batch.values()))
+                batch = {}
+
+        if batch:
+            await self._import_batch(list(batch.values()))
+
+    async def _import_batch(self, rows: List[ImportUserRow]) -> None:
+        hashed_passwords: List[bytes] = await self._password_hasher.hash_many(
+            passwords=[row.password for row in rows],
+            chunk_size=self._hash_chunk_size,
+        )
+
+        connection: AsyncConnection = await self._db_session.connection()
+        await connection.execute(CREATE_STAGING_TABLE)
+
+        driver_connection = (await connection.get_raw_connection()).driver_connection
+        async with driver_connection.cursor() as cursor:  # type: ignore
+            async with cursor.copy(COPY_STAGING_TABLE) as copy:
+                for row, hashed_password in zip(rows, hashed_passwords):
+                    await copy.write_row(
+                        (row.line, row.email, row.role_id, row.first_name, row.last_name, hashed_password)
+                    )
+
+        rejected = (await connection.execute(MERGE_STAGING_TABLE)).all()
+        await self._db_session.commit()
+
+        for line, email, unknown_role in rejected:
+            self._reject(
+                line=line,
+                email=email,
+                detail="Unknown role_id" if unknown_role else "User with this email already exists",
+            )
+
+        self.imported += len(rows) - len(rejected)
+
+    def _reject(self, line: int, email: Optional[str], detail: str) -> None:
+        self.failed += 1
+
+        if len(self.errors) < self._max_reported_errors:
+            self.errors.append(ImportUserError(line=line, email=email, detail=detail))
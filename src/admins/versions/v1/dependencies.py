@@ -1,73 +1,110 @@
-from typing import Tuple, Annotated, Optional, Dict, Any
-
-from fastapi import Depends, status, Form, Query
-from sqlalchemy import select, Result, Row, delete, CursorResult, update, ScalarResult
+from itertools import chain
+from typing import Annotated, Optional, Dict, Any, List
+
+from fastapi import Depends, Request, status, Form, Query
+from sqlalchemy import (
+    select,
+    update,
+    func,
+    cast,
+    literal_column,
+    literal,
+    or_,
+    any_,
+    bindparam,
+    String,
+    ScalarSelect,
+    Select,
+    Executable
+)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from databases.postgres.models import Users
-from databases.postgres.utils import async_db_session
-from src.admins.core.constants import ADMIN_ROLE_ID, USERS_PER_PAGE
+from databases.postgres.models import Users, Accounts, UserDeletionJobs, USERS_SEARCH_NAME_SQL
+from databases.postgres.utils import async_db_session, account_total_balance, estimate_rows
+from src.admins.core.constants import (
+    ADMIN_ROLE_ID,
+    USERS_PER_PAGE,
+    USERS_MAX_PAGE_SIZE,
+    USERS_IMPORT_FORMAT_NDJSON,
+    USERS_IMPORT_FORMAT_CSV,
+    USERS_IMPORT_BATCH_SIZE,
+    USERS_IMPORT_HASH_CHUNK_SIZE,
+    USERS_IMPORT_MAX_LINE_BYTES,
+    USERS_IMPORT_MAX_REPORTED_ERRORS,
+    USERS_BULK_ACTION_DELETE,
+    USERS_BULK_ACTION_DEACTIVATE,
+    USERS_BULK_ACTION_UPDATE,
+    USERS_BULK_CHUNK_SIZE,
+    USERS_BULK_MAX_EMAILS,
+    USERS_SEARCH_MODE_PREFIX,
+    USERS_SEARCH_MODE_SUBSTRING,
+    USERS_SEARCH_SUBSTRING_MIN_LENGTH
+)
 from src.admins.core.models import (
     AdminInfoSessionResponse,
     CreateUserResponse,
     DeleteUserResponse,
     UpdateUserResponse,
     UserWithAccount,
-    UsersWithAccountsResponse, UserAccount
-
+    UsersWithAccountsResponse,
+    ImportUsersResponse,
+    BulkUsersRequest,
+    BulkUsersResponse,
+    UsersSearchResponse,
+    UserDeletionJob,
+    UserDeletionJobResponse
+)
+from src.admins.core.deletion import schedule_user_deletions, UNFINISHED_JOB_STATUSES
+from src.admins.core.users_import import UsersImporter, UsersImportPayloadError, iter_records
+from src.mock_transactions.cache import AccountCache
+from src.mock_transactions.utils import account_cache as account_cache_dependency
+from src.sso.core.cache import SessionCache
+from src.sso.core.constants import SESSION_MODE, SESSION_MODE_SIGNED
+from src.sso.core.models import ErrorDetail, UserSessionResponse, BaseUserInfo, SessionPrincipal
+from src.sso.core.revocations import SessionRevocations
+from src.sso.core.utils import (
+    session_cache as session_cache_dependency,
+    session_revocations as session_revocations_dependency
 )
-from src.sso.core.models import ErrorDetail, UserSessionResponse, BaseUserInfo
 from src.sso.versions.v1.dependencies import check_active_session
-from src.utils import hash_password
+from src.users.core.cache import AccountsVersions
+from src.users.core.utils import accounts_versions as accounts_versions_dependency
+from src.password_hasher import PasswordHasher, PasswordHasherBusyError, password_hasher as password_hasher_dependency
+from src.utils import iter_lines, LineTooLongError
 
 
 async def admin_info_session(
         user_session: UserSessionResponse = Depends(check_active_session),
-        db_session: AsyncSession = Depends(async_db_session)
 ) -> AdminInfoSessionResponse:
+    """Администратор уже получен вместе с сессией в check_active_session - дополнительных запросов нет"""
     result: AdminInfoSessionResponse = AdminInfoSessionResponse()
 
-    try:
-        if user_session.active_session is False:
-            result.error = ErrorDetail(
-                status_code=user_session.error.status_code,  # type: ignore
-                detail=user_session.error.detail,  # type: ignore
-            )
-
-            return result
-
-        admin: Result[Tuple] = await db_session.execute(
-            select(Users.id, Users.email, Users.first_name, Users.last_name).where(
-                Users.id == user_session.user_id,
-                Users.role_id == ADMIN_ROLE_ID
-            )
+    if user_session.active_session is False:
+        result.error = ErrorDetail(
+            status_code=user_session.error.status_code,  # type: ignore
+            detail=user_session.error.detail,  # type: ignore
         )
-        admin_data: Optional[Row[Tuple[Any]]] = admin.first()
 
-        if not admin_data:
-            result.error = ErrorDetail(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="User not found or user is not an administrator"
-            )
-
-            return result
+        return result
 
-        user_id, email, first_name, last_name = admin_data
-
-        result.user = BaseUserInfo(
-            id=user_id,
-            email=email,
-            full_name=f"{first_name} {last_name}" if last_name else first_name,
-        )
+    principal: SessionPrincipal = user_session.principal  # type: ignore
 
-    except Exception as error:
+    if principal.role_id != ADMIN_ROLE_ID:
         result.error = ErrorDetail(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Oops, something went wrong! {error}",
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User not found or user is not an administrator"
         )
 
+        return result
+
+    result.user = BaseUserInfo(
+        id=principal.id,
+        email=principal.email,
+        full_name=principal.full_name,
+    )
+
     return result
 
 
@@ -78,7 +115,8 @@ async def create_user(
         first_name: Annotated[str, Form()],
         last_name: Annotated[Optional[str], Form()] = None,
         admin_session: UserSessionResponse = Depends(admin_info_session),
-        db_session: AsyncSession = Depends(async_db_session)
+        db_session: AsyncSession = Depends(async_db_session),
+        password_hasher: PasswordHasher = Depends(password_hasher_dependency),
 ) -> CreateUserResponse:
     """
         Создание пользователей (Только для роли admin)
@@ -101,7 +139,7 @@ async def create_user(
             role_id=role_id,
             first_name=first_name,
             last_name=last_name,
-            hash_password=hash_password(password=password)
+            hash_password=await password_hasher.hash(password=password)
         )
         db_session.add(new_user)
 
@@ -118,6 +156,75 @@ async def create_user(
             detail="User is registered or field failed validation",
         )
 
+    except PasswordHasherBusyError:
+        result.error = ErrorDetail(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Password hashing is overloaded, try again later",
+        )
+
+    except Exception as error:
+        await db_session.rollback()
+        result.error = ErrorDetail(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Oops, something went wrong! {error}",
+        )
+
+    return result
+
+
+async def import_users(
+        request: Request,
+        import_format: str = Query(default=USERS_IMPORT_FORMAT_NDJSON, alias="format"),
+        admin_session: UserSessionResponse = Depends(admin_info_session),
+        db_session: AsyncSession = Depends(async_db_session),
+        password_hasher: PasswordHasher = Depends(password_hasher_dependency),
+) -> ImportUsersResponse:
+    """
+        Массовое создание пользователей: тело - NDJSON или CSV с заголовком
+        (email, role_id, password, first_name, last_name). Ошибки - по строкам, остальные строки загружаются
+    """
+    result: ImportUsersResponse = ImportUsersResponse()
+
+    if admin_session.error:
+        result.error = ErrorDetail(
+            status_code=admin_session.error.status_code,
+            detail=admin_session.error.detail,
+        )
+        return result
+
+    if import_format not in (USERS_IMPORT_FORMAT_NDJSON, USERS_IMPORT_FORMAT_CSV):
+        result.error = ErrorDetail(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Format must be {USERS_IMPORT_FORMAT_NDJSON} or {USERS_IMPORT_FORMAT_CSV}",
+        )
+        return result
+
+    importer: UsersImporter = UsersImporter(
+        db_session=db_session,
+        password_hasher=password_hasher,
+        batch_size=USERS_IMPORT_BATCH_SIZE,
+        hash_chunk_size=USERS_IMPORT_HASH_CHUNK_SIZE,
+        max_reported_errors=USERS_IMPORT_MAX_REPORTED_ERRORS,
+    )
+
+    try:
+        await importer.run(iter_records(
+            lines=iter_lines(chunks=request.stream(), max_line_bytes=USERS_IMPORT_MAX_LINE_BYTES),
+            import_format=import_format,
+        ))
+
+    except (UsersImportPayloadError, LineTooLongError) as error:
+        result.error = ErrorDetail(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"{error}. Imported before the error: {importer.imported}",
+        )
+
+    except PasswordHasherBusyError:
+        result.error = ErrorDetail(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Password hashing is overloaded, try again later. Imported before the error: {importer.imported}",
+        )
+
     except Exception as error:
         await db_session.rollback()
         result.error = ErrorDetail(
@@ -125,17 +232,25 @@ async def create_user(
             detail=f"Oops, something went wrong! {error}",
         )
 
+    result.imported = importer.imported
+    result.failed = importer.failed
+    result.errors = importer.errors
+
     return result
 
 
 async def delete_user(
         email: Annotated[str, Form()],
         admin_session: UserSessionResponse = Depends(admin_info_session),
-        db_session: AsyncSession = Depends(async_db_session)
+        db_session: AsyncSession = Depends(async_db_session),
+        session_cache: SessionCache = Depends(session_cache_dependency),
+        session_revocations: SessionRevocations = Depends(session_revocations_dependency),
+        account_cache: AccountCache = Depends(account_cache_dependency),
+        accounts_versions: AccountsVersions = Depends(accounts_versions_dependency),
 ) -> DeleteUserResponse:
     """
-        Упрощенная реализация удаление пользователей по email (Демо в качестве тестового):
-         - Отсутствует точная обработка ошибок
+        Пользователь сразу деактивируется (сессии и вход перестают работать), строки удаляются в фоне
+        (UserDeletionWorker): одним DELETE пользователь с большой историей держал бы блокировки минутами
     """
     result: DeleteUserResponse = DeleteUserResponse()
 
@@ -147,12 +262,12 @@ async def delete_user(
             )
             return result
 
-        remove_user: CursorResult = await db_session.execute(
-            delete(Users).where(Users.email == email)
+        user_id: Optional[int] = await db_session.scalar(
+            update(Users).where(Users.email == email).values(is_active=0).returning(Users.id)
         )
-        await db_session.commit()
 
-        if remove_user.rowcount == 0:
+        if user_id is None:
+            await db_session.rollback()
             result.error = ErrorDetail(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User with this email not found",
@@ -160,7 +275,166 @@ async def delete_user(
 
             return result
 
-        result.detail = f"User with email {email} successfully deleted"
+        await schedule_user_deletions(db_session=db_session, users=[(user_id, email)])
+        result.job_id = await db_session.scalar(
+            select(UserDeletionJobs.id).where(
+                UserDeletionJobs.user_id == user_id,
+                UserDeletionJobs.status.in_(UNFINISHED_JOB_STATUSES),
+            )
+        )
+        await _forget_users(
+            user_ids=[user_id],
+            db_session=db_session,
+            session_cache=session_cache,
+            session_revocations=session_revocations,
+            account_cache=account_cache,
+            accounts_versions=accounts_versions,
+        )
+        result.detail = f"User with email {email} deactivated, deletion scheduled"
+
+    except Exception as error:
+        await db_session.rollback()
+        result.error = ErrorDetail(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Oops, something went wrong! {error}",
+        )
+
+    return result
+
+
+async def get_user_deletion_job(
+        job_id: int,
+        admin_session: UserSessionResponse = Depends(admin_info_session),
+        db_session: AsyncSession = Depends(async_db_session),
+) -> UserDeletionJobResponse:
+    result: UserDeletionJobResponse = UserDeletionJobResponse()
+
+    try:
+        if admin_session.error:
+            result.error = ErrorDetail(
+                status_code=admin_session.error.status_code,
+                detail=admin_session.error.detail,
+            )
+            return result
+
+        job: Optional[UserDeletionJobs] = await db_session.get(UserDeletionJobs, job_id)
+        if job is None:
+            result.error = ErrorDetail(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Deletion job not found",
+            )
+            return result
+
+        result.job = UserDeletionJob(
+            id=job.id,
+            user_id=job.user_id,
+            email=job.email,
+            status=job.status,
+            stage=job.stage,
+            deleted_rows=job.deleted_rows,
+            last_error=job.error,
+            created_at=job.created_at,
+            updated_at=job.updated_at,
+            completed_at=job.completed_at,
+        )
+
+    except Exception as error:
+        result.error = ErrorDetail(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Oops, something went wrong! {error}",
+        )
+
+    return result
+
+
+async def _forget_users(
+        user_ids: List[int],
+        db_session: AsyncSession,
+        session_cache: SessionCache,
+        session_revocations: SessionRevocations,
+        account_cache: AccountCache,
+        accounts_versions: AccountsVersions,
+) -> None:
+    """
+        Коммит изменений пользователей вместе с отзывом signed-сессий (revoke_users коммитит транзакцию
+        вызывающего): деактивированный без отзыва пользователь сохранил бы действующие токены.
+        Затем сброс закэшированных сессий и счетов - после коммита, чтобы кэш не заполнился прежними данными
+    """
+    if SESSION_MODE == SESSION_MODE_SIGNED:
+        await session_revocations.revoke_users(db_session=db_session, user_ids=user_ids)
+    else:
+        await db_session.commit()
+
+    for user_id in user_ids:
+        session_cache.invalidate_user(user_id)
+        account_cache.invalidate_user(user_id)
+    accounts_versions.bump(user_ids)
+
+
+async def bulk_users_action(
+        payload: BulkUsersRequest,
+        admin_session: UserSessionResponse = Depends(admin_info_session),
+        db_session: AsyncSession = Depends(async_db_session),
+        session_cache: SessionCache = Depends(session_cache_dependency),
+        session_revocations: SessionRevocations = Depends(session_revocations_dependency),
+        account_cache: AccountCache = Depends(account_cache_dependency),
+        accounts_versions: AccountsVersions = Depends(accounts_versions_dependency),
+) -> BulkUsersResponse:
+    """
+        delete / deactivate / update для списка email: по USERS_BULK_CHUNK_SIZE email на один
+        UPDATE ... WHERE email = ANY(:emails) RETURNING id, email и коммит вместе с отзывом сессий.
+        delete - деактивация и задачи UserDeletionWorker, как у delete_user: строки удаляются в фоне.
+        Ненайденные email - разница между запрошенными и возвращенными, без отдельных запросов
+    """
+    result: BulkUsersResponse = BulkUsersResponse(action=payload.action)
+
+    try:
+        if admin_session.error:
+            result.error = ErrorDetail(
+                status_code=admin_session.error.status_code,
+                detail=admin_session.error.detail,
+            )
+            return result
+
+        payload_error: Optional[str] = _bulk_users_payload_error(payload)
+        if payload_error is not None:
+            result.error = ErrorDetail(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=payload_error,
+            )
+            return result
+
+        emails: List[str] = list(dict.fromkeys(email.strip() for email in payload.emails if email.strip()))
+
+        for start in range(0, len(emails), USERS_BULK_CHUNK_SIZE):
+            chunk: List[str] = emails[start:start + USERS_BULK_CHUNK_SIZE]
+
+            rows = (await db_session.execute(_bulk_users_statement(payload=payload, emails=chunk))).all()
+            if payload.action == USERS_BULK_ACTION_DELETE:
+                await schedule_user_deletions(
+                    db_session=db_session,
+                    users=[(user_id, email) for user_id, email in rows],
+                )
+            await _forget_users(
+                user_ids=[user_id for user_id, _ in rows],
+                db_session=db_session,
+                session_cache=session_cache,
+                session_revocations=session_revocations,
+                account_cache=account_cache,
+                accounts_versions=accounts_versions,
+            )
+
+            found_emails = {email for _, email in rows}
+
+            result.affected += len(rows)
+            result.missing_emails.extend(email for email in chunk if email not in found_emails)  # type: ignore
+
+    except IntegrityError:
+        await db_session.rollback()
+        result.error = ErrorDetail(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Field failed validation. Users affected before the error: {result.affected}",
+        )
 
     except Exception as error:
         await db_session.rollback()
@@ -172,6 +446,46 @@ async def delete_user(
     return result
 
 
+def _bulk_users_payload_error(payload: BulkUsersRequest) -> Optional[str]:
+    if payload.action not in (USERS_BULK_ACTION_DELETE, USERS_BULK_ACTION_DEACTIVATE, USERS_BULK_ACTION_UPDATE):
+        return f"Action must be one of: {USERS_BULK_ACTION_DELETE}, {USERS_BULK_ACTION_DEACTIVATE}, " \
+               f"{USERS_BULK_ACTION_UPDATE}"
+
+    if len(payload.emails) > USERS_BULK_MAX_EMAILS:
+        return f"Emails list must not exceed {USERS_BULK_MAX_EMAILS} items"
+
+    if payload.action == USERS_BULK_ACTION_UPDATE and not _bulk_users_updated_data(payload):
+        return "No fields to update"
+
+    return None
+
+
+def _bulk_users_updated_data(payload: BulkUsersRequest) -> Dict[str, Any]:
+    if payload.action in (USERS_BULK_ACTION_DEACTIVATE, USERS_BULK_ACTION_DELETE):
+        return {"is_active": 0}  # delete: строки удаляются в фоне по задачам user_deletion_jobs
+
+    updated_data: Dict[str, Any] = {}
+
+    if payload.role_id is not None:
+        updated_data["role_id"] = payload.role_id
+    if payload.first_name is not None and payload.first_name.strip() != "":
+        updated_data["first_name"] = payload.first_name
+    if payload.last_name is not None and payload.last_name.strip() != "":
+        updated_data["last_name"] = payload.last_name
+
+    return updated_data
+
+
+def _bulk_users_statement(payload: BulkUsersRequest, emails: List[str]) -> Executable:
+    """Один массив-параметр вместо IN (...) на каждый email: текст запроса не зависит от размера пачки"""
+    return (
+        update(Users)
+        .where(Users.email == any_(bindparam("emails", emails, type_=ARRAY(String))))
+        .values(**_bulk_users_updated_data(payload))
+        .returning(Users.id, Users.email)
+    )
+
+
 async def update_user_by_email(
         user_email: Annotated[str, Form()],
         new_email: Annotated[Optional[str], Form()] = None,
@@ -180,7 +494,10 @@ async def update_user_by_email(
         new_last_name: Annotated[Optional[str], Form()] = None,
         new_password: Annotated[Optional[str], Form()] = None,
         admin_session: UserSessionResponse = Depends(admin_info_session),
-        db_session: AsyncSession = Depends(async_db_session)
+        db_session: AsyncSession = Depends(async_db_session),
+        password_hasher: PasswordHasher = Depends(password_hasher_dependency),
+        session_cache: SessionCache = Depends(session_cache_dependency),
+        session_revocations: SessionRevocations = Depends(session_revocations_dependency),
 ) -> UpdateUserResponse:
     """Упрощено без валидации полей"""
     result: UpdateUserResponse = UpdateUserResponse()
@@ -206,7 +523,7 @@ async def update_user_by_email(
         if new_last_name is not None and new_last_name.strip() != "":
             updated_data["last_name"] = new_last_name
         if new_password is not None and new_password.strip() != "":
-            updated_data["hash_password"] = hash_password(new_password)
+            updated_data["hash_password"] = await password_hasher.hash(password=new_password)
 
         if not updated_data:
             result.detail = "No fields to update"
@@ -227,6 +544,11 @@ async def update_user_by_email(
             )
             return result
 
+        # Роль/email/имя лежат в закэшированных сессиях и signed-токенах - сбрасываем их
+        session_cache.invalidate_user(update_result)
+        if SESSION_MODE == SESSION_MODE_SIGNED:
+            await session_revocations.revoke_user(db_session=db_session, user_id=update_result)
+
         result.detail = "User successfully updated"
         result.updated_user_id = update_result
 
@@ -238,6 +560,12 @@ async def update_user_by_email(
 
         )
 
+    except PasswordHasherBusyError:
+        result.error = ErrorDetail(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Password hashing is overloaded, try again later",
+        )
+
     except Exception as error:
         await db_session.rollback()
         result.error = ErrorDetail(
@@ -248,11 +576,68 @@ async def update_user_by_email(
     return result
 
 
+def _user_accounts_json() -> ScalarSelect:
+    """
+        Счета пользователя одним JSON-массивом (json_agg в Postgres) вместо selectinload и ORM-объектов.
+        Баланс отдается строкой: числа JSON разбираются во float и теряют точность Decimal
+    """
+    fields = {
+        "id": Accounts.id,
+        "name": Accounts.name,
+        "balance": cast(account_total_balance(), String),
+        "created_at": Accounts.created_at,
+        "updated_at": Accounts.updated_at,
+        "is_active": Accounts.is_active,
+    }
+    # Ключи - литералами: у параметра в json_build_object("any") Postgres не может вывести тип
+    account = func.json_build_object(*chain.from_iterable(
+        (literal_column(f"'{key}'"), value) for key, value in fields.items()
+    ))
+
+    return (
+        select(func.coalesce(func.json_agg(aggregate_order_by(account, Accounts.id)), literal_column("'[]'::json")))
+        .where(Accounts.user_id == Users.id)
+        .scalar_subquery()
+    )
+
+
+def _users_with_accounts_statement(page_size: int, after_id: Optional[int], page: Optional[int]) -> Select:
+    """Страница активных пользователей со счетами (page_size + 1 строка - признак следующей страницы)"""
+    users_page = (
+        select(
+            Users.id,
+            Users.email,
+            Users.role_id,
+            Users.first_name,
+            Users.last_name,
+            Users.created_at,
+            Users.updated_at,
+            _user_accounts_json().label("accounts"),
+        )
+        .where(Users.is_active == 1)
+        .order_by(Users.id)
+        .limit(page_size + 1)
+    )
+
+    if after_id is not None:
+        return users_page.where(Users.id > after_id)
+    if page is not None:
+        return users_page.offset((page - 1) * page_size)
+
+    return users_page
+
+
 async def get_users_with_accounts(
-        page: int = Query(default=1),
+        after_id: Optional[int] = Query(default=None, description="next_after_id из предыдущего ответа"),
+        page_size: int = Query(default=USERS_PER_PAGE),
+        page: Optional[int] = Query(default=None, description="Устаревшая постраничная выдача (OFFSET)"),
         admin_session: UserSessionResponse = Depends(admin_info_session),
         db_session: AsyncSession = Depends(async_db_session)
 ) -> UsersWithAccountsResponse:
+    """
+        Keyset-пагинация по Users.id: страница - id > after_id по первичному ключу, без OFFSET.
+        Общее число - оценка планировщика, а не COUNT(*) по всей таблице. page оставлен для совместимости
+    """
     result: UsersWithAccountsResponse = UsersWithAccountsResponse()
 
     try:
@@ -261,8 +646,9 @@ async def get_users_with_accounts(
                 status_code=admin_session.error.status_code,
                 detail=admin_session.error.detail,
             )
+            return result
 
-        if page <= 0:
+        if page is not None and page <= 0:
             result.error = ErrorDetail(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Page number must be greater than 0",
@@ -270,46 +656,76 @@ async def get_users_with_accounts(
 
             return result
 
-        limit: int = USERS_PER_PAGE
-        offset: int = (page - 1) * limit
+        if not 0 < page_size <= USERS_MAX_PAGE_SIZE:
+            result.error = ErrorDetail(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Page size must be between 1 and {USERS_MAX_PAGE_SIZE}",
+            )
+
+            return result
+
+        active_users = select(Users.id).where(Users.is_active == 1)
+        rows = (await db_session.execute(
+            _users_with_accounts_statement(page_size=page_size, after_id=after_id, page=page)
+        )).mappings().all()
+
+        # Строки - готовые словари ответа: валидируются pydantic без ORM-объектов и identity map
+        result.users = [UserWithAccount.model_validate(row) for row in rows[:page_size]]
+        if len(rows) > page_size:
+            result.next_after_id = rows[page_size - 1]["id"]
+
+        result.total_estimate = await estimate_rows(db_session=db_session, statement=active_users)
 
-        users_with_accounts: ScalarResult[Users] = await db_session.scalars(
-            select(Users)
-            .where(Users.is_active == 1)
-            .options(selectinload(Users.accounts))
-            .order_by(Users.id)
-            .limit(limit)
-            .offset(offset)
+        result.page = page
+        result.max_user_per_page = page_size
+
+    except Exception as error:
+        result.error = ErrorDetail(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Oops, something went wrong! {error}",
         )
 
-        # Можно добавить обработку для max_page
-
-        for user in users_with_accounts.all():
-            result.users.append(  # type: ignore
-                UserWithAccount(
-                    id=user.id,
-                    email=user.email,
-                    role_id=user.role_id,
-                    first_name=user.first_name,
-                    last_name=user.last_name,
-                    created_at=user.created_at,
-                    updated_at=user.updated_at,
-                    accounts=[
-                        UserAccount(
-                            id=account.id,
-                            name=account.name,
-                            balance=account.balance,
-                            created_at=account.created_at,
-                            updated_at=account.updated_at,
-                            is_active=account.is_active,
-                        ) for account in user.accounts
-                    ]
-                )
+    return result
+
+
+async def search_users(
+        q: str = Query(description="Начало (prefix) или часть (substring) email либо имени"),
+        mode: str = Query(default=USERS_SEARCH_MODE_PREFIX, description="prefix | substring"),
+        after_id: Optional[int] = Query(default=None, description="next_after_id из предыдущего ответа"),
+        page_size: int = Query(default=USERS_PER_PAGE),
+        admin_session: UserSessionResponse = Depends(admin_info_session),
+        db_session: AsyncSession = Depends(async_db_session)
+) -> UsersSearchResponse:
+    """
+        Поиск без учета регистра по email и имени ("first_name last_name"), keyset-пагинация по id:
+         - prefix: btree text_pattern_ops по lower(email) и по имени (работает и для 1-2 символов);
+         - substring: триграммы по email и имени (запрос от USERS_SEARCH_SUBSTRING_MIN_LENGTH символов).
+        Шаблон LIKE подставляется литералом: для параметра общий план не может использовать индекс
+    """
+    result: UsersSearchResponse = UsersSearchResponse()
+
+    try:
+        if admin_session.error:
+            result.error = ErrorDetail(
+                status_code=admin_session.error.status_code,
+                detail=admin_session.error.detail,
             )
+            return result
 
-        result.page = page
-        result.max_user_per_page = USERS_PER_PAGE
-        # Можно добавить в модель различные атрибуты (max_page, next_page, prev_page и т.п)
+        search_error: Optional[str] = _search_users_error(q=q.strip(), mode=mode, page_size=page_size)
+        if search_error is not None:
+            result.error = ErrorDetail(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=search_error,
+            )
+            return result
+
+        users_page = _search_users_statement(q=q.strip(), mode=mode, after_id=after_id, page_size=page_size)
+        rows = (await db_session.execute(users_page)).mappings().all()
+
+        result.users = [UserWithAccount.model_validate(row) for row in rows[:page_size]]
+        if len(rows) > page_size:
+            result.next_after_id = rows[page_size - 1]["id"]
 
     except Exception as error:
         result.error = ErrorDetail(
@@ -318,3 +734,49 @@ async def get_users_with_accounts(
         )
 
     return result
+
+
+def _search_users_statement(q: str, mode: str, after_id: Optional[int], page_size: int) -> Select:
+    escaped: str = q.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    pattern = literal(
+        f"{escaped}%" if mode == USERS_SEARCH_MODE_PREFIX else f"%{escaped}%",
+        literal_execute=True,
+    )
+
+    users_page = (
+        select(
+            Users.id,
+            Users.email,
+            Users.role_id,
+            Users.first_name,
+            Users.last_name,
+            Users.created_at,
+            Users.updated_at,
+        )
+        .where(
+            Users.is_active == 1,
+            or_(func.lower(Users.email).like(pattern), literal_column(USERS_SEARCH_NAME_SQL).like(pattern)),
+        )
+        .order_by(Users.id)
+        .limit(page_size + 1)
+    )
+    if after_id is not None:
+        users_page = users_page.where(Users.id > after_id)
+
+    return users_page
+
+
+def _search_users_error(q: str, mode: str, page_size: int) -> Optional[str]:
+    if mode not in (USERS_SEARCH_MODE_PREFIX, USERS_SEARCH_MODE_SUBSTRING):
+        return f"Mode must be {USERS_SEARCH_MODE_PREFIX} or {USERS_SEARCH_MODE_SUBSTRING}"
+
+    if not q:
+        return "Search query must not be empty"
+
+    if mode == USERS_SEARCH_MODE_SUBSTRING and len(q) < USERS_SEARCH_SUBSTRING_MIN_LENGTH:
+        return f"Substring search query must be at least {USERS_SEARCH_SUBSTRING_MIN_LENGTH} characters"
+
+    if not 0 < page_size <= USERS_MAX_PAGE_SIZE:
+        return f"Page size must be between 1 and {USERS_MAX_PAGE_SIZE}"
+
+    return None
@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, status
 
 from src.admins.core.models import (
     AdminInfoSessionResponse,
     CreateUserResponse,
     DeleteUserResponse,
     UpdateUserResponse,
-    UsersWithAccountsResponse
+    UsersWithAccountsResponse,
+    ImportUsersResponse,
+    BulkUsersResponse,
+    UsersSearchResponse,
+    UserDeletionJobResponse
 )
 from src.admins.versions.v1.dependencies import (
     admin_info_session as admin_info_session_dependency,
@@ -13,6 +17,10 @@ from src.admins.versions.v1.dependencies import (
     delete_user as delete_user_dependency,
     update_user_by_email as update_user_by_email_dependency,
     get_users_with_accounts as get_users_with_accounts_dependency,
+    import_users as import_users_dependency,
+    bulk_users_action as bulk_users_action_dependency,
+    search_users as search_users_dependency,
+    get_user_deletion_job as get_user_deletion_job_dependency,
 )
 
 router: APIRouter = APIRouter(prefix="/api/v1/admins", tags=["ADMINS_API_V1"])
@@ -44,7 +52,28 @@ async def create_user(
     return result
 
 
-@router.delete(path="/users/delete-user")
+@router.post(
+    path="/users/import",
+    description="Массовое создание пользователей: тело - NDJSON (format=ndjson) или CSV с заголовком (format=csv), "
+                "поля email, role_id, password, first_name, last_name. Ошибки возвращаются по номерам строк"
+)
+async def import_users(
+        result: ImportUsersResponse = Depends(import_users_dependency)
+):
+    if result.error:
+        raise HTTPException(
+            status_code=result.error.status_code,
+            detail=result.error.detail,
+        )
+
+    return result
+
+
+@router.delete(
+    path="/users/delete-user",
+    status_code=status.HTTP_202_ACCEPTED,
+    description="Пользователь сразу деактивируется, данные удаляются в фоне. Прогресс - /users/deletion-jobs/{job_id}"
+)
 async def delete_user(
         result: DeleteUserResponse = Depends(delete_user_dependency)
 ):
@@ -57,6 +86,23 @@ async def delete_user(
     return result
 
 
+@router.post(
+    path="/users/bulk",
+    description="delete / deactivate / update (role_id, first_name, last_name) для списка email пачками. "
+                "Возвращает число затронутых пользователей и ненайденные email"
+)
+async def bulk_users(
+        result: BulkUsersResponse = Depends(bulk_users_action_dependency)
+):
+    if result.error:
+        raise HTTPException(
+            status_code=result.error.status_code,
+            detail=result.error.detail,
+        )
+
+    return result
+
+
 @router.patch(path="/users/update-user")
 async def update_user(
         result: UpdateUserResponse = Depends(update_user_by_email_dependency)
@@ -81,3 +127,32 @@ async def users(
         )
 
     return result
+
+
+@router.get(
+    path="/users/search",
+    description="Поиск пользователей по началу (mode=prefix) или части (mode=substring) email либо имени"
+)
+async def search_users(
+        result: UsersSearchResponse = Depends(search_users_dependency)
+):
+    if result.error:
+        raise HTTPException(
+            status_code=result.error.status_code,
+            detail=result.error.detail,
+        )
+
+    return result
+
+
+@router.get(path="/users/deletion-jobs/{job_id}")
+async def user_deletion_job(
+        result: UserDeletionJobResponse = Depends(get_user_deletion_job_dependency)
+):
+    if result.error:
+        raise HTTPException(
+            status_code=result.error.status_code,
+            detail=result.error.detail,
+        )
+
+    return result
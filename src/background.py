@@ -0,0 +1,42 @@
+from abc import ABC, abstractmethod
+from asyncio import Task, CancelledError, create_task, sleep as asyncio_sleep
+from contextlib import suppress
+from logging import getLogger, Logger
+from typing import Optional
+
+logger: Logger = getLogger(__name__)
+
+
+class PeriodicWorker(ABC):
+    """Фоновая задача: run_once() каждые interval_seconds, запускается и останавливается из lifespan"""
+
+    def __init__(self, interval_seconds: float) -> None:
+        self._interval_seconds: float = interval_seconds
+        self._task: Optional[Task] = None
+
+    @abstractmethod
+    async def run_once(self) -> None:
+        """Одна итерация; исключение логируется, следующая итерация - через interval_seconds"""
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = create_task(self._run(), name=type(self).__name__)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        with suppress(CancelledError):
+            await self._task
+
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:  # Ошибка итерации не должна останавливать воркер
+                logger.exception("%s iteration failed", type(self).__name__)
+
+            await asyncio_sleep(self._interval_seconds)
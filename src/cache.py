@@ -0,0 +1,88 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import monotonic
+from typing import Callable, Generic, Optional, Tuple, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0  # Вытеснены по LRU при переполнении
+    expirations: int = 0  # Удалены по истечении TTL
+
+
+class TTLCache(Generic[K, V]):
+    """
+        Ограниченный in-memory кэш с TTL и LRU-вытеснением.
+        Рассчитан на использование внутри одного event loop (без блокировок)
+    """
+
+    def __init__(
+            self,
+            max_size: int,
+            ttl_seconds: float,
+            on_remove: Optional[Callable[[K, V], None]] = None,
+    ) -> None:
+        self._max_size: int = max_size
+        self._ttl_seconds: float = ttl_seconds
+        self._on_remove: Optional[Callable[[K, V], None]] = on_remove  # Вызывается при вытеснении/истечении
+        self._data: OrderedDict[K, Tuple[float, V]] = OrderedDict()
+
+        self.stats: CacheStats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    def get(self, key: K) -> Optional[V]:
+        item: Optional[Tuple[float, V]] = self._data.get(key)
+
+        if item is None:
+            self.stats.misses += 1
+            return None
+
+        deadline, value = item
+        if deadline <= monotonic():
+            del self._data[key]
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            self._notify_remove(key, value)
+            return None
+
+        self._data.move_to_end(key)
+        self.stats.hits += 1
+
+        return value
+
+    def set(self, key: K, value: V, ttl_seconds: Optional[float] = None) -> None:
+        ttl: float = self._ttl_seconds if ttl_seconds is None else min(ttl_seconds, self._ttl_seconds)
+        if ttl <= 0:
+            self.pop(key)
+            return
+
+        self._data[key] = (monotonic() + ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self._max_size:
+            old_key, (_, old_value) = self._data.popitem(last=False)
+            self.stats.evictions += 1
+            self._notify_remove(old_key, old_value)
+
+    def pop(self, key: K) -> Optional[V]:
+        item: Optional[Tuple[float, V]] = self._data.pop(key, None)
+
+        return item[1] if item is not None else None
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def _notify_remove(self, key: K, value: V) -> None:
+        if self._on_remove is not None:
+            self._on_remove(key, value)
@@ -1,4 +1,16 @@
-POSTGRES_POOL_SIZE = 5  # Max количество постоянных соединений
-POSTGRES_MAX_OVERFLOW = 10  # Дополнительные соединения при нагрузке
-POSTGRES_POOL_TIMEOUT = 30  # Время ожидания соединения (сек)
-POSTGRES_POOL_RECYCLE = 300  # Пересоздавать соединения каждые N секунд
+from os import getenv
+from dotenv import load_dotenv, find_dotenv
+
+load_dotenv(find_dotenv(".env.test"))
+
+PASSWORD_HASHER_MAX_WORKERS = int(getenv("PASSWORD_HASHER_MAX_WORKERS", "2"))  # Параллельных bcrypt
+PASSWORD_HASHER_MAX_PENDING = int(getenv("PASSWORD_HASHER_MAX_PENDING", "32"))  # В работе + в очереди, дальше 503
+PASSWORD_HASHER_EXECUTOR = getenv("PASSWORD_HASHER_EXECUTOR", "process")  # process | thread
+
+TRANSACTIONS_PARTITIONS_INTERVAL_SECONDS = 3600  # Как часто проверять помесячные секции transactions
+TRANSACTIONS_PARTITIONS_AHEAD_MONTHS = 3  # На сколько месяцев вперед держать готовые секции
+_retention_months = getenv("TRANSACTIONS_PARTITIONS_RETENTION_MONTHS", "")
+TRANSACTIONS_PARTITIONS_RETENTION_MONTHS = (  # Секции старше - в архивную схему (пусто - хранить все)
+    int(_retention_months) if _retention_months else None
+)
+TRANSACTIONS_PARTITIONS_ARCHIVE_SCHEMA = "transactions_archive"
@@ -0,0 +1,7 @@
+from os import getenv
+from dotenv import load_dotenv, find_dotenv
+
+load_dotenv(find_dotenv(".env.test"))
+
+# Общий токен служебных роутов (заголовок X-Internal-Token): пустой - /internal/* недоступны
+INTERNAL_API_TOKEN = getenv("INTERNAL_API_TOKEN", "")
@@ -0,0 +1,56 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class CacheStatsResponse(BaseModel):
+    size: int = 0
+    max_size: int = 0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+
+class SessionCacheStatsResponse(BaseModel):
+    sessions: CacheStatsResponse
+    unknown_tokens: CacheStatsResponse
+
+
+class HistogramResponse(BaseModel):
+    buckets: List[float] = []
+    counts: List[int] = []  # Последний элемент - наблюдения больше последней границы
+    count: int = 0
+    average: float = 0.0
+    max: float = 0.0
+
+
+class WebhookPrefilterStatsResponse(BaseModel):
+    recent: CacheStatsResponse
+    known_duplicates: int
+    bloom_hits: int
+    bloom_false_positives: int
+
+
+class PasswordHasherStatsResponse(BaseModel):
+    max_workers: int
+    max_pending: int
+    in_flight: int
+    queue_depth: int
+    completed: int
+    rejected: int
+    latency_seconds: HistogramResponse
+
+
+class PoolStatsResponse(BaseModel):
+    pool_size: int
+    max_overflow: int
+    checked_out: int
+    overflow: int  # Сверх pool_size сейчас
+    idle: int
+    connects: int
+    checkouts: int
+    checkins: int
+    invalidations: int
+    timeouts: int
+    wait_seconds: HistogramResponse
@@ -0,0 +1,102 @@
+"""
+    Служебные роуты для эксплуатации (метрики кэшей, пулов и т.п.)
+    Не требуют сессии, но требуют общий токен в заголовке X-Internal-Token (INTERNAL_API_TOKEN)
+"""
+from fastapi import APIRouter, Depends
+
+from databases.postgres.config import postgres_pool
+from databases.postgres.pool import PoolMetrics, pool_metrics as pool_metrics_dependency
+
+from src.internal.models import (
+    SessionCacheStatsResponse,
+    PasswordHasherStatsResponse,
+    WebhookPrefilterStatsResponse,
+    CacheStatsResponse,
+    PoolStatsResponse
+)
+from src.cache import TTLCache
+from src.internal.utils import cache_stats, histogram_stats, internal_access
+from src.mock_transactions.dedup import ExternalIdPrefilter
+from src.mock_transactions.utils import webhook_prefilter as webhook_prefilter_dependency
+from src.password_hasher import PasswordHasher, password_hasher as password_hasher_dependency
+from src.sso.core.cache import SessionCache
+from src.sso.core.utils import session_cache as session_cache_dependency
+from src.users.core.cache import AccountsVersions
+from src.users.core.utils import (
+    accounts_versions as accounts_versions_dependency,
+    transactions_summaries as transactions_summaries_dependency,
+    SummaryKey
+)
+from src.users.core.models import TransactionsSummaryResponse
+
+router: APIRouter = APIRouter(prefix="/internal", tags=["INTERNAL"], dependencies=[Depends(internal_access)])
+
+
+@router.get(path="/session-cache")
+async def session_cache_stats(
+        session_cache: SessionCache = Depends(session_cache_dependency)
+) -> SessionCacheStatsResponse:
+    return SessionCacheStatsResponse(
+        sessions=cache_stats(session_cache.sessions),
+        unknown_tokens=cache_stats(session_cache.unknown),
+    )
+
+
+@router.get(path="/password-hasher")
+async def password_hasher_stats(
+        password_hasher: PasswordHasher = Depends(password_hasher_dependency)
+) -> PasswordHasherStatsResponse:
+    return PasswordHasherStatsResponse(
+        max_workers=password_hasher.max_workers,
+        max_pending=password_hasher.max_pending,
+        in_flight=password_hasher.in_flight,
+        queue_depth=password_hasher.queue_depth,
+        completed=password_hasher.completed,
+        rejected=password_hasher.rejected,
+        latency_seconds=histogram_stats(password_hasher.latency),
+    )
+
+
+@router.get(path="/webhook-prefilter")
+async def webhook_prefilter_stats(
+        webhook_prefilter: ExternalIdPrefilter = Depends(webhook_prefilter_dependency)
+) -> WebhookPrefilterStatsResponse:
+    return WebhookPrefilterStatsResponse(
+        recent=cache_stats(webhook_prefilter.recent),
+        known_duplicates=webhook_prefilter.known_duplicates,
+        bloom_hits=webhook_prefilter.bloom_hits,
+        bloom_false_positives=webhook_prefilter.bloom_false_positives,
+    )
+
+
+@router.get(path="/accounts-responses")
+async def accounts_responses_stats(
+        accounts_versions: AccountsVersions = Depends(accounts_versions_dependency)
+) -> CacheStatsResponse:
+    return cache_stats(accounts_versions.responses)
+
+
+@router.get(path="/transactions-summaries")
+async def transactions_summaries_stats(
+        summaries: TTLCache[SummaryKey, TransactionsSummaryResponse] = Depends(transactions_summaries_dependency)
+) -> CacheStatsResponse:
+    return cache_stats(summaries)
+
+
+@router.get(path="/pool")
+async def pool_stats(
+        pool_metrics: PoolMetrics = Depends(pool_metrics_dependency)
+) -> PoolStatsResponse:
+    return PoolStatsResponse(
+        pool_size=pool_metrics.pool.size(),
+        max_overflow=postgres_pool.MAX_OVERFLOW,
+        checked_out=pool_metrics.pool.checkedout(),
+        overflow=max(0, pool_metrics.pool.overflow()),  # До заполнения pool_size отрицателен
+        idle=pool_metrics.pool.checkedin(),
+        connects=pool_metrics.connects,
+        checkouts=pool_metrics.checkouts,
+        checkins=pool_metrics.checkins,
+        invalidations=pool_metrics.invalidations,
+        timeouts=pool_metrics.timeouts,
+        wait_seconds=histogram_stats(pool_metrics.wait),
+    )
@@ -0,0 +1,39 @@
+from secrets import compare_digest
+from typing import Annotated, Optional
+
+from fastapi import Header, HTTPException, status
+
+from src.cache import TTLCache
+from src.internal.models import CacheStatsResponse, HistogramResponse
+from src.internal.constants import INTERNAL_API_TOKEN
+from src.metrics import Histogram
+
+
+def cache_stats(cache: TTLCache) -> CacheStatsResponse:
+    return CacheStatsResponse(
+        size=len(cache),
+        max_size=cache.max_size,
+        hits=cache.stats.hits,
+        misses=cache.stats.misses,
+        evictions=cache.stats.evictions,
+        expirations=cache.stats.expirations,
+    )
+
+
+def histogram_stats(histogram: Histogram) -> HistogramResponse:
+    return HistogramResponse(
+        buckets=list(histogram.buckets),
+        counts=list(histogram.counts),
+        count=histogram.count,
+        average=histogram.average,
+        max=histogram.max,
+    )
+
+
+async def internal_access(x_internal_token: Annotated[Optional[str], Header()] = None) -> None:
+    """Служебные роуты - только с INTERNAL_API_TOKEN; без настроенного токена закрыты для всех"""
+    if not INTERNAL_API_TOKEN or x_internal_token is None or not compare_digest(x_internal_token, INTERNAL_API_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Internal token required",
+        )
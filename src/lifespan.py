@@ -1,31 +1,183 @@
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator, Any
+from typing import AsyncGenerator, Any, Optional
 
 from fastapi import FastAPI
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, async_sessionmaker
 
-from databases.postgres.config import postgres
+from databases.postgres.config import postgres, postgres_pool
+from databases.postgres.partitions import TransactionsPartitionsMaintainer
+from databases.postgres.pool import InstrumentedQueuePool, PoolMetrics
+from src.admins.core.constants import (
+    USER_DELETION_INTERVAL_SECONDS,
+    USER_DELETION_BATCH_SIZE,
+    USER_DELETION_BATCH_PAUSE_SECONDS,
+    USER_DELETION_LEASE_SECONDS
+)
+from src.admins.core.deletion import UserDeletionWorker
+from src.cache import TTLCache
 from src.constants import (
-    POSTGRES_POOL_SIZE,
-    POSTGRES_MAX_OVERFLOW,
-    POSTGRES_POOL_TIMEOUT,
-    POSTGRES_POOL_RECYCLE
+    PASSWORD_HASHER_MAX_WORKERS,
+    PASSWORD_HASHER_MAX_PENDING,
+    PASSWORD_HASHER_EXECUTOR,
+    TRANSACTIONS_PARTITIONS_INTERVAL_SECONDS,
+    TRANSACTIONS_PARTITIONS_AHEAD_MONTHS,
+    TRANSACTIONS_PARTITIONS_RETENTION_MONTHS,
+    TRANSACTIONS_PARTITIONS_ARCHIVE_SCHEMA
+)
+from src.mock_transactions.constants import (
+    WEBHOOK_DEDUP_LRU_SIZE,
+    WEBHOOK_DEDUP_BLOOM_CAPACITY,
+    WEBHOOK_DEDUP_BLOOM_ERROR_RATE,
+    WEBHOOK_DEDUP_WARM_UP_LIMIT,
+    ACCOUNT_CACHE_MAX_USERS,
+    ACCOUNT_CACHE_TTL_SECONDS,
+    WEBHOOK_JOURNAL_DIR,
+    WEBHOOK_JOURNAL_FLUSH_INTERVAL_SECONDS,
+    WEBHOOK_JOURNAL_REPLAY_INTERVAL_SECONDS,
+    WEBHOOK_JOURNAL_REPLAY_BATCH_SIZE,
+    SECRET_PAYMENT_KEY
+)
+from src.mock_transactions.cache import AccountCache
+from src.mock_transactions.dedup import ExternalIdPrefilter
+from src.mock_transactions.journal import WebhookJournal, WebhookJournalReplayer
+from src.password_hasher import PasswordHasher
+from src.sso.core.cache import SessionCache
+from src.sso.core.constants import (
+    SESSION_CACHE_MAX_SIZE,
+    SESSION_CACHE_TTL_SECONDS,
+    SESSION_CACHE_NEGATIVE_TTL_SECONDS,
+    SESSION_REAPER_INTERVAL_SECONDS,
+    SESSION_REAPER_BATCH_SIZE,
+    SESSION_REAPER_BATCH_PAUSE_SECONDS,
+    MAX_SESSIONS_PER_USER,
+    COOKIE_SESSION_EXPIRE_MINUTES,
+    SESSION_MODE,
+    SESSION_MODE_SIGNED,
+    SESSION_SIGNING_KEY,
+    SESSION_REVOCATIONS_REFRESH_SECONDS
 )
+from src.sso.core.reaper import ExpiredSessionsReaper
+from src.users.core.cache import AccountsVersions
+from src.users.core.constants import (
+    ACCOUNTS_VERSIONS_MAX_USERS,
+    ACCOUNTS_VERSIONS_TTL_SECONDS,
+    TRANSACTIONS_SUMMARY_CACHE_MAX_SIZE,
+    TRANSACTIONS_SUMMARY_CACHE_TTL_SECONDS
+)
+from src.sso.core.revocations import SessionRevocations
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, Any]:
+    if SESSION_MODE == SESSION_MODE_SIGNED and not SESSION_SIGNING_KEY:
+        raise RuntimeError("SESSION_SIGNING_KEY is required for signed sessions")
+
     engine: AsyncEngine = create_async_engine(
         url=postgres.DSN,
-        pool_size=POSTGRES_POOL_SIZE,
-        max_overflow=POSTGRES_MAX_OVERFLOW,
-        pool_timeout=POSTGRES_POOL_TIMEOUT,
-        pool_recycle=POSTGRES_POOL_RECYCLE,
+        poolclass=InstrumentedQueuePool,
         echo=False,
+        **postgres_pool.engine_options(),
     )
+    app.state.pool_metrics = PoolMetrics()
+    app.state.pool_metrics.attach(engine)
 
     app.state.session_factory = async_sessionmaker(engine)
+    app.state.session_cache = SessionCache(
+        max_size=SESSION_CACHE_MAX_SIZE,
+        ttl_seconds=SESSION_CACHE_TTL_SECONDS,
+        negative_ttl_seconds=SESSION_CACHE_NEGATIVE_TTL_SECONDS,
+    )
+
+    app.state.password_hasher = PasswordHasher(
+        max_workers=PASSWORD_HASHER_MAX_WORKERS,
+        max_pending=PASSWORD_HASHER_MAX_PENDING,
+        use_processes=PASSWORD_HASHER_EXECUTOR == "process",
+    )
+
+    app.state.webhook_prefilter = ExternalIdPrefilter(
+        lru_size=WEBHOOK_DEDUP_LRU_SIZE,
+        bloom_capacity=WEBHOOK_DEDUP_BLOOM_CAPACITY,
+        bloom_error_rate=WEBHOOK_DEDUP_BLOOM_ERROR_RATE,
+    )
+    await app.state.webhook_prefilter.warm_up(
+        session_factory=app.state.session_factory,
+        limit=WEBHOOK_DEDUP_WARM_UP_LIMIT,
+    )
+
+    app.state.account_cache = AccountCache(max_users=ACCOUNT_CACHE_MAX_USERS, ttl_seconds=ACCOUNT_CACHE_TTL_SECONDS)
+    app.state.accounts_versions = AccountsVersions(
+        max_users=ACCOUNTS_VERSIONS_MAX_USERS,
+        ttl_seconds=ACCOUNTS_VERSIONS_TTL_SECONDS,
+    )
+    app.state.transactions_summaries = TTLCache(
+        max_size=TRANSACTIONS_SUMMARY_CACHE_MAX_SIZE,
+        ttl_seconds=TRANSACTIONS_SUMMARY_CACHE_TTL_SECONDS,
+    )
+
+    app.state.webhook_journal = None
+    journal_replayer: Optional[WebhookJournalReplayer] = None
+    if WEBHOOK_JOURNAL_DIR:
+        app.state.webhook_journal = WebhookJournal(
+            directory=WEBHOOK_JOURNAL_DIR,
+            flush_interval_seconds=WEBHOOK_JOURNAL_FLUSH_INTERVAL_SECONDS,
+        )
+        journal_replayer = WebhookJournalReplayer(
+            journal=app.state.webhook_journal,
+            session_factory=app.state.session_factory,
+            secret_payment_key=SECRET_PAYMENT_KEY,
+            webhook_prefilter=app.state.webhook_prefilter,
+            account_cache=app.state.account_cache,
+            accounts_versions=app.state.accounts_versions,
+            interval_seconds=WEBHOOK_JOURNAL_REPLAY_INTERVAL_SECONDS,
+            batch_size=WEBHOOK_JOURNAL_REPLAY_BATCH_SIZE,
+        )
+        journal_replayer.start()  # Первый проход дочитывает журнал, оставшийся от прошлого запуска
+
+    partitions_maintainer: TransactionsPartitionsMaintainer = TransactionsPartitionsMaintainer(
+        engine=engine,
+        interval_seconds=TRANSACTIONS_PARTITIONS_INTERVAL_SECONDS,
+        months_ahead=TRANSACTIONS_PARTITIONS_AHEAD_MONTHS,
+        retention_months=TRANSACTIONS_PARTITIONS_RETENTION_MONTHS,
+        archive_schema=TRANSACTIONS_PARTITIONS_ARCHIVE_SCHEMA,
+    )
+    partitions_maintainer.start()
+
+    sessions_reaper: ExpiredSessionsReaper = ExpiredSessionsReaper(
+        session_factory=app.state.session_factory,
+        session_cache=app.state.session_cache,
+        interval_seconds=SESSION_REAPER_INTERVAL_SECONDS,
+        batch_size=SESSION_REAPER_BATCH_SIZE,
+        batch_pause_seconds=SESSION_REAPER_BATCH_PAUSE_SECONDS,
+        max_sessions_per_user=MAX_SESSIONS_PER_USER,
+    )
+    sessions_reaper.start()
+
+    user_deletion_worker: UserDeletionWorker = UserDeletionWorker(
+        session_factory=app.state.session_factory,
+        interval_seconds=USER_DELETION_INTERVAL_SECONDS,
+        batch_size=USER_DELETION_BATCH_SIZE,
+        batch_pause_seconds=USER_DELETION_BATCH_PAUSE_SECONDS,
+        lease_seconds=USER_DELETION_LEASE_SECONDS,
+    )
+    user_deletion_worker.start()
+
+    app.state.session_revocations = SessionRevocations(
+        session_factory=app.state.session_factory,
+        interval_seconds=SESSION_REVOCATIONS_REFRESH_SECONDS,
+        session_lifetime_minutes=COOKIE_SESSION_EXPIRE_MINUTES,
+    )
+    if SESSION_MODE == SESSION_MODE_SIGNED:
+        await app.state.session_revocations.run_once()  # Список отзыва должен быть загружен до первого запроса
+        app.state.session_revocations.start()
 
     yield
 
+    await app.state.session_revocations.stop()
+    if journal_replayer is not None:
+        await app.state.webhook_journal.close()  # Невоспроизведенное останется в журнале до следующего запуска
+        await journal_replayer.stop()
+    await sessions_reaper.stop()
+    await user_deletion_worker.stop()  # Прерванная задача продолжится после истечения lease
+    await partitions_maintainer.stop()
+    app.state.password_hasher.shutdown()
     await engine.dispose()
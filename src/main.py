@@ -14,6 +14,7 @@ from src.sso.versions.v1.routes import router as sso_router
 from src.admins.versions.v1.routes import router as admins_router
 from src.users.versions.v1.routes import router as users_router
 from src.mock_transactions.routes import router as transaction_router
+from src.internal.routes import router as internal_router
 
 app: FastAPI = FastAPI(lifespan=lifespan)
 
@@ -34,6 +35,7 @@ app.include_router(sso_router)
 app.include_router(admins_router)
 app.include_router(users_router)
 app.include_router(transaction_router)
+app.include_router(internal_router)
 
 if __name__ == "__main__":
     uvicorn_run(app=app, host="0.0.0.0", port=8000)
@@ -0,0 +1,31 @@
+from typing import Dict, Optional, Tuple
+
+from src.cache import TTLCache
+
+
+class AccountCache:
+    """
+        Кэш проверенных счетов плательщиков: user_id -> {account_id из вебхука -> (id счета, balance_stripes)}.
+        Повторный платеж того же пользователя не ходит в accounts.
+        Кладутся только уже закоммиченные счета (найденные, а не созданные в текущей транзакции)
+    """
+
+    def __init__(self, max_users: int, ttl_seconds: float) -> None:
+        self.users: TTLCache[int, Dict[int, Tuple[int, int]]] = TTLCache(max_size=max_users, ttl_seconds=ttl_seconds)
+
+    def get(self, user_id: int, account_id: int) -> Optional[Tuple[int, int]]:
+        accounts: Optional[Dict[int, Tuple[int, int]]] = self.users.get(user_id)
+
+        return accounts.get(account_id) if accounts is not None else None
+
+    def add(self, user_id: int, account_id: int, resolved_account_id: int, balance_stripes: int) -> None:
+        accounts: Optional[Dict[int, Tuple[int, int]]] = self.users.get(user_id)
+
+        if accounts is None:
+            accounts = {}
+            self.users.set(key=user_id, value=accounts)
+
+        accounts[account_id] = (resolved_account_id, balance_stripes)
+
+    def invalidate_user(self, user_id: int) -> None:
+        self.users.pop(user_id)
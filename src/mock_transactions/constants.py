@@ -4,3 +4,26 @@ from dotenv import load_dotenv, find_dotenv
 load_dotenv(find_dotenv(".env.test"))
 
 SECRET_PAYMENT_KEY = getenv("SECRET_PAYMENT_KEY", "")
+
+MAX_WEBHOOK_BATCH_SIZE = 1000  # Max вебхуков в одном batch-запросе (одна транзакция, один INSERT)
+MAX_WEBHOOK_LINE_BYTES = 4096  # Max длина строки NDJSON (один вебхук)
+MAX_WEBHOOK_BATCH_BYTES = MAX_WEBHOOK_BATCH_SIZE * MAX_WEBHOOK_LINE_BYTES  # Max тело JSON-массива
+
+BATCH_ITEM_COMPLETED = "completed"
+BATCH_ITEM_DUPLICATE = "duplicate"
+BATCH_ITEM_INVALID_SIGNATURE = "invalid_signature"
+BATCH_ITEM_UNKNOWN_USER = "unknown_user"  # Нет такого активного пользователя - счет не создается
+
+WEBHOOK_DEDUP_LRU_SIZE = 100000  # Точный LRU недавно обработанных external_id
+WEBHOOK_DEDUP_BLOOM_CAPACITY = 1000000  # Емкость одного поколения фильтра Блума
+WEBHOOK_DEDUP_BLOOM_ERROR_RATE = 0.01
+WEBHOOK_DEDUP_WARM_UP_LIMIT = 200000  # Сколько последних external_id загрузить при старте
+
+ACCOUNT_CACHE_MAX_USERS = 50000  # Пользователей с закэшированными счетами
+ACCOUNT_CACHE_TTL_SECONDS = 60  # Ограничивает устаревание в других процессах (удаление счета/пользователя)
+
+# Write-behind журнал вебхуков: пустой каталог - режим выключен
+WEBHOOK_JOURNAL_DIR = getenv("WEBHOOK_JOURNAL_DIR", "")
+WEBHOOK_JOURNAL_FLUSH_INTERVAL_SECONDS = 0.005  # Окно сбора группы записей под один fsync
+WEBHOOK_JOURNAL_REPLAY_INTERVAL_SECONDS = 0.5
+WEBHOOK_JOURNAL_REPLAY_BATCH_SIZE = MAX_WEBHOOK_BATCH_SIZE  # Вебхуков на одну транзакцию воспроизведения
@@ -0,0 +1,98 @@
+from hashlib import blake2b
+from math import ceil, log
+from typing import Iterable, List
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from databases.postgres.models import TransactionExternalIds
+from src.cache import TTLCache
+
+
+class BloomFilter:
+    """Фильтр Блума фиксированной емкости: False - точно не добавлялся, True - возможно добавлялся"""
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity: int = capacity
+        self.size_bits: int = ceil(-capacity * log(error_rate) / (log(2) ** 2))
+        self.hashes: int = max(1, round(self.size_bits / capacity * log(2)))
+        self.count: int = 0
+
+        self._bits: bytearray = bytearray(ceil(self.size_bits / 8))
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def _positions(self, key: str) -> List[int]:
+        digest: bytes = blake2b(key.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+        return [(first + i * second) % self.size_bits for i in range(self.hashes)]
+
+
+class ExternalIdPrefilter:
+    """
+        Префильтр повторных вебхуков по external_id (в памяти процесса):
+         - точный LRU недавно обработанных id: попадание - гарантированный дубликат, БД не нужна;
+         - фильтр Блума на большее окно (два поколения, старое отбрасывается при заполнении нового):
+           промах - id точно новый, сразу в обычную обработку; попадание - дешевая проверка в БД.
+        В фильтр попадают только id, уже закоммиченные в transactions (transaction_external_ids)
+    """
+
+    def __init__(self, lru_size: int, bloom_capacity: int, bloom_error_rate: float) -> None:
+        self.recent: TTLCache[str, bool] = TTLCache(max_size=lru_size, ttl_seconds=float("inf"))
+
+        self._bloom_capacity: int = bloom_capacity
+        self._bloom_error_rate: float = bloom_error_rate
+        self._bloom: BloomFilter = BloomFilter(capacity=bloom_capacity, error_rate=bloom_error_rate)
+        self._previous_bloom: BloomFilter = BloomFilter(capacity=1, error_rate=bloom_error_rate)
+
+        self.known_duplicates: int = 0  # Отвечено без БД
+        self.bloom_hits: int = 0  # Ушло на проверку в БД
+        self.bloom_false_positives: int = 0  # Проверка в БД не подтвердила дубликат
+
+    def is_known_duplicate(self, external_id: str) -> bool:
+        if self.recent.get(external_id) is None:
+            return False
+
+        self.known_duplicates += 1
+        return True
+
+    def maybe_seen(self, external_id: str) -> bool:
+        if external_id in self._bloom or external_id in self._previous_bloom:
+            self.bloom_hits += 1
+            return True
+
+        return False
+
+    def remember(self, external_ids: Iterable[str]) -> None:
+        for external_id in external_ids:
+            self.recent.set(key=external_id, value=True)
+
+            if self._bloom.count >= self._bloom_capacity:
+                self._previous_bloom = self._bloom
+                self._bloom = BloomFilter(capacity=self._bloom_capacity, error_rate=self._bloom_error_rate)
+
+            self._bloom.add(external_id)
+
+    async def warm_up(self, session_factory: async_sessionmaker[AsyncSession], limit: int) -> None:
+        """Загрузка последних external_id при старте, от старых к новым (свежие остаются в LRU)"""
+        async with session_factory() as db_session:
+            latest = (
+                select(TransactionExternalIds.external_id, TransactionExternalIds.created_at)
+                .order_by(TransactionExternalIds.created_at.desc())
+                .limit(limit)
+                .subquery()
+            )
+            external_ids = await db_session.stream_scalars(
+                select(latest.c.external_id).order_by(latest.c.created_at).execution_options(yield_per=10_000)
+            )
+
+            async for external_id in external_ids:
+                self.remember([external_id])
@@ -1,23 +1,156 @@
-from fastapi import Depends
+from typing import List, Optional
+
+from fastapi import Depends, Request, status
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from databases.postgres.utils import async_db_session
-from src.mock_transactions.models import PaymentWebhookData, PaymentProcessResponse
-from src.mock_transactions.payment_processor import PaymentProcessor
+from src.mock_transactions.models import (
+    PaymentWebhookData,
+    PaymentProcessResponse,
+    PaymentAcceptedResponse,
+    BatchPaymentProcessResponse
+)
+from src.mock_transactions.payment_processor import PaymentProcessor, verify_payment_signature
 from src.mock_transactions.constants import SECRET_PAYMENT_KEY
-from src.mock_transactions.utils import mock_payment_data
+from src.mock_transactions.cache import AccountCache
+from src.mock_transactions.dedup import ExternalIdPrefilter
+from src.mock_transactions.journal import WebhookJournal
+from src.mock_transactions.utils import (
+    mock_payment_data,
+    read_payment_webhooks,
+    WebhooksBatchTooLargeError,
+    webhook_prefilter as webhook_prefilter_dependency,
+    webhook_journal as webhook_journal_dependency,
+    account_cache as account_cache_dependency
+)
+from src.sso.core.models import ErrorDetail
+from src.users.core.cache import AccountsVersions
+from src.users.core.utils import accounts_versions as accounts_versions_dependency
 
 
 async def mock_handle_input_transaction(
         db_session: AsyncSession = Depends(async_db_session),
-        mock_webhook_data: PaymentWebhookData = Depends(mock_payment_data)
+        mock_webhook_data: PaymentWebhookData = Depends(mock_payment_data),
+        webhook_prefilter: ExternalIdPrefilter = Depends(webhook_prefilter_dependency),
+        account_cache: AccountCache = Depends(account_cache_dependency),
+        accounts_versions: AccountsVersions = Depends(accounts_versions_dependency),
 ) -> PaymentProcessResponse:
-    async with db_session.begin():
+    async with db_session.begin() as transaction:
         payment_processor: PaymentProcessor = PaymentProcessor(
             secret_payment_key=SECRET_PAYMENT_KEY,
             db_session=db_session,
+            duplicates_prefilter=webhook_prefilter,
+            account_cache=account_cache,
         )
 
         result: PaymentProcessResponse = await payment_processor.process(data=mock_webhook_data)
+        if result.error:  # process() ловит исключения: без отката транзакция закоммитилась бы без начисления
+            await transaction.rollback()
+
+    # Только после коммита: id в префильтре обязан существовать в БД
+    if not result.error or result.error.status_code == status.HTTP_409_CONFLICT:
+        webhook_prefilter.remember([mock_webhook_data.transaction_id])
+    if not result.error:
+        accounts_versions.bump([mock_webhook_data.user_id])
+
+    return result
+
+
+async def handle_input_transactions_batch(
+        request: Request,
+        db_session: AsyncSession = Depends(async_db_session),
+        webhook_prefilter: ExternalIdPrefilter = Depends(webhook_prefilter_dependency),
+        account_cache: AccountCache = Depends(account_cache_dependency),
+        accounts_versions: AccountsVersions = Depends(accounts_versions_dependency),
+) -> BatchPaymentProcessResponse:
+    """Тело запроса: JSON-массив PaymentWebhookData либо NDJSON (application/x-ndjson)"""
+    result: BatchPaymentProcessResponse = BatchPaymentProcessResponse()
+
+    try:
+        webhooks: List[PaymentWebhookData] = await read_payment_webhooks(
+            chunks=request.stream(),
+            content_type=request.headers.get("content-type", ""),
+        )
+
+    except WebhooksBatchTooLargeError as error:
+        result.error = ErrorDetail(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(error),
+        )
+        return result
 
+    except (ValueError, ValidationError) as error:
+        result.error = ErrorDetail(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Invalid webhooks payload: {error}",
+        )
         return result
+
+    try:
+        async with db_session.begin():
+            payment_processor: PaymentProcessor = PaymentProcessor(
+                secret_payment_key=SECRET_PAYMENT_KEY,
+                db_session=db_session,
+                duplicates_prefilter=webhook_prefilter,
+                account_cache=account_cache,
+            )
+
+            result = await payment_processor.process_batch(items=webhooks)
+
+        webhook_prefilter.remember(result.stored_transaction_ids)
+        accounts_versions.bump(result.completed_user_ids)
+
+    except Exception as error:
+        result = BatchPaymentProcessResponse(
+            error=ErrorDetail(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Oops, something went wrong! {error}",
+            )
+        )
+
+    return result
+
+
+async def journal_input_transaction(
+        mock_webhook_data: PaymentWebhookData = Depends(mock_payment_data),
+        webhook_prefilter: ExternalIdPrefilter = Depends(webhook_prefilter_dependency),
+        webhook_journal: Optional[WebhookJournal] = Depends(webhook_journal_dependency),
+) -> PaymentAcceptedResponse:
+    """Accept-fast: проверенный вебхук пишется в журнал (fsync), в БД его переносит фоновое воспроизведение"""
+    result: PaymentAcceptedResponse = PaymentAcceptedResponse(transaction_id=mock_webhook_data.transaction_id)
+
+    if webhook_journal is None:
+        result.error = ErrorDetail(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Webhook journal is disabled",
+        )
+        return result
+
+    if not verify_payment_signature(data=mock_webhook_data, secret_payment_key=SECRET_PAYMENT_KEY):
+        result.error = ErrorDetail(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid signature"
+        )
+        return result
+
+    if webhook_prefilter.is_known_duplicate(mock_webhook_data.transaction_id):
+        result.error = ErrorDetail(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Transaction with ID {mock_webhook_data.transaction_id} already exists",
+        )
+        return result
+
+    try:
+        await webhook_journal.append(data=mock_webhook_data)
+
+    except OSError as error:
+        result.error = ErrorDetail(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Oops, something went wrong! {error}",
+        )
+        return result
+
+    result.detail = "The payment has been accepted and will be processed shortly"
+
+    return result
@@ -0,0 +1,336 @@
+from asyncio import Future, Lock, Task, create_task, get_running_loop, shield, sleep as asyncio_sleep, to_thread
+from contextlib import contextmanager
+from fcntl import LOCK_EX, LOCK_NB, flock
+from json import dumps, loads
+from logging import getLogger, Logger
+from os import fstat, fsync, replace as os_replace
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.background import PeriodicWorker
+from src.mock_transactions.cache import AccountCache
+from src.mock_transactions.dedup import ExternalIdPrefilter
+from src.mock_transactions.models import PaymentWebhookData, BatchPaymentProcessResponse
+from src.mock_transactions.payment_processor import PaymentProcessor
+from src.users.core.cache import AccountsVersions
+
+logger: Logger = getLogger(__name__)
+
+SEGMENT_SUFFIX = ".ndjson"
+OFFSET_SUFFIX = ".offset"
+DEAD_LETTERS_FILE = "dead-letters.ndjson"
+# Ошибки данных конкретного вебхука (например, FK на несуществующего или удаленного пользователя):
+# повтор не поможет. Прочие ошибки (недоступна БД и т.п.) - повтор пакета на следующем проходе
+POISON_ERRORS = (IntegrityError, DataError)
+
+
+class WebhookJournal:
+    """
+        Локальный append-only журнал принятых вебхуков (NDJSON, по сегментам webhooks-<N>.ndjson).
+        Записи копятся flush_interval_seconds и сбрасываются на диск одним write + fsync на группу:
+        append() возвращается только после fsync своей группы.
+        Запись идет в свой текущий сегмент, остальные закрыты и только дочитываются воспроизведением.
+        Каталог может быть общим для нескольких процессов: номер сегмента занимается созданием файла (O_EXCL),
+        процесс держит flock на своем текущем сегменте - чужое воспроизведение его не трогает
+    """
+
+    def __init__(self, directory: str, flush_interval_seconds: float) -> None:
+        self.directory: Path = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._flush_interval_seconds: float = flush_interval_seconds
+        self._lock: Lock = Lock()  # Запись группы и ротация сегмента не пересекаются
+        self._pending: List[bytes] = []
+        self._pending_flushed: Optional[Future] = None
+        self._flusher: Optional[Task] = None
+
+        # После рестарта всегда новый сегмент: хвост старого мог остаться недописанным
+        self._current: Path
+        self._current_lock: BinaryIO
+        self._current, self._current_lock = self._create_segment()
+
+    @property
+    def current_segment(self) -> Path:
+        return self._current
+
+    def segments(self) -> List[Path]:
+        return sorted(self.directory.glob(f"webhooks-*{SEGMENT_SUFFIX}"), key=self._segment_number)
+
+    async def append(self, data: PaymentWebhookData) -> None:
+        self._pending.append(data.model_dump_json().encode() + b"\n")
+
+        if self._pending_flushed is None:
+            self._pending_flushed = get_running_loop().create_future()
+        flushed: Future = self._pending_flushed
+
+        if self._flusher is None or self._flusher.done():
+            self._flusher = create_task(self._flush(), name=type(self).__name__)
+
+        await shield(flushed)  # Отмена запроса не должна отменять сброс чужих записей группы
+
+    async def rotate(self) -> None:
+        async with self._lock:
+            previous_lock: BinaryIO = self._current_lock
+            self._current, self._current_lock = await to_thread(self._create_segment)
+            previous_lock.close()  # Снимает flock: сегмент закрыт и доступен любому воспроизведению
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            await self._flusher
+
+        self._current_lock.close()
+
+    @contextmanager
+    def locked_segment(self, segment: Path) -> Iterator[bool]:
+        """
+            Эксклюзивный flock закрытого сегмента на время воспроизведения и удаления.
+            False - сегмент пишет (или уже воспроизводит) другой процесс, либо его уже удалили
+        """
+        try:
+            segment_file: BinaryIO = segment.open("rb")
+        except FileNotFoundError:
+            yield False
+            return
+
+        with segment_file:
+            try:
+                flock(segment_file.fileno(), LOCK_EX | LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+
+            yield self._is_linked(segment, segment_file)
+
+    def remove_segment(self, segment: Path) -> None:
+        segment.unlink(missing_ok=True)
+        self.offset_path(segment).unlink(missing_ok=True)
+
+    def offset_path(self, segment: Path) -> Path:
+        return segment.with_suffix(OFFSET_SUFFIX)
+
+    @property
+    def dead_letters_path(self) -> Path:
+        return self.directory / DEAD_LETTERS_FILE
+
+    async def append_dead_letters(self, lines: List[bytes]) -> None:
+        """Вебхуки, которые не удалось воспроизвести: дописываются с fsync до сдвига смещения сегмента"""
+        await to_thread(self._write, self.dead_letters_path, b"".join(lines))
+
+    def _create_segment(self) -> Tuple[Path, BinaryIO]:
+        """Новый сегмент со следующим свободным номером, уже под flock этого процесса"""
+        while True:
+            segments: List[Path] = self.segments()
+            segment: Path = self._segment_path(self._segment_number(segments[-1]) + 1 if segments else 1)
+
+            try:
+                segment_file: BinaryIO = segment.open("xb")
+            except FileExistsError:  # Номер занял другой процесс
+                continue
+
+            flock(segment_file.fileno(), LOCK_EX)
+            # Между созданием и flock пустой файл мог успеть воспроизвести и удалить чужой процесс
+            if self._is_linked(segment, segment_file):
+                return segment, segment_file
+
+            segment_file.close()
+
+    @staticmethod
+    def _is_linked(segment: Path, segment_file: BinaryIO) -> bool:
+        try:
+            return segment.stat().st_ino == fstat(segment_file.fileno()).st_ino
+        except FileNotFoundError:
+            return False
+
+    def _segment_path(self, number: int) -> Path:
+        return self.directory / f"webhooks-{number:010d}{SEGMENT_SUFFIX}"
+
+    @staticmethod
+    def _segment_number(segment: Path) -> int:
+        return int(segment.stem.rsplit("-", 1)[1])
+
+    async def _flush(self) -> None:
+        while self._pending:
+            await asyncio_sleep(self._flush_interval_seconds)  # Собираем группу
+
+            lines, self._pending = self._pending, []
+            flushed, self._pending_flushed = self._pending_flushed, None
+
+            try:
+                async with self._lock:
+                    await to_thread(self._write, self._current, b"".join(lines))
+            except Exception as error:
+                flushed.set_exception(error)  # type: ignore
+            else:
+                flushed.set_result(None)  # type: ignore
+
+    @staticmethod
+    def _write(segment: Path, payload: bytes) -> None:
+        with segment.open("ab") as journal_file:
+            journal_file.write(payload)
+            journal_file.flush()
+            fsync(journal_file.fileno())
+
+
+class WebhookJournalReplayer(PeriodicWorker):
+    """
+        Воспроизведение журнала в Postgres групповыми коммитами (до batch_size вебхуков на транзакцию).
+        Смещение сегмента (<segment>.offset) пишется только после коммита, поэтому после падения
+        воспроизведение продолжается с последнего закоммиченного места; повтор уже закоммиченного
+        хвоста безопасен - дубликаты отсекаются по external_id.
+        Полностью воспроизведенный сегмент ротируется и удаляется.
+        Закрытые сегменты воспроизводятся под flock: при общем каталоге текущие сегменты других процессов
+        пропускаются, а один закрытый сегмент не воспроизводят два процесса сразу.
+        Если пакет падает на ошибке данных, он повторяется по одному вебхуку: непроходящие вебхуки
+        пишутся в dead-letters.ndjson, остальные воспроизводятся, смещение сдвигается - один плохой вебхук
+        не останавливает журнал
+    """
+
+    def __init__(
+            self,
+            journal: WebhookJournal,
+            session_factory: async_sessionmaker[AsyncSession],
+            secret_payment_key: str,
+            webhook_prefilter: ExternalIdPrefilter,
+            account_cache: AccountCache,
+            accounts_versions: AccountsVersions,
+            interval_seconds: float,
+            batch_size: int,
+    ) -> None:
+        super().__init__(interval_seconds=interval_seconds)
+
+        self._journal: WebhookJournal = journal
+        self._session_factory: async_sessionmaker[AsyncSession] = session_factory
+        self.__payment_key: str = secret_payment_key
+        self._webhook_prefilter: ExternalIdPrefilter = webhook_prefilter
+        self._account_cache: AccountCache = account_cache
+        self._accounts_versions: AccountsVersions = accounts_versions
+        self._batch_size: int = batch_size
+
+        self.replayed: int = 0
+        self.dead_lettered: int = 0
+
+    async def run_once(self) -> None:
+        for segment in self._journal.segments():
+            if segment == self._journal.current_segment:
+                continue
+
+            with self._journal.locked_segment(segment) as locked:
+                if not locked:
+                    continue
+
+                await self._replay_segment(segment)
+                self._journal.remove_segment(segment)
+
+        current: Path = self._journal.current_segment
+        if await self._replay_segment(current) > 0:
+            await self._journal.rotate()  # Догнали запись: следующий проход удалит сегмент
+
+    async def _replay_segment(self, segment: Path) -> int:
+        """Дочитать сегмент до конца, вернуть смещение, до которого он воспроизведен"""
+        offset: int = await to_thread(self._read_offset, segment)
+
+        while True:
+            lines, next_offset = await to_thread(self._read_lines, segment, offset, self._batch_size)
+            if not lines:
+                return offset
+
+            webhooks: List[PaymentWebhookData] = [PaymentWebhookData.model_validate_json(line) for line in lines]
+
+            try:
+                result: BatchPaymentProcessResponse = await self._process(webhooks)
+            except POISON_ERRORS:
+                logger.warning("%s: batch failed on a data error, replaying webhooks one by one", segment.name)
+                result = await self._process_one_by_one(segment=segment, webhooks=webhooks, lines=lines)
+
+            self._webhook_prefilter.remember(result.stored_transaction_ids)
+            self._accounts_versions.bump(result.completed_user_ids)
+            if result.rejected:
+                logger.warning("%s: %s journaled webhooks rejected", segment.name, result.rejected)
+
+            await to_thread(self._write_offset, segment, next_offset)
+
+            offset = next_offset
+            self.replayed += len(webhooks)
+
+    async def _process(self, webhooks: List[PaymentWebhookData]) -> BatchPaymentProcessResponse:
+        async with self._session_factory() as db_session:
+            async with db_session.begin():
+                payment_processor: PaymentProcessor = PaymentProcessor(
+                    secret_payment_key=self.__payment_key,
+                    db_session=db_session,
+                    duplicates_prefilter=self._webhook_prefilter,
+                    account_cache=self._account_cache,
+                )
+
+                return await payment_processor.process_batch(items=webhooks)
+
+    async def _process_one_by_one(
+            self,
+            segment: Path,
+            webhooks: List[PaymentWebhookData],
+            lines: List[bytes],
+    ) -> BatchPaymentProcessResponse:
+        """Каждый вебхук - своя транзакция; повтор уже закоммиченных после падения отсекается по external_id"""
+        result: BatchPaymentProcessResponse = BatchPaymentProcessResponse()
+        dead_letters: List[bytes] = []
+
+        for webhook, line in zip(webhooks, lines):
+            try:
+                item_result: BatchPaymentProcessResponse = await self._process([webhook])
+            except POISON_ERRORS as error:
+                logger.error("%s: webhook %s dead-lettered: %s", segment.name, webhook.transaction_id, error)
+                dead_letters.append(dumps({
+                    "segment": segment.name,
+                    "error": str(error.orig or error),
+                    "webhook": loads(line),
+                }).encode() + b"\n")
+                continue
+
+            result.results.extend(item_result.results)
+            result.completed += item_result.completed
+            result.duplicates += item_result.duplicates
+            result.rejected += item_result.rejected
+
+        if dead_letters:
+            await self._journal.append_dead_letters(dead_letters)
+            self.dead_lettered += len(dead_letters)
+
+        return result
+
+    def _read_offset(self, segment: Path) -> int:
+        offset_path: Path = self._journal.offset_path(segment)
+
+        return int(offset_path.read_text()) if offset_path.exists() else 0
+
+    def _write_offset(self, segment: Path, offset: int) -> None:
+        offset_path: Path = self._journal.offset_path(segment)
+        temporary_path: Path = offset_path.with_suffix(".tmp")
+
+        with temporary_path.open("w") as offset_file:
+            offset_file.write(str(offset))
+            offset_file.flush()
+            fsync(offset_file.fileno())
+
+        os_replace(temporary_path, offset_path)
+
+    @staticmethod
+    def _read_lines(segment: Path, offset: int, limit: int) -> Tuple[List[bytes], int]:
+        """Только целые строки: недописанный хвост (запись без fsync) не подтверждался клиенту"""
+        lines: List[bytes] = []
+
+        with segment.open("rb") as journal_file:
+            journal_file.seek(offset)
+
+            while len(lines) < limit:
+                line: bytes = journal_file.readline()
+                if not line.endswith(b"\n"):
+                    break
+
+                offset += len(line)
+                if line.strip():
+                    lines.append(line)
+
+        return lines, offset
@@ -1,8 +1,9 @@
 from decimal import Decimal
-from typing import Optional
+from typing import Optional, List, Set
 
 from pydantic import BaseModel
 
+from src.mock_transactions.constants import BATCH_ITEM_COMPLETED, BATCH_ITEM_DUPLICATE
 from src.sso.core.models import ErrorDetail
 
 
@@ -16,9 +17,48 @@ class PaymentWebhookData(BaseModel):
 
 class AccountExistsResponse(BaseModel):
     correct_account_id: Optional[int] = None
+    balance_stripes: int = 0
     detail: Optional[str] = None
 
 
 class PaymentProcessResponse(BaseModel):
     error: Optional[ErrorDetail] = None
     detail: Optional[str] = None
+
+
+class PaymentAcceptedResponse(BaseModel):
+    transaction_id: Optional[str] = None
+    detail: Optional[str] = None
+
+    error: Optional[ErrorDetail] = None
+
+
+class BatchPaymentItemResult(BaseModel):
+    transaction_id: str
+    user_id: Optional[int] = None
+    status: str  # completed | duplicate | invalid_signature | unknown_user
+    account_id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class BatchPaymentProcessResponse(BaseModel):
+    results: List[BatchPaymentItemResult] = []
+    completed: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+
+    @property
+    def completed_user_ids(self) -> Set[int]:
+        """Пользователи, у которых изменились счета"""
+        return {
+            item.user_id for item in self.results if item.status == BATCH_ITEM_COMPLETED and item.user_id is not None
+        }
+
+    @property
+    def stored_transaction_ids(self) -> Set[str]:
+        """external_id, которые есть в БД (для префильтра дубликатов): отклоненные можно прислать повторно"""
+        return {
+            item.transaction_id for item in self.results if item.status in (BATCH_ITEM_COMPLETED, BATCH_ITEM_DUPLICATE)
+        }
+
+    error: Optional[ErrorDetail] = None
@@ -1,21 +1,82 @@
 from decimal import Decimal
+from random import randrange
 from hashlib import sha256 as hashlib_sha256
-from typing import Optional
+from typing import Optional, List, Dict, Tuple, Set, Any
 
 from fastapi import status
-from sqlalchemy import select
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import (
+    Boolean,
+    CompoundSelect,
+    Date,
+    Integer,
+    Numeric,
+    and_,
+    cast,
+    column,
+    exists,
+    false,
+    func,
+    insert,
+    literal,
+    literal_column,
+    select,
+    union_all,
+    update,
+    values
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from databases.postgres.models import Accounts, Transactions
-from src.mock_transactions.models import PaymentWebhookData, PaymentProcessResponse, AccountExistsResponse
+from databases.postgres.models import (
+    Accounts,
+    Users,
+    Transactions,
+    TransactionExternalIds,
+    AccountBalanceStripes,
+    AccountDailyBalances
+)
+from src.mock_transactions.constants import (
+    BATCH_ITEM_COMPLETED,
+    BATCH_ITEM_DUPLICATE,
+    BATCH_ITEM_INVALID_SIGNATURE,
+    BATCH_ITEM_UNKNOWN_USER
+)
+from src.mock_transactions.cache import AccountCache
+from src.mock_transactions.dedup import ExternalIdPrefilter
+from src.mock_transactions.models import (
+    PaymentWebhookData,
+    PaymentProcessResponse,
+    AccountExistsResponse,
+    BatchPaymentItemResult,
+    BatchPaymentProcessResponse
+)
 from src.sso.core.models import ErrorDetail
 
 
+def verify_payment_signature(data: PaymentWebhookData, secret_payment_key: str) -> bool:
+    signature: str = hashlib_sha256(
+        string=f"{data.account_id}{data.amount}{data.transaction_id}{data.user_id}{secret_payment_key}".encode()
+    ).hexdigest().lower()
+
+    return signature == data.signature
+
+
+class BalanceNotAppliedError(Exception):
+    """Начисление не применено: UPDATE не нашел часть счетов"""
+
+
 class PaymentProcessor:
-    def __init__(self, secret_payment_key: str, db_session: AsyncSession) -> None:
+    def __init__(
+            self,
+            secret_payment_key: str,
+            db_session: AsyncSession,
+            duplicates_prefilter: Optional[ExternalIdPrefilter] = None,
+            account_cache: Optional[AccountCache] = None,
+    ) -> None:
         self.__payment_key = secret_payment_key
         self._db_session = db_session
+        self._duplicates_prefilter = duplicates_prefilter
+        self._account_cache = account_cache
 
     async def process(self, data: PaymentWebhookData) -> PaymentProcessResponse:
         """Обработка платежа: проверка счета, сохранение транзакции, начисление средств"""
@@ -31,32 +92,47 @@ class PaymentProcessor:
                 )
                 return result
 
-            account: AccountExistsResponse = await self._account_exists(
-                payment_data=data,
-                account_name=f"user_account: {data.user_id}"  # В качестве генерации тестового имени
-            )
+            if await self._is_duplicate(external_id=data.transaction_id):
+                result.error = ErrorDetail(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Transaction with ID {data.transaction_id} already exists",
+                )
+                return result
+
+            account: AccountExistsResponse = await self._account_exists(payment_data=data)
+            if account.correct_account_id is None:
+                result.error = ErrorDetail(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"User {data.user_id} not found",
+                )
+                return result
 
-            account_obj = await self._db_session.get(Accounts, account.correct_account_id)
-            new_transaction: Transactions = Transactions(
-                account_id=account.correct_account_id,
-                type="debit",  # В качестве тестового, жестко "захардкоден"
-                amount=data.amount,
-                status="pending",
-                external_id=data.transaction_id,
+            # Дубликат не роняет транзакцию вызывающего кода: триггер external_id просто не вставляет строку
+            transaction_id: Optional[int] = await self._db_session.scalar(
+                insert(Transactions)
+                .values(
+                    account_id=account.correct_account_id,
+                    type="debit",  # В качестве тестового, жестко "захардкоден"
+                    amount=data.amount,
+                    status="completed",
+                    external_id=data.transaction_id,
+                )
+                .returning(Transactions.id)
             )
-            self._db_session.add(new_transaction)
+            if transaction_id is None:
+                result.error = ErrorDetail(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Transaction with ID {data.transaction_id} already exists",
+                )
+                return result
 
-            account_obj.balance += data.amount  # type: ignore
-            new_transaction.status = "completed"
+            await self._apply_balance_deltas(
+                balance_deltas={account.correct_account_id: data.amount},  # type: ignore
+                balance_stripes={account.correct_account_id: account.balance_stripes},  # type: ignore
+            )
 
             result.detail = f"{account.detail}. The amount was charged: {data.amount}"
 
-        except IntegrityError:
-            result.error = ErrorDetail(
-                status_code=status.HTTP_409_CONFLICT,
-                detail=f"Transaction with ID {data.transaction_id} already exists",
-            )
-
         except Exception as error:
             result.error = ErrorDetail(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -65,44 +141,356 @@ class PaymentProcessor:
 
         return result
 
-    async def _signature_authentication(self, data: PaymentWebhookData) -> bool:
-        """Проверка подписи"""
-        signature: str = hashlib_sha256(
-            string=f"{data.account_id}{data.amount}{data.transaction_id}{data.user_id}{self.__payment_key}".encode()
-        ).hexdigest().lower()
+    async def process_batch(self, items: List[PaymentWebhookData]) -> BatchPaymentProcessResponse:
+        """
+            Пакетная обработка (в рамках одной транзакции вызывающего кода):
+             - проверка всех подписей;
+             - недостающие счета - одним INSERT (только для существующих активных пользователей,
+               вебхуки остальных - unknown_user);
+             - транзакции - одним INSERT (дубликаты external_id пропускает триггер);
+             - начисления агрегируются по счету и применяются одним UPDATE
+        """
+        result: BatchPaymentProcessResponse = BatchPaymentProcessResponse()
+        item_results: Dict[str, BatchPaymentItemResult] = {}
+        accepted: List[PaymentWebhookData] = []
+
+        for data in items:
+            if data.transaction_id in item_results:  # Повтор внутри одного пакета
+                result.results.append(
+                    BatchPaymentItemResult(
+                        transaction_id=data.transaction_id,
+                        user_id=data.user_id,
+                        status=BATCH_ITEM_DUPLICATE,
+                    )
+                )
+                continue
+
+            if not await self._signature_authentication(data=data):
+                item_result = BatchPaymentItemResult(
+                    transaction_id=data.transaction_id,
+                    user_id=data.user_id,
+                    status=BATCH_ITEM_INVALID_SIGNATURE,
+                    detail="Invalid signature",
+                )
+            else:
+                item_result = BatchPaymentItemResult(
+                    transaction_id=data.transaction_id,
+                    user_id=data.user_id,
+                    status=BATCH_ITEM_COMPLETED,
+                )
+                accepted.append(data)
+
+            item_results[data.transaction_id] = item_result
+            result.results.append(item_result)
+
+        known_duplicates: Set[str] = await self._find_duplicates(
+            external_ids=[data.transaction_id for data in accepted]
+        )
+        for data in accepted:
+            if data.transaction_id in known_duplicates:
+                item_results[data.transaction_id].status = BATCH_ITEM_DUPLICATE
+                item_results[data.transaction_id].detail = f"Transaction with ID {data.transaction_id} already exists"
+
+        accepted = [data for data in accepted if data.transaction_id not in known_duplicates]
+
+        account_ids, balance_stripes = await self._resolve_accounts_batch(payments=accepted)
+        for data in accepted:
+            if (data.account_id, data.user_id) not in account_ids:
+                item_results[data.transaction_id].status = BATCH_ITEM_UNKNOWN_USER
+                item_results[data.transaction_id].detail = f"User {data.user_id} not found"
+
+        accepted = [data for data in accepted if (data.account_id, data.user_id) in account_ids]
+
+        if accepted:
+            inserted: Set[str] = set(
+                await self._db_session.scalars(
+                    insert(Transactions)
+                    .values([
+                        {
+                            "account_id": account_ids[(data.account_id, data.user_id)],
+                            "type": "debit",  # В качестве тестового, жестко "захардкоден"
+                            "amount": data.amount,
+                            "status": "completed",
+                            "external_id": data.transaction_id,
+                        } for data in accepted
+                    ])
+                    .returning(Transactions.external_id)
+                )
+            )
+
+            balance_deltas: Dict[int, Decimal] = {}
+            for data in accepted:
+                item_result = item_results[data.transaction_id]
+                item_result.account_id = account_ids[(data.account_id, data.user_id)]
+
+                if data.transaction_id not in inserted:
+                    item_result.status = BATCH_ITEM_DUPLICATE
+                    item_result.detail = f"Transaction with ID {data.transaction_id} already exists"
+                    continue
+
+                balance_deltas[item_result.account_id] = (
+                    balance_deltas.get(item_result.account_id, Decimal(0)) + data.amount
+                )
+
+            await self._apply_balance_deltas(balance_deltas=balance_deltas, balance_stripes=balance_stripes)
+
+        for item_result in result.results:
+            if item_result.status == BATCH_ITEM_COMPLETED:
+                result.completed += 1
+            elif item_result.status == BATCH_ITEM_DUPLICATE:
+                result.duplicates += 1
+            else:
+                result.rejected += 1
+
+        return result
+
+    async def _is_duplicate(self, external_id: str) -> bool:
+        return external_id in await self._find_duplicates(external_ids=[external_id])
+
+    async def _find_duplicates(self, external_ids: List[str]) -> Set[str]:
+        """
+            Дубликаты, известные префильтру: точные - без БД,
+            'возможно виденные' по фильтру Блума - одним запросом по первичному ключу transaction_external_ids
+        """
+        if self._duplicates_prefilter is None:
+            return set()
 
-        return signature == data.signature
+        duplicates: Set[str] = set()
+        maybe_seen: List[str] = []
 
-    async def _account_exists(
+        for external_id in external_ids:
+            if self._duplicates_prefilter.is_known_duplicate(external_id):
+                duplicates.add(external_id)
+            elif self._duplicates_prefilter.maybe_seen(external_id):
+                maybe_seen.append(external_id)
+
+        if maybe_seen:
+            confirmed: Set[str] = set(
+                await self._db_session.scalars(
+                    select(TransactionExternalIds.external_id)
+                    .where(TransactionExternalIds.external_id.in_(maybe_seen))
+                )
+            )
+            self._duplicates_prefilter.bloom_false_positives += len(maybe_seen) - len(confirmed)
+            self._duplicates_prefilter.remember(confirmed)
+            duplicates |= confirmed
+
+        return duplicates
+
+    async def _resolve_accounts_batch(
             self,
-            payment_data: PaymentWebhookData,
-            account_name: str,
-    ) -> AccountExistsResponse:
-        result: AccountExistsResponse = AccountExistsResponse()
+            payments: List[PaymentWebhookData],
+    ) -> Tuple[Dict[Tuple[int, int], int], Dict[int, int]]:
+        """
+            (account_id, user_id) из вебхука -> id существующего или созданного счета
+            + account_id -> balance_stripes. Пар неизвестных пользователей в результате нет:
+            их вебхуки отклоняются по одному, а не FK-ошибкой всего пакета
+        """
+        if not payments:
+            return {}, {}
+
+        resolved: Dict[Tuple[int, int], Tuple[int, int, bool]] = await self._resolve_accounts(
+            pairs={(data.account_id, data.user_id) for data in payments}
+        )
+
+        account_ids: Dict[Tuple[int, int], int] = {pair: account_id for pair, (account_id, _, _) in resolved.items()}
+        balance_stripes: Dict[int, int] = {account_id: stripes for account_id, stripes, _ in resolved.values()}
+
+        return account_ids, balance_stripes
+
+    async def _resolve_accounts(self, pairs: Set[Tuple[int, int]]) -> Dict[Tuple[int, int], Tuple[int, int, bool]]:
+        """(account_id, user_id) -> (id счета, balance_stripes, создан ли сейчас): кэш, затем один запрос"""
+        resolved: Dict[Tuple[int, int], Tuple[int, int, bool]] = {}
+
+        if self._account_cache is not None:
+            for account_id, user_id in pairs:
+                cached: Optional[Tuple[int, int]] = self._account_cache.get(user_id=user_id, account_id=account_id)
+                if cached is not None:
+                    resolved[(account_id, user_id)] = (*cached, False)
+
+        missing: List[Tuple[int, int]] = sorted(pairs - resolved.keys())
+        if not missing:
+            return resolved
+
+        rows = (await self._db_session.execute(self._resolve_accounts_statement(pairs=missing))).all()
+        for account_id, user_id, resolved_account_id, stripes, created in rows:
+            resolved[(account_id, user_id)] = (resolved_account_id, stripes, created)
+
+            if self._account_cache is not None and not created:  # Созданный счет еще не закоммичен
+                self._account_cache.add(
+                    user_id=user_id,
+                    account_id=account_id,
+                    resolved_account_id=resolved_account_id,
+                    balance_stripes=stripes,
+                )
+
+        return resolved
+
+    @staticmethod
+    def _resolve_accounts_statement(pairs: List[Tuple[int, int]]) -> CompoundSelect:
+        """
+            Один запрос на все пары: найденные счета + недостающие через
+            INSERT ... ON CONFLICT (user_id, name) DO UPDATE RETURNING.
+            Уникальный (user_id, name) не дает параллельным платежам создать пользователю второй счет:
+            проигравший в гонке получает уже вставленную строку (xmax <> 0 - строка не новая).
+            Счет создается только существующему активному пользователю (join с users в том же запросе):
+            пар неизвестных пользователей в результате нет
+        """
+        requested = select(
+            values(column("account_id", Integer), column("user_id", Integer), name="pairs").data(pairs)
+        ).cte("requested")
+
+        found = (
+            select(requested.c.account_id, requested.c.user_id, Accounts.id, Accounts.balance_stripes)
+            .join_from(
+                requested,
+                Accounts,
+                and_(Accounts.id == requested.c.account_id, Accounts.user_id == requested.c.user_id),
+            )
+            .cte("found")
+        )
+        not_found = ~exists().where(
+            found.c.account_id == requested.c.account_id,
+            found.c.user_id == requested.c.user_id,
+        )
+
+        insert_accounts = pg_insert(Accounts).from_select(
+            ["user_id", "name", "balance"],
+            select(
+                requested.c.user_id,
+                func.concat("user_account: ", requested.c.user_id),  # В качестве генерации тестового имени
+                literal(Decimal(0), Numeric(precision=15, scale=2)),
+            )
+            .join(Users, and_(Users.id == requested.c.user_id, Users.is_active == 1))
+            .where(not_found)
+            .distinct()
+            .order_by(requested.c.user_id),  # Единый порядок блокировок между параллельными пакетами
+        )
+        created = (
+            insert_accounts.on_conflict_do_update(
+                index_elements=[Accounts.user_id, Accounts.name],
+                set_={"name": insert_accounts.excluded.name},  # DO UPDATE, чтобы RETURNING вернул и чужую строку
+            )
+            .returning(
+                Accounts.id,
+                Accounts.user_id,
+                Accounts.balance_stripes,
+                literal_column("xmax = 0", Boolean).label("created"),
+            )
+            .cte("created")
+        )
 
-        user_account: Optional[int] = await self._db_session.scalar(
-            select(Accounts.id).where(
-                Accounts.id == payment_data.account_id,
-                Accounts.user_id == payment_data.user_id
+        return union_all(
+            select(found.c.account_id, found.c.user_id, found.c.id, found.c.balance_stripes, false()),
+            select(
+                requested.c.account_id,
+                requested.c.user_id,
+                created.c.id,
+                created.c.balance_stripes,
+                created.c.created,
             )
+            .join_from(requested, created, created.c.user_id == requested.c.user_id)
+            .where(not_found),
         )
-        if not user_account:
-            new_account: Accounts = Accounts(
-                user_id=payment_data.user_id,
-                name=account_name,
-                balance=Decimal(0),
+
+    async def _apply_balance_deltas(self, balance_deltas: Dict[int, Decimal], balance_stripes: Dict[int, int]) -> None:
+        """
+            Начисления атомарно в SQL (balance = balance + delta), без чтения строки счета:
+             - обычные счета - одним UPDATE ... FROM (VALUES ...);
+             - striped-счета - в случайный под-баланс, чтобы параллельные записи не ждали одну блокировку;
+             - суточный итог счета (account_daily_balances) - в ту же stripe-строку
+        """
+        plain_deltas: List[Tuple[int, Decimal]] = []
+        stripe_rows: List[Dict[str, Any]] = []
+        daily_rows: List[Dict[str, Any]] = []
+
+        for account_id, delta in sorted(balance_deltas.items()):  # Единый порядок блокировок строк дня
+            stripes: int = balance_stripes.get(account_id, 0)
+            stripe: int = randrange(stripes) if stripes > 0 else 0
+
+            if stripes > 0:
+                stripe_rows.append({"account_id": account_id, "stripe": stripe, "balance": delta})
+            else:
+                plain_deltas.append((account_id, delta))
+
+            daily_rows.append({"account_id": account_id, "stripe": stripe, "delta": delta})
+
+        if len(plain_deltas) == 1:
+            account_id, delta = plain_deltas[0]
+            balances = await self._db_session.execute(
+                update(Accounts)
+                .where(Accounts.id == account_id)
+                .values(balance=Accounts.balance + delta)
+                .returning(Accounts.id, Accounts.balance)
+                .execution_options(synchronize_session=False)
+            )
+            self._check_updated_accounts(plain_deltas=plain_deltas, updated=dict(balances.tuples().all()))
+
+        elif plain_deltas:
+            deltas = values(
+                column("id", Integer),
+                column("delta", Numeric(precision=15, scale=2)),
+                name="deltas",
+            ).data(plain_deltas)
+
+            balances = await self._db_session.execute(
+                update(Accounts)
+                .where(Accounts.id == deltas.c.id)
+                .values(balance=Accounts.balance + deltas.c.delta)
+                .returning(Accounts.id, Accounts.balance)
+                .execution_options(synchronize_session=False)
             )
+            self._check_updated_accounts(plain_deltas=plain_deltas, updated=dict(balances.tuples().all()))
 
-            self._db_session.add(new_account)
-            await self._db_session.flush()
+        if stripe_rows:
+            upsert_stripes = pg_insert(AccountBalanceStripes).values(stripe_rows)
+            await self._db_session.execute(
+                upsert_stripes.on_conflict_do_update(
+                    index_elements=[AccountBalanceStripes.account_id, AccountBalanceStripes.stripe],
+                    set_={"balance": AccountBalanceStripes.balance + upsert_stripes.excluded.balance},
+                )
+            )
+
+        if daily_rows:
+            upsert_daily = pg_insert(AccountDailyBalances).values(
+                [{**row, "day": cast(func.timezone("UTC", func.now()), Date)} for row in daily_rows]  # День created_at
+            )
+            await self._db_session.execute(
+                upsert_daily.on_conflict_do_update(
+                    index_elements=[
+                        AccountDailyBalances.account_id,
+                        AccountDailyBalances.day,
+                        AccountDailyBalances.stripe,
+                    ],
+                    set_={"delta": AccountDailyBalances.delta + upsert_daily.excluded.delta},
+                )
+            )
+
+    @staticmethod
+    def _check_updated_accounts(plain_deltas: List[Tuple[int, Decimal]], updated: Dict[int, Decimal]) -> None:
+        """
+            updated - новые балансы из RETURNING. Счет без строки (удален после попадания в AccountCache)
+            UPDATE молча пропускает - начисление потерялось бы при уже вставленной транзакции
+        """
+        missing: List[int] = [account_id for account_id, _ in plain_deltas if account_id not in updated]
+        if missing:
+            raise BalanceNotAppliedError(f"Accounts {missing} not found, balance was not charged")
+
+    async def _signature_authentication(self, data: PaymentWebhookData) -> bool:
+        """Проверка подписи"""
+        return verify_payment_signature(data=data, secret_payment_key=self.__payment_key)
+
+    async def _account_exists(self, payment_data: PaymentWebhookData) -> AccountExistsResponse:
+        result: AccountExistsResponse = AccountExistsResponse()
 
-            account_id: int = new_account.id
-            result.detail = "A new account has been created"
+        pair: Tuple[int, int] = (payment_data.account_id, payment_data.user_id)
+        resolved: Optional[Tuple[int, int, bool]] = (await self._resolve_accounts(pairs={pair})).get(pair)
+        if resolved is None:  # Пользователя нет - счет не создан
+            return result
 
-        else:
-            account_id = user_account
-            result.detail = "User account found"
+        account_id, result.balance_stripes, created = resolved
 
         result.correct_account_id = account_id
+        result.detail = "A new account has been created" if created else "User account found"
 
         return result
@@ -0,0 +1,304 @@
+"""
+    Сверка журнала: для каждого счета balance (+ под-балансы) == сумма его completed-транзакций,
+    включая секции, отсоединенные в архивную схему (TRANSACTIONS_PARTITIONS_RETENTION_MONTHS).
+    Удаленная из архива секция дает расхождения у всех ее счетов: баланс их еще учитывает.
+
+    python -m src.mock_transactions.reconciliation --workers 4 --chunk-size 10000 \
+        --checkpoint reconciliation.checkpoint.json --report reconciliation.ndjson
+"""
+from argparse import ArgumentParser, Namespace
+from asyncio import Queue, gather, run as asyncio_run
+from dataclasses import dataclass, field
+from decimal import Decimal
+from json import dumps, loads
+from logging import basicConfig, getLogger, Logger, INFO
+from os import fsync, replace as os_replace
+from pathlib import Path
+from time import monotonic
+from typing import IO, List, Optional, Set, Union
+
+from sqlalchemy import (
+    Integer,
+    Numeric,
+    Select,
+    String,
+    Table,
+    TableClause,
+    case,
+    column,
+    func,
+    select,
+    table,
+    text,
+    union_all
+)
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from databases.postgres.config import postgres
+from databases.postgres.models import Accounts, Transactions
+from databases.postgres.utils import account_total_balance
+from src.constants import TRANSACTIONS_PARTITIONS_ARCHIVE_SCHEMA
+
+logger: Logger = getLogger(__name__)
+
+# Секции transactions, отсоединенные TransactionsPartitionsMaintainer (transactions_p202401, transactions_legacy)
+ARCHIVED_TABLES = text(
+    "SELECT tablename FROM pg_tables WHERE schemaname = :schema AND tablename LIKE :prefix ORDER BY tablename"
+)
+
+
+@dataclass
+class ReconciliationStats:
+    chunks: int = 0
+    accounts: int = 0
+    discrepancies: int = 0  # Вместе с найденными прерванными запусками (из checkpoint)
+    skipped_chunks: int = 0  # Уже сверены в прошлом запуске (checkpoint)
+
+
+@dataclass
+class ReconciliationCheckpoint:
+    """
+        Сверенные диапазоны account_id: [start, start + chunk_size) и число расхождений в них.
+        Пишется атомарно после каждого диапазона
+    """
+    path: Path
+    chunk_size: int
+    completed: Set[int] = field(default_factory=set)
+    discrepancies: int = 0
+
+    @classmethod
+    def load(cls, path: Path, chunk_size: int) -> "ReconciliationCheckpoint":
+        if not path.exists():
+            return cls(path=path, chunk_size=chunk_size)
+
+        state = loads(path.read_text())
+        if state["chunk_size"] != chunk_size:
+            raise ValueError(f"Checkpoint {path} was written with chunk size {state['chunk_size']}")
+
+        return cls(
+            path=path,
+            chunk_size=chunk_size,
+            completed=set(state["completed"]),
+            discrepancies=state.get("discrepancies", 0),
+        )
+
+    def mark_completed(self, chunk_start: int, discrepancies: int) -> None:
+        self.completed.add(chunk_start)
+        self.discrepancies += discrepancies
+
+        temporary_path: Path = self.path.with_suffix(".tmp")
+        with temporary_path.open("w") as checkpoint_file:
+            checkpoint_file.write(dumps({
+                "chunk_size": self.chunk_size,
+                "completed": sorted(self.completed),
+                "discrepancies": self.discrepancies,
+            }))
+            checkpoint_file.flush()
+            fsync(checkpoint_file.fileno())
+
+        os_replace(temporary_path, self.path)
+
+
+class LedgerReconciliation:
+    """
+        Диапазоны account_id раздаются воркерам через очередь, у каждого воркера свое соединение.
+        Диапазон сверяется в одной REPEATABLE READ READ ONLY транзакции (баланс и журнал из одного снимка),
+        журнал - transactions и архивные секции: список архива читается в той же транзакции для каждого диапазона,
+        секция, отсоединенная во время сверки, не выпадает из следующих диапазонов.
+        суммы считает Postgres, строки по счетам читаются серверным курсором порциями по yield_per:
+        память не зависит ни от числа счетов, ни от числа транзакций.
+        Расхождения дописываются в NDJSON-отчет до отметки диапазона в checkpoint: после падения диапазон
+        сверяется заново (в отчете возможен повтор строк, но не пропуск)
+    """
+
+    def __init__(
+            self,
+            session_factory: async_sessionmaker[AsyncSession],
+            checkpoint: ReconciliationCheckpoint,
+            report: IO[str],
+            workers: int,
+            yield_per: int = 1000,
+            archive_schema: str = TRANSACTIONS_PARTITIONS_ARCHIVE_SCHEMA,
+    ) -> None:
+        self._session_factory: async_sessionmaker[AsyncSession] = session_factory
+        self._checkpoint: ReconciliationCheckpoint = checkpoint
+        self._report: IO[str] = report
+        self._workers: int = workers
+        self._yield_per: int = yield_per
+        self._archive_schema: str = archive_schema
+
+        # Расхождения из прерванного запуска уже в отчете: без них продолжение завершилось бы успехом
+        self.stats: ReconciliationStats = ReconciliationStats(discrepancies=checkpoint.discrepancies)
+
+    async def run(self) -> ReconciliationStats:
+        async with self._session_factory() as db_session:
+            min_id, max_id = (await db_session.execute(select(func.min(Accounts.id), func.max(Accounts.id)))).one()
+
+        if min_id is None:
+            return self.stats
+
+        chunk_size: int = self._checkpoint.chunk_size
+        chunks: Queue[Optional[int]] = Queue()
+
+        for chunk_start in range(min_id - min_id % chunk_size, max_id + 1, chunk_size):
+            if chunk_start in self._checkpoint.completed:
+                self.stats.skipped_chunks += 1
+            else:
+                chunks.put_nowait(chunk_start)
+
+        for _ in range(self._workers):
+            chunks.put_nowait(None)
+
+        await gather(*(self._worker(chunks) for _ in range(self._workers)))
+
+        return self.stats
+
+    async def _worker(self, chunks: Queue) -> None:
+        while (chunk_start := await chunks.get()) is not None:
+            await self._reconcile_chunk(chunk_start)
+
+    async def _reconcile_chunk(self, chunk_start: int) -> None:
+        discrepancies: List[str] = []
+        accounts: int = 0
+
+        async with self._session_factory() as db_session:
+            await db_session.connection(
+                execution_options={"isolation_level": "REPEATABLE READ", "postgresql_readonly": True}
+            )
+
+            archived_tables: List[str] = list(await db_session.scalars(
+                ARCHIVED_TABLES,
+                {"schema": self._archive_schema, "prefix": f"{Transactions.__tablename__}\\_%"},
+            ))
+            rows = await db_session.stream(
+                self._chunk_statement(
+                    chunk_start=chunk_start,
+                    chunk_end=chunk_start + self._checkpoint.chunk_size,
+                    ledger_tables=[Transactions.__table__] + [  # type: ignore
+                        self._archived_table(name=name, schema=self._archive_schema) for name in archived_tables
+                    ],
+                ),
+                execution_options={"yield_per": self._yield_per},
+            )
+            async for account_id, user_id, balance, ledger_balance in rows:
+                accounts += 1
+
+                if balance != ledger_balance:
+                    discrepancies.append(dumps({
+                        "account_id": account_id,
+                        "user_id": user_id,
+                        "balance": str(balance),
+                        "ledger_balance": str(ledger_balance),
+                        "difference": str(balance - ledger_balance),
+                    }))
+
+            await db_session.commit()
+
+        if discrepancies:
+            self._report.write("\n".join(discrepancies) + "\n")
+            self._report.flush()
+
+        self._checkpoint.mark_completed(chunk_start=chunk_start, discrepancies=len(discrepancies))
+
+        self.stats.chunks += 1
+        self.stats.accounts += accounts
+        self.stats.discrepancies += len(discrepancies)
+
+    @staticmethod
+    def _archived_table(name: str, schema: str) -> TableClause:
+        """Только нужные сверке столбцы: структура секции совпадает с transactions на момент отсоединения"""
+        return table(
+            name,
+            column("account_id", Integer),
+            column("type", String),
+            column("amount", Numeric(precision=15, scale=2)),
+            column("status", String),
+            schema=schema,
+        )
+
+    @staticmethod
+    def _chunk_statement(
+            chunk_start: int,
+            chunk_end: int,
+            ledger_tables: List[Union[Table, TableClause]],
+    ) -> Select:
+        """Сумма по каждой таблице журнала отбирается по (account_id, ...) своего индекса, затем агрегируется"""
+        ledger = union_all(*(
+            select(
+                ledger_table.c.account_id,
+                case(
+                    (ledger_table.c.type == "debit", ledger_table.c.amount),
+                    else_=-ledger_table.c.amount,
+                ).label("signed_amount"),
+            ).where(
+                ledger_table.c.status == "completed",
+                ledger_table.c.account_id >= chunk_start,
+                ledger_table.c.account_id < chunk_end,
+            )
+            for ledger_table in ledger_tables
+        )).subquery("ledger")
+        ledger_balances = (
+            select(ledger.c.account_id, func.sum(ledger.c.signed_amount).label("balance"))
+            .group_by(ledger.c.account_id)
+            .subquery("ledger_balances")
+        )
+
+        return (
+            select(
+                Accounts.id,
+                Accounts.user_id,
+                account_total_balance(),
+                func.coalesce(ledger_balances.c.balance, Decimal(0)),
+            )
+            .outerjoin(ledger_balances, ledger_balances.c.account_id == Accounts.id)
+            .where(Accounts.id >= chunk_start, Accounts.id < chunk_end)
+            .order_by(Accounts.id)
+        )
+
+
+async def main(arguments: Namespace) -> None:
+    engine: AsyncEngine = create_async_engine(url=postgres.DSN, pool_size=arguments.workers, max_overflow=0)
+    checkpoint: ReconciliationCheckpoint = ReconciliationCheckpoint.load(
+        path=Path(arguments.checkpoint),
+        chunk_size=arguments.chunk_size,
+    )
+    started_at: float = monotonic()
+
+    try:
+        # Продолжение прерванного запуска дописывает отчет, новый запуск начинает его заново
+        with open(arguments.report, "a" if checkpoint.completed else "w") as report:
+            stats: ReconciliationStats = await LedgerReconciliation(
+                session_factory=async_sessionmaker(engine),
+                checkpoint=checkpoint,
+                report=report,
+                workers=arguments.workers,
+                archive_schema=arguments.archive_schema,
+            ).run()
+    finally:
+        await engine.dispose()
+
+    checkpoint.path.unlink(missing_ok=True)  # Сверка завершена целиком: следующий запуск - с начала
+
+    logger.info(
+        "Reconciliation finished in %.1fs: %s chunks (%s skipped by checkpoint), %s accounts, %s discrepancies",
+        monotonic() - started_at,
+        stats.chunks,
+        stats.skipped_chunks,
+        stats.accounts,
+        stats.discrepancies,
+    )
+
+    if stats.discrepancies:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser(description="Сверка балансов счетов с журналом транзакций")
+    parser.add_argument("--workers", type=int, default=4, help="Параллельных соединений")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Счетов (по диапазону id) на одну транзакцию")
+    parser.add_argument("--checkpoint", default="reconciliation.checkpoint.json")
+    parser.add_argument("--report", default="reconciliation.ndjson", help="NDJSON с расхождениями (дописывается)")
+    parser.add_argument("--archive-schema", default=TRANSACTIONS_PARTITIONS_ARCHIVE_SCHEMA, help="Архивные секции")
+
+    basicConfig(level=INFO)
+    asyncio_run(main(parser.parse_args()))
@@ -1,7 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, status
 
-from src.mock_transactions.dependencies import mock_handle_input_transaction as mock_handle_input_transaction_dependency
-from src.mock_transactions.models import PaymentProcessResponse
+from src.mock_transactions.dependencies import (
+    mock_handle_input_transaction as mock_handle_input_transaction_dependency,
+    handle_input_transactions_batch as handle_input_transactions_batch_dependency,
+    journal_input_transaction as journal_input_transaction_dependency
+)
+from src.mock_transactions.models import PaymentProcessResponse, PaymentAcceptedResponse, BatchPaymentProcessResponse
 
 router = APIRouter(tags=["TEST_PAYMENT_WEBHOOK"])
 
@@ -21,3 +25,38 @@ async def handle_test_payment(
         )
 
     return result
+
+
+@router.post(
+    path="/handle-test-payment/batch",
+    description="Пакетная обработка вебхуков: JSON-массив или NDJSON (application/x-ndjson) "
+                "с готовыми подписями. Статус возвращается по каждому вебхуку"
+)
+async def handle_test_payments_batch(
+        result: BatchPaymentProcessResponse = Depends(handle_input_transactions_batch_dependency)
+):
+    if result.error:
+        raise HTTPException(
+            status_code=result.error.status_code,
+            detail=result.error.detail
+        )
+
+    return result
+
+
+@router.post(
+    path="/handle-test-payment/async",
+    status_code=status.HTTP_202_ACCEPTED,
+    description="Тестовый вебхук в режиме accept-fast: запись в локальный журнал и ответ 202, "
+                "перенос в БД - фоновым воспроизведением журнала (нужен WEBHOOK_JOURNAL_DIR)"
+)
+async def handle_test_payment_async(
+        result: PaymentAcceptedResponse = Depends(journal_input_transaction_dependency)
+):
+    if result.error:
+        raise HTTPException(
+            status_code=result.error.status_code,
+            detail=result.error.detail
+        )
+
+    return result
@@ -1,12 +1,25 @@
 from decimal import Decimal
 from secrets import token_urlsafe
 from hashlib import sha256 as hashlib_sha256
-from typing import Annotated
+from typing import Annotated, AsyncIterator, List, Optional
 
 from fastapi import Form
+from fastapi.requests import Request
+from pydantic import TypeAdapter
 
 from src.mock_transactions.models import PaymentWebhookData
-from src.mock_transactions.constants import SECRET_PAYMENT_KEY
+from src.mock_transactions.constants import (
+    SECRET_PAYMENT_KEY,
+    MAX_WEBHOOK_BATCH_SIZE,
+    MAX_WEBHOOK_LINE_BYTES,
+    MAX_WEBHOOK_BATCH_BYTES
+)
+from src.mock_transactions.cache import AccountCache
+from src.mock_transactions.dedup import ExternalIdPrefilter
+from src.mock_transactions.journal import WebhookJournal
+from src.utils import iter_lines
+
+payment_webhooks_adapter: TypeAdapter[List[PaymentWebhookData]] = TypeAdapter(List[PaymentWebhookData])
 
 
 async def mock_payment_data(
@@ -26,3 +39,52 @@ async def mock_payment_data(
         amount=Decimal(amount),
         signature=valid_signature
     )
+
+
+class WebhooksBatchTooLargeError(Exception):
+    """Вебхуков больше MAX_WEBHOOK_BATCH_SIZE (или тела больше MAX_WEBHOOK_BATCH_BYTES)"""
+
+
+async def read_payment_webhooks(chunks: AsyncIterator[bytes], content_type: str) -> List[PaymentWebhookData]:
+    """
+        NDJSON (по одному вебхуку в строке) читается из потока построчно: на MAX_WEBHOOK_BATCH_SIZE + 1 вебхуке
+        чтение останавливается, остаток тела не буферизуется. JSON-массив разбирается целиком,
+        поэтому его тело ограничено MAX_WEBHOOK_BATCH_BYTES.
+        ValueError/ValidationError - тело не разбирается, WebhooksBatchTooLargeError - превышен лимит
+    """
+    webhooks: List[PaymentWebhookData] = []
+
+    if "ndjson" in content_type:
+        async for _, line in iter_lines(chunks=chunks, max_line_bytes=MAX_WEBHOOK_LINE_BYTES):
+            if not line.strip():
+                continue
+            if len(webhooks) == MAX_WEBHOOK_BATCH_SIZE:
+                raise WebhooksBatchTooLargeError(f"Batch size must not exceed {MAX_WEBHOOK_BATCH_SIZE}")
+
+            webhooks.append(PaymentWebhookData.model_validate_json(line))
+
+        return webhooks
+
+    body: bytearray = bytearray()
+    async for chunk in chunks:
+        body += chunk
+        if len(body) > MAX_WEBHOOK_BATCH_BYTES:
+            raise WebhooksBatchTooLargeError(f"Batch body must not exceed {MAX_WEBHOOK_BATCH_BYTES} bytes")
+
+    webhooks = payment_webhooks_adapter.validate_json(body)
+    if len(webhooks) > MAX_WEBHOOK_BATCH_SIZE:
+        raise WebhooksBatchTooLargeError(f"Batch size must not exceed {MAX_WEBHOOK_BATCH_SIZE}")
+
+    return webhooks
+
+
+def webhook_prefilter(request: Request) -> ExternalIdPrefilter:
+    return request.app.state.webhook_prefilter
+
+
+def account_cache(request: Request) -> AccountCache:
+    return request.app.state.account_cache
+
+
+def webhook_journal(request: Request) -> Optional[WebhookJournal]:
+    return request.app.state.webhook_journal
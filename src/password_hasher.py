@@ -0,0 +1,93 @@
+from asyncio import Semaphore, gather, get_running_loop
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from multiprocessing import get_context
+from time import perf_counter
+from typing import Any, Callable, List, Sequence, TypeVar
+
+from fastapi.requests import Request
+
+from src.metrics import Histogram
+from src.utils import hash_password, check_password
+
+T = TypeVar("T")
+
+
+def hash_passwords(passwords: Sequence[str]) -> List[bytes]:
+    """Пачка паролей одной задачей пула (функция модуля - передается в процесс по имени)"""
+    return [hash_password(password) for password in passwords]
+
+
+class PasswordHasherBusyError(Exception):
+    """Очередь на хеширование переполнена"""
+
+
+class PasswordHasher:
+    """
+        bcrypt вне event loop: пул процессов (или потоков) с ограничением очереди.
+        Если в работе/ожидании уже max_pending задач - сразу PasswordHasherBusyError (503), без накопления
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, use_processes: bool = True) -> None:
+        self._executor: Executor = (
+            ProcessPoolExecutor(max_workers=max_workers, mp_context=get_context("spawn"))
+            if use_processes
+            else ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hasher")
+        )
+        self.max_workers: int = max_workers
+        self.max_pending: int = max_pending
+        # Общий для всех hash_many: два одновременных импорта вместе не займут больше max_workers - 1 воркеров
+        self._bulk_slots: Semaphore = Semaphore(max(max_workers - 1, 1))
+
+        self.in_flight: int = 0
+        self.completed: int = 0
+        self.rejected: int = 0
+        self.latency: Histogram = Histogram()  # Ожидание в очереди + само хеширование
+
+    @property
+    def queue_depth(self) -> int:
+        return max(self.in_flight - self.max_workers, 0)
+
+    async def hash(self, password: str) -> bytes:
+        return await self._run(hash_password, password)
+
+    async def hash_many(self, passwords: Sequence[str], chunk_size: int) -> List[bytes]:
+        """
+            Массовое хеширование (импорт): задачи по chunk_size паролей, одновременно не больше max_workers - 1
+            на все вызовы сразу, чтобы один воркер оставался свободным для логинов и одиночных запросов
+        """
+        async def hash_chunk(chunk: Sequence[str]) -> List[bytes]:
+            async with self._bulk_slots:
+                return await self._run(hash_passwords, chunk)
+
+        chunks: List[List[bytes]] = await gather(*(
+            hash_chunk(passwords[start:start + chunk_size]) for start in range(0, len(passwords), chunk_size)
+        ))
+
+        return [hashed_password for chunk in chunks for hashed_password in chunk]
+
+    async def check(self, password: str, hashed_password: bytes) -> bool:
+        return await self._run(check_password, password, hashed_password)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        if self.in_flight >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusyError("Password hashing queue is full")
+
+        self.in_flight += 1
+        started_at: float = perf_counter()
+
+        try:
+            return await get_running_loop().run_in_executor(self._executor, partial(func, *args))
+
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self.latency.observe(perf_counter() - started_at)
+
+
+def password_hasher(request: Request) -> PasswordHasher:
+    return request.app.state.password_hasher
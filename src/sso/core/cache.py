@@ -0,0 +1,89 @@
+from dataclasses import dataclass
+from datetime import datetime
+from time import time
+from typing import Dict, Optional, Set
+
+from src.cache import TTLCache
+from src.sso.core.models import SessionPrincipal
+
+
+@dataclass(frozen=True)
+class CachedSession:
+    principal: SessionPrincipal
+    expires_at: float  # Unix-timestamp окончания сессии
+
+    @property
+    def user_id(self) -> int:
+        return self.principal.id  # type: ignore
+
+
+class SessionCache:
+    """
+        Кэш активных сессий перед таблицей users_sessions:
+         - token -> (principal, expires_at) с TTL и LRU-вытеснением;
+         - негативный кэш для неизвестных токенов (короткий TTL);
+         - индекс user_id -> tokens для мгновенной инвалидации всех сессий пользователя.
+
+        Инвалидация локальна для процесса: при нескольких воркерах устаревание ограничено TTL
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, negative_ttl_seconds: float) -> None:
+        self.sessions: TTLCache[str, CachedSession] = TTLCache(
+            max_size=max_size,
+            ttl_seconds=ttl_seconds,
+            on_remove=self._forget_user_token,
+        )
+        self.unknown: TTLCache[str, bool] = TTLCache(max_size=max_size, ttl_seconds=negative_ttl_seconds)
+
+        self._user_tokens: Dict[int, Set[str]] = {}
+
+    def get(self, session_token: str) -> Optional[CachedSession]:
+        cached: Optional[CachedSession] = self.sessions.get(session_token)
+
+        if cached is not None and cached.expires_at <= time():  # Сессия истекла раньше TTL кэша
+            self.invalidate(session_token)
+            return None
+
+        return cached
+
+    def is_unknown(self, session_token: str) -> bool:
+        return self.unknown.get(session_token) is not None
+
+    def add(self, session_token: str, principal: SessionPrincipal, expires_at: datetime) -> None:
+        """expires_at - только с поясом: timestamp() наивного времени считает его местным временем хоста"""
+        if expires_at.tzinfo is None:
+            raise ValueError("expires_at must be timezone-aware")
+
+        expires_ts: float = expires_at.timestamp()
+
+        self.unknown.pop(session_token)
+        if expires_ts <= time():
+            return
+
+        self.sessions.set(
+            key=session_token,
+            value=CachedSession(principal=principal, expires_at=expires_ts),
+            ttl_seconds=expires_ts - time(),
+        )
+        self._user_tokens.setdefault(principal.id, set()).add(session_token)  # type: ignore
+
+    def add_unknown(self, session_token: str) -> None:
+        self.unknown.set(key=session_token, value=True)
+
+    def invalidate(self, session_token: str) -> None:
+        cached: Optional[CachedSession] = self.sessions.pop(session_token)
+
+        if cached is not None:
+            self._forget_user_token(session_token, cached)
+
+    def invalidate_user(self, user_id: int) -> None:
+        for session_token in self._user_tokens.pop(user_id, set()):
+            self.sessions.pop(session_token)
+
+    def _forget_user_token(self, session_token: str, cached: CachedSession) -> None:
+        tokens: Optional[Set[str]] = self._user_tokens.get(cached.user_id)
+
+        if tokens is not None:
+            tokens.discard(session_token)
+            if not tokens:
+                del self._user_tokens[cached.user_id]
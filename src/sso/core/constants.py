@@ -1,2 +1,22 @@
+from os import getenv
+from dotenv import load_dotenv, find_dotenv
+
+load_dotenv(find_dotenv(".env.test"))
+
 COOKIE_AUTH_KEY = "session_id"
 COOKIE_SESSION_EXPIRE_MINUTES = 1440  # 24 часа
+
+SESSION_CACHE_MAX_SIZE = 10000  # Max количество закэшированных сессий (и отдельно неизвестных токенов)
+SESSION_CACHE_TTL_SECONDS = 30  # Сколько доверяем закэшированной сессии без похода в БД
+SESSION_CACHE_NEGATIVE_TTL_SECONDS = 5  # Сколько помним неизвестный токен
+
+SESSION_REAPER_INTERVAL_SECONDS = 300  # Как часто чистим users_sessions
+SESSION_REAPER_BATCH_SIZE = 1000  # Сколько строк удаляем за одну транзакцию
+SESSION_REAPER_BATCH_PAUSE_SECONDS = 0.1  # Пауза между пачками
+MAX_SESSIONS_PER_USER = None  # Лимит живых сессий на пользователя (None - без ограничения)
+
+SESSION_MODE_DATABASE = "database"  # Сессии в users_sessions
+SESSION_MODE_SIGNED = "signed"  # Stateless HMAC-токены + список отзыва
+SESSION_MODE = getenv("SESSION_MODE", SESSION_MODE_DATABASE)
+SESSION_SIGNING_KEY = getenv("SESSION_SIGNING_KEY", "")
+SESSION_REVOCATIONS_REFRESH_SECONDS = 5  # Как часто подтягиваем отзывы из БД (для других процессов)
@@ -22,6 +22,11 @@ class BaseUserInfo(BaseModel):
     full_name: Optional[str] = None
 
 
+class SessionPrincipal(BaseUserInfo):
+    """Пользователь активной сессии: достаточно для проверки роли и /me без дополнительных запросов"""
+    role_id: Optional[int] = None
+
+
 class ErrorDetail(BaseModel):
     detail: str
     status_code: int
@@ -31,6 +36,7 @@ class UserSessionResponse(BaseModel):
     session_token: Optional[str] = None
     active_session: bool = False
     user_id: Optional[int] = None
+    principal: Optional[SessionPrincipal] = None
 
     error: Optional[ErrorDetail] = None
 
@@ -0,0 +1,118 @@
+from asyncio import sleep as asyncio_sleep
+from datetime import datetime, timezone
+from functools import partial
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import Integer, Select, column, delete, func, select, true, values
+from sqlalchemy.sql.dml import ReturningDelete
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from databases.postgres.models import UsersSessions
+from src.background import PeriodicWorker
+from src.sso.core.cache import SessionCache
+
+
+class ExpiredSessionsReaper(PeriodicWorker):
+    """
+        Фоновая очистка users_sessions:
+         - удаляет истекшие сессии;
+         - опционально оставляет пользователю не более max_sessions_per_user самых свежих сессий.
+        Удаление идет короткими транзакциями по batch_size строк с паузой между ними,
+        чтобы не держать долгих блокировок и не создавать всплесков для autovacuum
+    """
+
+    def __init__(
+            self,
+            session_factory: async_sessionmaker[AsyncSession],
+            session_cache: SessionCache,
+            interval_seconds: float,
+            batch_size: int,
+            batch_pause_seconds: float,
+            max_sessions_per_user: Optional[int] = None,
+    ) -> None:
+        super().__init__(interval_seconds=interval_seconds)
+
+        self._session_factory: async_sessionmaker[AsyncSession] = session_factory
+        self._session_cache: SessionCache = session_cache
+        self._batch_size: int = batch_size
+        self._batch_pause_seconds: float = batch_pause_seconds
+        self._max_sessions_per_user: Optional[int] = max_sessions_per_user
+
+    async def run_once(self) -> None:
+        await self._delete_in_batches(self._expired_sessions_batch)
+
+        if self._max_sessions_per_user:
+            async with self._session_factory() as db_session:
+                user_ids: List[int] = list(await db_session.scalars(self._users_with_excess_sessions()))
+
+            for start in range(0, len(user_ids), self._batch_size):
+                if start:
+                    await asyncio_sleep(self._batch_pause_seconds)
+
+                await self._delete_in_batches(
+                    partial(self._excess_sessions_batch, user_ids[start:start + self._batch_size])
+                )
+
+    async def _delete_in_batches(self, statement_factory: Callable[[], ReturningDelete[Tuple[str]]]) -> None:
+        while True:
+            async with self._session_factory() as db_session:
+                deleted_tokens: List[str] = list(await db_session.scalars(statement_factory()))
+                await db_session.commit()
+
+            for session_token in deleted_tokens:
+                self._session_cache.invalidate(session_token)
+
+            if len(deleted_tokens) < self._batch_size:
+                return
+
+            await asyncio_sleep(self._batch_pause_seconds)
+
+    def _expired_sessions_batch(self) -> ReturningDelete[Tuple[str]]:
+        expired_ids = (
+            select(UsersSessions.id)
+            .where(UsersSessions.expires_at <= datetime.now(timezone.utc).replace(tzinfo=None))
+            .order_by(UsersSessions.expires_at)
+            .limit(self._batch_size)
+            .with_for_update(skip_locked=True)  # Не ждем строк, занятых logout/remove-all
+        )
+
+        return (
+            delete(UsersSessions)
+            .where(UsersSessions.id.in_(expired_ids.scalar_subquery()))
+            .returning(UsersSessions.session_token)
+        )
+
+    def _users_with_excess_sessions(self) -> Select[Tuple[int]]:
+        """
+            Пользователи сверх лимита - одним чтением (без блокировок) за запуск, а не на каждую пачку:
+            row_number() по всей таблице в каждой пачке сортировал бы ее целиком до опустошения
+        """
+        return (
+            select(UsersSessions.user_id)
+            .group_by(UsersSessions.user_id)
+            .having(func.count() > self._max_sessions_per_user)
+            .order_by(UsersSessions.user_id)
+        )
+
+    def _excess_sessions_batch(self, user_ids: List[int]) -> ReturningDelete[Tuple[str]]:
+        """Ранжируются только сессии переданных пользователей: по индексу, от свежих, после первых max"""
+        users = values(column("user_id", Integer), name="excess_users").data([(user_id,) for user_id in user_ids])
+        excess_sessions = (
+            select(UsersSessions.id)
+            .where(UsersSessions.user_id == users.c.user_id)
+            .order_by(UsersSessions.expires_at.desc())
+            .offset(self._max_sessions_per_user)
+            .lateral("excess_sessions")
+        )
+        excess_ids = (
+            select(excess_sessions.c.id)
+            .select_from(users)
+            .join(excess_sessions, true())
+            .limit(self._batch_size)
+        )
+
+        return (
+            delete(UsersSessions)
+            .where(UsersSessions.id.in_(excess_ids.scalar_subquery()))
+            .returning(UsersSessions.session_token)
+        )
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Sequence
+
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from databases.postgres.models import UsersSessionsRevocations
+from src.background import PeriodicWorker
+from src.sso.core.tokens import SignedSessionPayload, now_ms
+
+REFRESH_OVERLAP = timedelta(seconds=60)  # Перекрытие окна обновления: ловим поздно закоммиченные отзывы
+
+
+class SessionRevocations(PeriodicWorker):
+    """
+        Компактный список отзыва stateless-сессий: user_id -> not_before (мс).
+        Держится в памяти, периодически догружается из users_sessions_revocations (отзывы других процессов).
+        Записи старше времени жизни сессии бесполезны и вычищаются
+    """
+
+    def __init__(
+            self,
+            session_factory: async_sessionmaker[AsyncSession],
+            interval_seconds: float,
+            session_lifetime_minutes: int,
+    ) -> None:
+        super().__init__(interval_seconds=interval_seconds)
+
+        self._session_factory: async_sessionmaker[AsyncSession] = session_factory
+        self._session_lifetime: timedelta = timedelta(minutes=session_lifetime_minutes)
+        self._not_before: Dict[int, int] = {}
+        self._refreshed_until: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._not_before)
+
+    def is_revoked(self, payload: SignedSessionPayload) -> bool:
+        not_before: Optional[int] = self._not_before.get(payload.user_id)
+
+        return not_before is not None and payload.issued_at < not_before
+
+    async def revoke_user(self, db_session: AsyncSession, user_id: int) -> None:
+        """Все сессии пользователя, выпущенные до этого момента, перестают действовать"""
+        await self.revoke_users(db_session=db_session, user_ids=[user_id])
+
+    async def revoke_users(self, db_session: AsyncSession, user_ids: Sequence[int]) -> None:
+        """То же для нескольких пользователей одним INSERT ... ON CONFLICT"""
+        if not user_ids:
+            return
+
+        not_before: int = now_ms()
+        not_before_at: datetime = datetime.fromtimestamp(not_before / 1000, tz=timezone.utc)
+
+        statement = insert(UsersSessionsRevocations).values(
+            [{"user_id": user_id, "not_before": not_before_at} for user_id in set(user_ids)]
+        )
+        await db_session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[UsersSessionsRevocations.user_id],
+                set_={
+                    "not_before": func.greatest(UsersSessionsRevocations.not_before, statement.excluded.not_before),
+                    "updated_at": func.now(),
+                },
+            )
+        )
+        await db_session.commit()
+
+        for user_id in user_ids:
+            self._remember(user_id=user_id, not_before=not_before)
+
+    async def run_once(self) -> None:
+        cutoff: datetime = datetime.now(timezone.utc) - self._session_lifetime
+
+        async with self._session_factory() as db_session:
+            statement = select(
+                UsersSessionsRevocations.user_id,
+                UsersSessionsRevocations.not_before,
+                UsersSessionsRevocations.updated_at,
+            ).where(UsersSessionsRevocations.not_before > cutoff)
+
+            if self._refreshed_until is not None:
+                statement = statement.where(
+                    UsersSessionsRevocations.updated_at > self._refreshed_until - REFRESH_OVERLAP
+                )
+
+            revocations = (await db_session.execute(statement)).all()
+
+            await db_session.execute(
+                delete(UsersSessionsRevocations).where(UsersSessionsRevocations.not_before <= cutoff)
+            )
+            await db_session.commit()
+
+        for user_id, not_before, updated_at in revocations:
+            self._remember(user_id=user_id, not_before=int(not_before.timestamp() * 1000))
+
+            if self._refreshed_until is None or updated_at > self._refreshed_until:
+                self._refreshed_until = updated_at
+
+        cutoff_ms: int = int(cutoff.timestamp() * 1000)
+        self._not_before = {
+            user_id: not_before for user_id, not_before in self._not_before.items() if not_before > cutoff_ms
+        }
+
+    def _remember(self, user_id: int, not_before: int) -> None:
+        self._not_before[user_id] = max(self._not_before.get(user_id, 0), not_before)
@@ -0,0 +1,97 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from dataclasses import dataclass
+from hashlib import sha256 as hashlib_sha256
+from hmac import compare_digest, new as hmac_new
+from json import dumps as json_dumps, loads as json_loads
+from time import time_ns
+from typing import Optional
+
+from src.sso.core.constants import SESSION_SIGNING_KEY
+
+SIGNED_TOKEN_VERSION = "v1"
+
+
+@dataclass(frozen=True)
+class SignedSessionPayload:
+    user_id: int
+    role_id: Optional[int]
+    email: str
+    full_name: str
+    issued_at: int  # Unix-время в миллисекундах
+    expires_at: int  # Unix-время в миллисекундах
+
+
+def _b64encode(raw: bytes) -> str:
+    return urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _b64decode(value: str) -> bytes:
+    return urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def now_ms() -> int:
+    return time_ns() // 1_000_000
+
+
+class SignedSessionTokens:
+    """
+        Stateless-сессии: v1.<payload>.<HMAC-SHA256(payload)>
+        Проверка токена не требует обращения к БД, отзыв - через SessionRevocations
+    """
+
+    def __init__(self, signing_key: str) -> None:
+        self.__signing_key: bytes = signing_key.encode()
+
+    def issue(
+            self,
+            user_id: int,
+            role_id: Optional[int],
+            email: str,
+            full_name: str,
+            lifetime_minutes: int,
+    ) -> str:
+        issued_at: int = now_ms()
+        payload: str = _b64encode(
+            json_dumps(
+                {
+                    "u": user_id,
+                    "r": role_id,
+                    "e": email,
+                    "n": full_name,
+                    "iat": issued_at,
+                    "exp": issued_at + lifetime_minutes * 60_000,
+                },
+                separators=(",", ":"),
+            ).encode()
+        )
+
+        return f"{SIGNED_TOKEN_VERSION}.{payload}.{self._sign(payload)}"
+
+    def verify(self, session_token: str) -> Optional[SignedSessionPayload]:
+        """None - если подпись неверна, формат битый или токен истек"""
+        try:
+            version, payload, signature = session_token.split(".")
+
+            if version != SIGNED_TOKEN_VERSION or not compare_digest(signature, self._sign(payload)):
+                return None
+
+            data = json_loads(_b64decode(payload))
+            result: SignedSessionPayload = SignedSessionPayload(
+                user_id=int(data["u"]),
+                role_id=data["r"],
+                email=data["e"],
+                full_name=data["n"],
+                issued_at=int(data["iat"]),
+                expires_at=int(data["exp"]),
+            )
+
+        except (ValueError, KeyError, TypeError):
+            return None
+
+        return result if result.expires_at > now_ms() else None
+
+    def _sign(self, payload: str) -> str:
+        return _b64encode(hmac_new(self.__signing_key, payload.encode(), hashlib_sha256).digest())
+
+
+signed_session_tokens: SignedSessionTokens = SignedSessionTokens(signing_key=SESSION_SIGNING_KEY)
@@ -1,6 +1,24 @@
 from secrets import token_urlsafe
+from typing import Optional
+
+from fastapi.requests import Request
+
+from src.sso.core.cache import SessionCache
+from src.sso.core.revocations import SessionRevocations
 
 
 def generate_session_token(_len: int = 32) -> str:
     """Случайный URL-Безопасный токен"""
     return token_urlsafe(_len)
+
+
+def full_name(first_name: str, last_name: Optional[str]) -> str:
+    return f"{first_name} {last_name}" if last_name else first_name
+
+
+def session_cache(request: Request) -> SessionCache:
+    return request.app.state.session_cache
+
+
+def session_revocations(request: Request) -> SessionRevocations:
+    return request.app.state.session_revocations
@@ -1,31 +1,42 @@
 from datetime import datetime, timedelta, timezone
-from typing import Annotated, Optional
+from typing import Annotated, Optional, Tuple, Any
 
 from fastapi import Depends, Form, Cookie, Response
 from pydantic import EmailStr
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, Row
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
 from databases.postgres.models import Users, UsersSessions
 from databases.postgres.utils import async_db_session
+from src.sso.core.cache import SessionCache, CachedSession
 from src.sso.core.cookies import CookiesConfig
 from src.sso.core.models import (
     UserLoginResponse,
     UserSessionResponse,
     ErrorDetail,
     RemoveUserSessionsResponse,
-    LogoutResponse
+    LogoutResponse,
+    SessionPrincipal
 )
-from src.sso.core.constants import COOKIE_AUTH_KEY, COOKIE_SESSION_EXPIRE_MINUTES
-from src.sso.core.utils import generate_session_token
-from src.utils import check_password
+from src.sso.core.constants import COOKIE_AUTH_KEY, COOKIE_SESSION_EXPIRE_MINUTES, SESSION_MODE, SESSION_MODE_SIGNED
+from src.sso.core.revocations import SessionRevocations
+from src.sso.core.tokens import SignedSessionPayload, signed_session_tokens
+from src.sso.core.utils import (
+    generate_session_token,
+    full_name,
+    session_cache as session_cache_dependency,
+    session_revocations as session_revocations_dependency
+)
+from src.password_hasher import PasswordHasher, PasswordHasherBusyError, password_hasher as password_hasher_dependency
 
 
 async def check_active_session(
         response: Response,
         session_token: Optional[str] = Cookie(default=None, alias=COOKIE_AUTH_KEY),
-        db_session: AsyncSession = Depends(async_db_session)
+        db_session: AsyncSession = Depends(async_db_session),
+        session_cache: SessionCache = Depends(session_cache_dependency),
+        session_revocations: SessionRevocations = Depends(session_revocations_dependency),
 ) -> UserSessionResponse:
     result: UserSessionResponse = UserSessionResponse()
 
@@ -38,13 +49,71 @@ async def check_active_session(
 
             return result
 
-        user_session: Optional[UsersSessions] = await db_session.scalar(
-            select(UsersSessions).where(
-                UsersSessions.session_token == session_token,
-                UsersSessions.expires_at > datetime.now(timezone.utc).replace(tzinfo=None)  # Ищем active-сессии
+        if SESSION_MODE == SESSION_MODE_SIGNED:  # Проверка без обращения к БД
+            payload: Optional[SignedSessionPayload] = signed_session_tokens.verify(session_token)
+
+            if not payload or session_revocations.is_revoked(payload):
+                response.delete_cookie(key=COOKIE_AUTH_KEY)
+
+                result.error = ErrorDetail(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Session expired or not found",
+                )
+
+                return result
+
+            result.active_session = True
+            result.session_token = session_token
+            result.user_id = payload.user_id
+            result.principal = SessionPrincipal(
+                id=payload.user_id,
+                email=payload.email,
+                full_name=payload.full_name,
+                role_id=payload.role_id,
             )
-        )
+
+            return result
+
+        cached_session: Optional[CachedSession] = session_cache.get(session_token)
+        if cached_session:
+            result.active_session = True
+            result.session_token = session_token
+            result.user_id = cached_session.user_id
+            result.principal = cached_session.principal
+
+            return result
+
+        if session_cache.is_unknown(session_token):
+            response.delete_cookie(key=COOKIE_AUTH_KEY)
+
+            result.error = ErrorDetail(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Session expired or not found",
+            )
+
+            return result
+
+        # Сессия + пользователь одним запросом: дальше роль и /me проверяются без обращений к БД
+        user_session: Optional[Row[Tuple[Any, ...]]] = (
+            await db_session.execute(
+                select(
+                    UsersSessions.expires_at,
+                    Users.id,
+                    Users.role_id,
+                    Users.email,
+                    Users.first_name,
+                    Users.last_name,
+                )
+                .join(Users, Users.id == UsersSessions.user_id)
+                .where(
+                    UsersSessions.session_token == session_token,
+                    UsersSessions.expires_at > datetime.now(timezone.utc).replace(tzinfo=None),  # Ищем active-сессии
+                    Users.is_active == 1,  # Сессии деактивированного пользователя не действуют
+                )
+            )
+        ).first()
         if not user_session:
+            session_cache.add_unknown(session_token)
             response.delete_cookie(key=COOKIE_AUTH_KEY)  # Опционально, удаляем невалидный токен
 
             result.error = ErrorDetail(
@@ -54,9 +123,23 @@ async def check_active_session(
 
             return result
 
+        expires_at, user_id, role_id, email, first_name, last_name = user_session
+        principal: SessionPrincipal = SessionPrincipal(
+            id=user_id,
+            email=email,
+            full_name=full_name(first_name=first_name, last_name=last_name),
+            role_id=role_id,
+        )
+        session_cache.add(
+            session_token=session_token,
+            principal=principal,
+            expires_at=expires_at.replace(tzinfo=timezone.utc),  # В users_sessions - UTC без пояса
+        )
+
         result.active_session = True
-        result.session_token = user_session.session_token
-        result.user_id = user_session.user_id
+        result.session_token = session_token
+        result.user_id = user_id
+        result.principal = principal
 
     except Exception as error:
         result.error = ErrorDetail(
@@ -72,6 +155,8 @@ async def login(
         password: Annotated[str, Form()],
         user_session: UserSessionResponse = Depends(check_active_session),
         db_session: AsyncSession = Depends(async_db_session),
+        session_cache: SessionCache = Depends(session_cache_dependency),
+        password_hasher: PasswordHasher = Depends(password_hasher_dependency),
 ) -> UserLoginResponse:
     result: UserLoginResponse = UserLoginResponse()
 
@@ -85,7 +170,7 @@ async def login(
             return result
 
         user: Optional[Users] = await db_session.scalar(
-            select(Users).where(Users.email == email)
+            select(Users).where(Users.email == email, Users.is_active == 1)
         )
         if not user:
             result.error = ErrorDetail(
@@ -95,7 +180,7 @@ async def login(
 
             return result
 
-        if not check_password(password=password, hashed_password=user.hash_password):
+        if not await password_hasher.check(password=password, hashed_password=user.hash_password):
             result.error = ErrorDetail(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password",
@@ -103,13 +188,37 @@ async def login(
 
             return result
 
-        session_token: str = generate_session_token()
-        new_session: UsersSessions = UsersSessions.create_with_lifetime(
-            user_id=user.id,
-            session_token=session_token,
-        )
-        db_session.add(new_session)
-        await db_session.commit()
+        user_full_name: str = full_name(first_name=user.first_name, last_name=user.last_name)
+
+        if SESSION_MODE == SESSION_MODE_SIGNED:
+            session_token: str = signed_session_tokens.issue(
+                user_id=user.id,
+                role_id=user.role_id,
+                email=user.email,
+                full_name=user_full_name,
+                lifetime_minutes=COOKIE_SESSION_EXPIRE_MINUTES,
+            )
+
+        else:
+            session_token = generate_session_token()
+            new_session: UsersSessions = UsersSessions.create_with_lifetime(
+                user_id=user.id,
+                session_token=session_token,
+            )
+            # До коммита: после него атрибуты ORM-объектов истекают (expire_on_commit) и ленивая догрузка
+            # в async-коде падает с MissingGreenlet
+            principal: SessionPrincipal = SessionPrincipal(
+                id=user.id,
+                email=user.email,
+                full_name=user_full_name,
+                role_id=user.role_id,
+            )
+            expires_at: datetime = new_session.expires_at.replace(tzinfo=timezone.utc)
+
+            db_session.add(new_session)
+            await db_session.commit()
+
+            session_cache.add(session_token=session_token, principal=principal, expires_at=expires_at)
 
         result.cookies = CookiesConfig(
             KEY=COOKIE_AUTH_KEY,
@@ -118,6 +227,12 @@ async def login(
         )
         result.success_detail = {"detail": "Login successful"}
 
+    except PasswordHasherBusyError:
+        result.error = ErrorDetail(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, try again later",
+        )
+
     except Exception as error:
         await db_session.rollback()
         result.error = ErrorDetail(
@@ -132,6 +247,8 @@ async def remove_all_session(
         response: Response,
         session_token: Optional[str] = Cookie(default=None, alias=COOKIE_AUTH_KEY),
         db_session: AsyncSession = Depends(async_db_session),
+        session_cache: SessionCache = Depends(session_cache_dependency),
+        session_revocations: SessionRevocations = Depends(session_revocations_dependency),
 ) -> RemoveUserSessionsResponse:
     result: RemoveUserSessionsResponse = RemoveUserSessionsResponse()
 
@@ -141,6 +258,21 @@ async def remove_all_session(
 
             return result
 
+        if SESSION_MODE == SESSION_MODE_SIGNED:
+            payload: Optional[SignedSessionPayload] = signed_session_tokens.verify(session_token)
+            response.delete_cookie(key=COOKIE_AUTH_KEY)
+
+            if not payload:
+                result.detail = "Session not found"
+
+                return result
+
+            await session_revocations.revoke_user(db_session=db_session, user_id=payload.user_id)
+
+            result.detail = "All sessions deleted!"
+
+            return result
+
         user: Optional[UsersSessions] = await db_session.scalar(
             select(UsersSessions).where(UsersSessions.session_token == session_token)
         )
@@ -157,6 +289,8 @@ async def remove_all_session(
         )
         await db_session.commit()
 
+        session_cache.invalidate_user(user.user_id)
+
         response.delete_cookie(key=COOKIE_AUTH_KEY)
 
         result.detail = "All sessions deleted!"
@@ -174,7 +308,9 @@ async def remove_all_session(
 async def logout(
         response: Response,
         db_session: AsyncSession = Depends(async_db_session),
-        user_session: UserSessionResponse = Depends(check_active_session)
+        user_session: UserSessionResponse = Depends(check_active_session),
+        session_cache: SessionCache = Depends(session_cache_dependency),
+        session_revocations: SessionRevocations = Depends(session_revocations_dependency),
 ) -> LogoutResponse:
     result: LogoutResponse = LogoutResponse()
 
@@ -187,10 +323,17 @@ async def logout(
 
             return result
 
-        await db_session.execute(
-            delete(UsersSessions).where(UsersSessions.session_token == user_session.session_token)
-        )
-        await db_session.commit()
+        if SESSION_MODE == SESSION_MODE_SIGNED:
+            # Отзыв по not_before: завершаются все выпущенные к этому моменту сессии пользователя
+            await session_revocations.revoke_user(db_session=db_session, user_id=user_session.user_id)  # type: ignore
+
+        else:
+            await db_session.execute(
+                delete(UsersSessions).where(UsersSessions.session_token == user_session.session_token)
+            )
+            await db_session.commit()
+
+            session_cache.invalidate(user_session.session_token)  # type: ignore
 
         response.delete_cookie(key=COOKIE_AUTH_KEY)
 
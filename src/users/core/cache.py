@@ -0,0 +1,52 @@
+from itertools import count
+from secrets import token_hex
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from src.cache import TTLCache
+from src.sso.core.models import UserAccount
+
+
+class AccountsVersions:
+    """
+        Версия счетов пользователя -> сильный ETag для /api/v1/users/accounts и ключ кэша ответа.
+        bump() вызывается после коммита изменений счетов (платеж, действие администратора).
+        Версии локальны для процесса: изменения из других процессов видны не позже ttl_seconds,
+        после истечения пользователь получает новую версию (ETag) и свежий ответ
+    """
+
+    def __init__(self, max_users: int, ttl_seconds: float) -> None:
+        self._versions: TTLCache[int, int] = TTLCache(max_size=max_users, ttl_seconds=ttl_seconds)
+        self._responses: TTLCache[Tuple[int, int], List[UserAccount]] = TTLCache(
+            max_size=max_users,
+            ttl_seconds=ttl_seconds,
+        )
+        self._counter: Iterator[int] = count(1)  # Общий счетчик: версия пользователя никогда не повторяется
+        self._epoch: str = token_hex(4)  # Версии разных процессов и запусков не совпадают
+
+    @property
+    def responses(self) -> TTLCache[Tuple[int, int], List[UserAccount]]:
+        return self._responses
+
+    def etag(self, user_id: int) -> str:
+        return f'"{self._epoch}-{self._version(user_id)}"'
+
+    def bump(self, user_ids: Iterable[int]) -> None:
+        for user_id in user_ids:
+            self._versions.set(key=user_id, value=next(self._counter))
+
+    def get_response(self, user_id: int) -> Optional[List[UserAccount]]:
+        return self._responses.get((user_id, self._version(user_id)))
+
+    def set_response(self, user_id: int, etag: str, accounts: List[UserAccount]) -> None:
+        """Ответ, собранный для версии etag; если версия уже сменилась - не кэшируется"""
+        if etag == self.etag(user_id):
+            self._responses.set(key=(user_id, self._version(user_id)), value=accounts)
+
+    def _version(self, user_id: int) -> int:
+        version: Optional[int] = self._versions.get(user_id)
+
+        if version is None:
+            version = next(self._counter)
+            self._versions.set(key=user_id, value=version)
+
+        return version
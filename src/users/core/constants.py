@@ -1,2 +1,18 @@
 USER_ROLE_ID: int = 1
 TRANSACTIONS_PER_PAGE: int = 50
+BALANCE_HISTORY_DEFAULT_DAYS: int = 30
+BALANCE_HISTORY_MAX_DAYS: int = 366
+
+EXPORT_FORMAT_NDJSON: str = "ndjson"
+EXPORT_FORMAT_CSV: str = "csv"
+EXPORT_CHUNK_SIZE: int = 1000  # Строк на одну keyset-страницу выгрузки (своя короткая сессия) = один кусок ответа
+EXPORT_CSV_COLUMNS = ("id", "account_name", "type", "amount", "status", "external_id", "created_at")
+
+ACCOUNTS_VERSIONS_MAX_USERS: int = 50000  # Пользователей с версией счетов (ETag) и закэшированным ответом
+ACCOUNTS_VERSIONS_TTL_SECONDS: int = 30  # Предел устаревания при изменениях счетов в других процессах
+
+TRANSACTION_TYPES = ("debit", "credit")
+TRANSACTION_STATUSES = ("pending", "completed", "failed", "cancelled")
+
+TRANSACTIONS_SUMMARY_CACHE_MAX_SIZE: int = 10000  # Сводок (пользователь, версия счетов, период)
+TRANSACTIONS_SUMMARY_CACHE_TTL_SECONDS: int = 10  # Предел устаревания сводки при платежах в других процессах
@@ -1,7 +1,8 @@
-from datetime import datetime
-from typing import Optional, List
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional, List, AsyncIterator, Dict
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from src.sso.core.models import ErrorDetail, BaseUserInfo, UserAccount
 
@@ -23,9 +24,50 @@ class UserInfoSessionResponse(BaseModel):
 
 class UserAccountsInfoResponse(BaseModel):
     accounts: Optional[List[UserAccount]] = []
+    etag: Optional[str] = None
+    not_modified: bool = False  # If-None-Match совпал с текущей версией: 304 без тела
     error: Optional[ErrorDetail] = None
 
 
 class UserTransactionsInfoResponse(BaseModel):
     transactions: Optional[List[Transaction]] = []
+    next_cursor: Optional[str] = None  # None - страниц больше нет
+    error: Optional[ErrorDetail] = None
+
+
+class BalanceHistoryDay(BaseModel):
+    day: date
+    delta: Decimal  # Изменение баланса за день
+    closing_balance: Decimal  # Баланс на конец дня (UTC)
+
+
+class AccountBalanceHistoryResponse(BaseModel):
+    account_id: Optional[int] = None
+    balance_history: Optional[List[BalanceHistoryDay]] = []
+    error: Optional[ErrorDetail] = None
+
+
+class TransactionsExportResponse(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    content: Optional[AsyncIterator[bytes]] = None  # Тело ответа, читается по мере отправки
+    media_type: Optional[str] = None
+    filename: Optional[str] = None
+    error: Optional[ErrorDetail] = None
+
+
+class TransactionsSummary(BaseModel):
+    account_id: Optional[int] = None  # None - итог по всем счетам
+    account_name: Optional[str] = None
+    credit_sum: Decimal = Decimal(0)  # Только completed
+    debit_sum: Decimal = Decimal(0)  # Только completed
+    status_counts: Dict[str, int] = {}
+    last_transaction_at: Optional[datetime] = None
+
+
+class TransactionsSummaryResponse(BaseModel):
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    accounts: Optional[List[TransactionsSummary]] = []
+    total: Optional[TransactionsSummary] = None
     error: Optional[ErrorDetail] = None
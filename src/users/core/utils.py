@@ -0,0 +1,168 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from csv import writer as csv_writer
+from datetime import datetime
+from decimal import Decimal
+from io import StringIO
+from json import dumps, loads
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+
+from fastapi.requests import Request
+from sqlalchemy import ColumnElement, Select, literal, select, true, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import aliased
+
+from databases.postgres.models import Accounts, Transactions
+from src.cache import TTLCache
+from src.users.core.cache import AccountsVersions
+from src.users.core.constants import EXPORT_FORMAT_CSV, EXPORT_CHUNK_SIZE, EXPORT_CSV_COLUMNS
+from src.users.core.models import TransactionsSummaryResponse
+
+SummaryKey = Tuple[int, str, Optional[datetime], Optional[datetime]]  # (user_id, ETag счетов, date_from, date_to)
+ExportRow = Tuple[int, str, str, Decimal, str, Optional[str], datetime]  # Колонки EXPORT_CSV_COLUMNS
+
+
+def accounts_versions(request: Request) -> AccountsVersions:
+    return request.app.state.accounts_versions
+
+
+def transactions_summaries(request: Request) -> TTLCache[SummaryKey, TransactionsSummaryResponse]:
+    return request.app.state.transactions_summaries
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match: список ETag через запятую или '*', сравнение слабое (без W/)"""
+    if not if_none_match:
+        return False
+
+    candidates: List[str] = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+
+    return "*" in candidates or etag in candidates
+
+
+def encode_transactions_cursor(created_at: datetime, transaction_id: int) -> str:
+    """Непрозрачный курсор keyset-пагинации: позиция последней отданной транзакции (created_at, id)"""
+    return urlsafe_b64encode(dumps([created_at.isoformat(), transaction_id]).encode()).decode().rstrip("=")
+
+
+def decode_transactions_cursor(cursor: str) -> Tuple[datetime, int]:
+    """ValueError - курсор поврежден или подделан"""
+    try:
+        created_at, transaction_id = loads(urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), int(transaction_id)
+
+    except (BinasciiError, TypeError, UnicodeDecodeError) as error:
+        raise ValueError("Invalid cursor") from error
+
+
+def transactions_page_statement(
+        user_id: int,
+        account_id: Optional[int],
+        filters: List[ColumnElement[bool]],
+        cursor_position: Optional[Tuple[datetime, int]],
+        offset: Optional[int],
+        limit: int,
+) -> Select:
+    """Страница транзакций пользователя (limit + 1 строка - признак следующей страницы); offset - режим page"""
+    account_transactions = select(Transactions).where(Transactions.account_id == Accounts.id).where(*filters)
+
+    if cursor_position is not None:
+        cursor_created_at, cursor_id = cursor_position
+        account_transactions = account_transactions.where(
+            tuple_(Transactions.created_at, Transactions.id) < tuple_(literal(cursor_created_at), literal(cursor_id))
+        )
+
+    if offset is None:
+        account_transactions = account_transactions.limit(limit + 1)
+
+    latest = account_transactions.order_by(
+        Transactions.created_at.desc(),
+        Transactions.id.desc(),
+    ).lateral("account_transactions")
+    transaction_entity = aliased(Transactions, latest)
+
+    return (
+        select(transaction_entity, Accounts.name.label("account_name"))
+        .join_from(Accounts, latest, true())
+        .where(
+            Accounts.user_id == user_id,
+            Accounts.id == account_id if account_id is not None else true(),
+        )
+        .order_by(latest.c.created_at.desc(), latest.c.id.desc())
+        .limit(limit + 1)
+        .offset(offset or 0)
+    )
+
+
+async def stream_user_transactions(
+        session_factory: async_sessionmaker[AsyncSession],
+        user_id: int,
+        export_format: str,
+) -> AsyncIterator[bytes]:
+    """
+        Все транзакции пользователя от новых к старым, кусками по EXPORT_CHUNK_SIZE строк.
+        Каждый кусок - отдельная keyset-страница (тот же запрос, что у /transactions) в своей короткой сессии:
+        соединение и снимок не держатся, пока клиент медленно скачивает ответ. Строки, проведенные во время
+        выгрузки, в нее не попадают (позиция курсора только убывает), но и не сдвигают уже отданные.
+        Своя сессия: ответ отдается после выхода из зависимостей запроса
+    """
+    if export_format == EXPORT_FORMAT_CSV:
+        yield _csv_lines([EXPORT_CSV_COLUMNS])
+
+    cursor_position: Optional[Tuple[datetime, int]] = None
+    while True:
+        async with session_factory() as db_session:
+            page: List[ExportRow] = [
+                (
+                    transaction.id,
+                    account_name,
+                    transaction.type,
+                    transaction.amount,
+                    transaction.status,
+                    transaction.external_id,
+                    transaction.created_at,
+                ) for transaction, account_name in (await db_session.execute(
+                    transactions_page_statement(
+                        user_id=user_id,
+                        account_id=None,
+                        filters=[],
+                        cursor_position=cursor_position,
+                        offset=None,
+                        limit=EXPORT_CHUNK_SIZE,
+                    )
+                )).all()
+            ]
+
+        if page:
+            chunk: List[ExportRow] = page[:EXPORT_CHUNK_SIZE]
+            yield _csv_lines(chunk) if export_format == EXPORT_FORMAT_CSV else _ndjson_lines(chunk)
+
+        if len(page) <= EXPORT_CHUNK_SIZE:  # Лишней строки нет - страница последняя
+            return
+
+        transaction_id, *_, created_at = page[EXPORT_CHUNK_SIZE - 1]
+        cursor_position = created_at, transaction_id
+
+
+def _ndjson_lines(rows: Sequence[ExportRow]) -> bytes:
+    return "".join(
+        dumps({
+            "id": transaction_id,
+            "account_name": account_name,
+            "type": transaction_type,
+            "amount": str(amount),
+            "status": transaction_status,
+            "external_id": external_id,
+            "created_at": created_at.isoformat(),
+        }) + "\n"
+        for transaction_id, account_name, transaction_type, amount, transaction_status, external_id, created_at in rows
+    ).encode()
+
+
+def _csv_lines(rows: Sequence[Sequence]) -> bytes:
+    buffer: StringIO = StringIO()
+    csv_writer(buffer).writerows(
+        [value.isoformat() if isinstance(value, datetime) else value for value in row] for row in rows
+    )
+
+    return buffer.getvalue().encode()
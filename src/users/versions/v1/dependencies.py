@@ -1,68 +1,81 @@
-from typing import Tuple, Optional, Any
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
 
-from fastapi import Depends, status, Query
-from sqlalchemy import Result, select, Row, ScalarResult
+from fastapi import Depends, Header, Request, status, Query
+from sqlalchemy import select, func, literal, tuple_, and_, ScalarResult, ColumnElement
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import with_expression
 
-from databases.postgres.models import Users, Accounts, Transactions
-from databases.postgres.utils import async_db_session
-from src.sso.core.models import UserSessionResponse, ErrorDetail, BaseUserInfo, UserAccount
+from databases.postgres.models import Accounts, Transactions, AccountDailyBalances, TransactionExternalIds
+from databases.postgres.utils import async_db_session, account_total_balance
+from src.sso.core.models import UserSessionResponse, ErrorDetail, BaseUserInfo, UserAccount, SessionPrincipal
 from src.sso.versions.v1.dependencies import check_active_session
-from src.users.core.constants import USER_ROLE_ID, TRANSACTIONS_PER_PAGE
+from src.users.core.constants import (
+    USER_ROLE_ID,
+    TRANSACTIONS_PER_PAGE,
+    BALANCE_HISTORY_DEFAULT_DAYS,
+    BALANCE_HISTORY_MAX_DAYS,
+    EXPORT_FORMAT_NDJSON,
+    EXPORT_FORMAT_CSV,
+    TRANSACTION_TYPES,
+    TRANSACTION_STATUSES
+)
 from src.users.core.models import UserInfoSessionResponse, UserAccountsInfoResponse, UserTransactionsInfoResponse, \
-    Transaction
+    Transaction, AccountBalanceHistoryResponse, BalanceHistoryDay, TransactionsExportResponse, TransactionsSummary, \
+    TransactionsSummaryResponse
+from src.cache import TTLCache
+from src.users.core.cache import AccountsVersions
+from src.users.core.utils import (
+    encode_transactions_cursor,
+    transactions_page_statement,
+    decode_transactions_cursor,
+    stream_user_transactions,
+    etag_matches,
+    accounts_versions as accounts_versions_dependency,
+    transactions_summaries as transactions_summaries_dependency,
+    SummaryKey
+)
 
 
 async def user_info_session(  # Админ не может получить доступ к юзеру напрямую из домена users!
         user_session: UserSessionResponse = Depends(check_active_session),
-        db_session: AsyncSession = Depends(async_db_session)
 ) -> UserInfoSessionResponse:
+    """Пользователь уже получен вместе с сессией в check_active_session - дополнительных запросов нет"""
     result: UserInfoSessionResponse = UserInfoSessionResponse()
 
-    try:
-        if user_session.active_session is False:
-            result.error = ErrorDetail(
-                status_code=user_session.error.status_code,  # type: ignore
-                detail=user_session.error.detail  # type: ignore
-            )
-            return result
-
-        user: Result[Tuple] = await db_session.execute(
-            select(Users.id, Users.email, Users.first_name, Users.last_name).where(
-                Users.id == user_session.user_id,
-                Users.role_id == USER_ROLE_ID
-            )
+    if user_session.active_session is False:
+        result.error = ErrorDetail(
+            status_code=user_session.error.status_code,  # type: ignore
+            detail=user_session.error.detail  # type: ignore
         )
-        user_data: Optional[Row[Tuple[Any]]] = user.first()
-
-        if not user_data:
-            result.error = ErrorDetail(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="User not found"
-            )
-            return result
+        return result
 
-        user_id, email, first_name, last_name = user_data
+    principal: SessionPrincipal = user_session.principal  # type: ignore
 
-        result.user = BaseUserInfo(
-            id=user_id,
-            email=email,
-            full_name=f"{first_name} {last_name}" if last_name else first_name,
-        )
-
-    except Exception as error:
+    if principal.role_id != USER_ROLE_ID:
         result.error = ErrorDetail(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Oops, something went wrong! {error}",
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User not found"
         )
+        return result
+
+    result.user = BaseUserInfo(
+        id=principal.id,
+        email=principal.email,
+        full_name=principal.full_name,
+    )
 
     return result
 
 
 async def get_accounts_with_balances(
+        if_none_match: Optional[str] = Header(default=None),
         user_session: UserInfoSessionResponse = Depends(user_info_session),
-        db_session: AsyncSession = Depends(async_db_session)
+        db_session: AsyncSession = Depends(async_db_session),
+        accounts_versions: AccountsVersions = Depends(accounts_versions_dependency),
 ) -> UserAccountsInfoResponse:
+    """ETag - версия счетов пользователя: совпавший If-None-Match и кэш ответа обходятся без запроса в БД"""
     result: UserAccountsInfoResponse = UserAccountsInfoResponse()
 
     try:
@@ -73,9 +86,22 @@ async def get_accounts_with_balances(
             )
             return result
 
+        user_id: int = user_session.user.id  # type: ignore
+        result.etag = accounts_versions.etag(user_id)  # До чтения счетов: ответ не может оказаться старше версии
+
+        if etag_matches(if_none_match=if_none_match, etag=result.etag):
+            result.not_modified = True
+            return result
+
+        cached_accounts: Optional[List[UserAccount]] = accounts_versions.get_response(user_id)
+        if cached_accounts is not None:
+            result.accounts = cached_accounts
+            return result
+
         user_accounts: ScalarResult[Accounts] = await db_session.scalars(
             select(Accounts)
-            .where(Accounts.user_id == user_session.user.id)  # type: ignore
+            .options(with_expression(Accounts.total_balance, account_total_balance()))
+            .where(Accounts.user_id == user_id)
             .order_by(Accounts.created_at)
         )
 
@@ -84,12 +110,14 @@ async def get_accounts_with_balances(
                 UserAccount(
                     id=account.id,
                     name=account.name,
-                    balance=account.balance,
+                    balance=account.total_balance,
                     created_at=account.created_at,
                     is_active=account.is_active,
                 )
             )
 
+        accounts_versions.set_response(user_id=user_id, etag=result.etag, accounts=result.accounts)  # type: ignore
+
     except Exception as error:
         result.error = ErrorDetail(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -100,11 +128,31 @@ async def get_accounts_with_balances(
 
 
 async def get_transactions(
-        page: int = Query(default=1),
+        page: Optional[int] = Query(default=None, description="Устаревшая постраничная выдача (OFFSET)"),
+        cursor: Optional[str] = Query(default=None, description="next_cursor из предыдущего ответа"),
+        date_from: Optional[datetime] = Query(default=None, description="created_at >= date_from"),
+        date_to: Optional[datetime] = Query(default=None, description="created_at < date_to"),
+        transaction_type: Optional[str] = Query(default=None, alias="type"),
+        transaction_status: Optional[str] = Query(default=None, alias="status"),
+        amount_min: Optional[Decimal] = Query(default=None),
+        amount_max: Optional[Decimal] = Query(default=None),
+        account_id: Optional[int] = Query(default=None),
+        external_id: Optional[str] = Query(default=None),
         user_session: UserInfoSessionResponse = Depends(user_info_session),
         db_session: AsyncSession = Depends(async_db_session)
 ) -> UserTransactionsInfoResponse:
-    """Упрощенная реализация"""
+    """
+        Keyset-пагинация по (created_at, id) DESC: любая страница стоит как первая.
+        Для каждого счета пользователя берется не больше limit транзакций после курсора по индексу
+        (account_id, created_at, id) (LATERAL), затем они сливаются. page оставлен для совместимости.
+        Фильтры применяются внутри LATERAL, у каждого свой индекс:
+         - date_from/date_to - отсечение секций + диапазон по (account_id, created_at, id);
+         - type/status - частичные индексы по редким значениям (credit; все, кроме completed),
+           частые значения идут по основному индексу (отбрасывается мало строк);
+         - amount_min/amount_max - (account_id, amount);
+         - external_id - created_at из первичного ключа transaction_external_ids, дальше одна секция.
+        При запросе следующей страницы фильтры передаются повторно вместе с cursor
+    """
     result: UserTransactionsInfoResponse = UserTransactionsInfoResponse()
 
     try:
@@ -115,26 +163,61 @@ async def get_transactions(
             )
             return result
 
-        if page <= 0:
+        if page is not None and page <= 0:
             result.error = ErrorDetail(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Page number must be greater than 0",
             )
             return result
 
-        limit: int = TRANSACTIONS_PER_PAGE
-        offset: int = (page - 1) * limit
+        filters_error: Optional[str] = _transactions_filters_error(
+            date_from=date_from,
+            date_to=date_to,
+            transaction_type=transaction_type,
+            transaction_status=transaction_status,
+            amount_min=amount_min,
+            amount_max=amount_max,
+        )
+        if filters_error is not None:
+            result.error = ErrorDetail(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=filters_error,
+            )
+            return result
+
+        cursor_position: Optional[Tuple[datetime, int]] = None
+        if cursor is not None:
+            try:
+                cursor_position = decode_transactions_cursor(cursor)
+            except ValueError:
+                result.error = ErrorDetail(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor",
+                )
+                return result
 
+        limit: int = TRANSACTIONS_PER_PAGE
         transactions = await db_session.execute(
-            select(Transactions, Accounts.name.label("account_name"))
-            .join(Accounts, Transactions.account_id == Accounts.id)
-            .where(Accounts.user_id == user_session.user.id)  # type: ignore
-            .order_by(Transactions.created_at.desc())
-            .limit(limit)
-            .offset(offset)
+            transactions_page_statement(
+                user_id=user_session.user.id,  # type: ignore
+                account_id=account_id,
+                filters=_transactions_filters(
+                    date_from=date_from,
+                    date_to=date_to,
+                    transaction_type=transaction_type,
+                    transaction_status=transaction_status,
+                    amount_min=amount_min,
+                    amount_max=amount_max,
+                    external_id=external_id,
+                ),
+                cursor_position=cursor_position,
+                offset=(page - 1) * limit if page is not None and cursor is None else None,
+                limit=limit,
+            )
         )
 
-        for transaction, account_name in transactions.all():
+        rows = transactions.all()
+        for transaction, account_name in rows[:limit]:
             result.transactions.append(  # type: ignore
                 Transaction(
                     id=transaction.id,
@@ -147,6 +230,112 @@ async def get_transactions(
                 )
             )
 
+        if len(rows) > limit:
+            last: Transaction = result.transactions[-1]  # type: ignore
+            result.next_cursor = encode_transactions_cursor(
+                created_at=last.created_at,  # type: ignore
+                transaction_id=last.id,  # type: ignore
+            )
+
+    except Exception as error:
+        result.error = ErrorDetail(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Oops, something went wrong! {error}",
+        )
+
+    return result
+
+
+async def get_transactions_summary(
+        date_from: Optional[datetime] = Query(default=None, description="created_at >= date_from"),
+        date_to: Optional[datetime] = Query(default=None, description="created_at < date_to"),
+        user_session: UserInfoSessionResponse = Depends(user_info_session),
+        db_session: AsyncSession = Depends(async_db_session),
+        accounts_versions: AccountsVersions = Depends(accounts_versions_dependency),
+        summaries: TTLCache[SummaryKey, TransactionsSummaryResponse] = Depends(transactions_summaries_dependency),
+) -> TransactionsSummaryResponse:
+    """
+        Сводка по счетам за период одним запросом: GROUP BY ROLLUP дает строку на счет и итоговую строку,
+        суммы и счетчики по статусам - агрегаты с FILTER. Кэш по (пользователь, ETag счетов, период):
+        платеж в этом процессе меняет ETag, в других - сводка устаревает не дольше TTL кэша
+    """
+    result: TransactionsSummaryResponse = TransactionsSummaryResponse()
+
+    try:
+        if user_session.error:
+            result.error = ErrorDetail(
+                status_code=user_session.error.status_code,
+                detail=user_session.error.detail
+            )
+            return result
+
+        if date_from is not None:
+            date_from = _as_utc(date_from)
+        if date_to is not None:
+            date_to = _as_utc(date_to)
+
+        if date_from is not None and date_to is not None and date_from >= date_to:
+            result.error = ErrorDetail(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="date_from must be earlier than date_to",
+            )
+            return result
+
+        user_id: int = user_session.user.id  # type: ignore
+        key: SummaryKey = (user_id, accounts_versions.etag(user_id), date_from, date_to)
+
+        cached_summary: Optional[TransactionsSummaryResponse] = summaries.get(key)
+        if cached_summary is not None:
+            return cached_summary
+
+        completed = Transactions.status == "completed"
+        transactions_in_range = [Transactions.account_id == Accounts.id]
+        if date_from is not None:
+            transactions_in_range.append(Transactions.created_at >= date_from)
+        if date_to is not None:
+            transactions_in_range.append(Transactions.created_at < date_to)
+
+        rows = await db_session.execute(
+            select(
+                func.grouping(Accounts.id).label("is_total"),
+                Accounts.id,
+                Accounts.name,
+                func.coalesce(
+                    func.sum(Transactions.amount).filter(completed, Transactions.type == "credit"), Decimal(0)
+                ),
+                func.coalesce(
+                    func.sum(Transactions.amount).filter(completed, Transactions.type == "debit"), Decimal(0)
+                ),
+                func.max(Transactions.created_at),
+                *(
+                    func.count(Transactions.id).filter(Transactions.status == transaction_status)
+                    for transaction_status in TRANSACTION_STATUSES
+                ),
+            )
+            .outerjoin(Transactions, and_(*transactions_in_range))
+            .where(Accounts.user_id == user_id)
+            .group_by(func.rollup(tuple_(Accounts.id, Accounts.name)))
+            .order_by(func.grouping(Accounts.id), Accounts.id)
+        )
+
+        for is_total, account_id, account_name, credit_sum, debit_sum, last_transaction_at, *counts in rows:
+            summary: TransactionsSummary = TransactionsSummary(
+                account_id=account_id,
+                account_name=account_name,
+                credit_sum=credit_sum,
+                debit_sum=debit_sum,
+                status_counts=dict(zip(TRANSACTION_STATUSES, counts)),
+                last_transaction_at=last_transaction_at,
+            )
+
+            if is_total:
+                result.total = summary
+            else:
+                result.accounts.append(summary)  # type: ignore
+
+        result.date_from, result.date_to = date_from, date_to
+        summaries.set(key=key, value=result)
+
     except Exception as error:
         result.error = ErrorDetail(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -154,3 +343,183 @@ async def get_transactions(
         )
 
     return result
+
+
+def _as_utc(moment: datetime) -> datetime:
+    """Время без пояса считается UTC, а не часовым поясом сессии Postgres"""
+    return moment if moment.tzinfo is not None else moment.replace(tzinfo=timezone.utc)
+
+
+def _transactions_filters(
+        date_from: Optional[datetime],
+        date_to: Optional[datetime],
+        transaction_type: Optional[str],
+        transaction_status: Optional[str],
+        amount_min: Optional[Decimal],
+        amount_max: Optional[Decimal],
+        external_id: Optional[str],
+) -> List[ColumnElement[bool]]:
+    filters: List[ColumnElement[bool]] = []
+
+    if date_from is not None:
+        filters.append(Transactions.created_at >= _as_utc(date_from))
+    if date_to is not None:
+        filters.append(Transactions.created_at < _as_utc(date_to))
+    # Значения подставляются в текст запроса: иначе общий план не сможет выбрать частичный индекс
+    if transaction_type is not None:
+        filters.append(Transactions.type == literal(transaction_type, literal_execute=True))
+    if transaction_status is not None:
+        filters.append(Transactions.status == literal(transaction_status, literal_execute=True))
+    if amount_min is not None:
+        filters.append(Transactions.amount >= amount_min)
+    if amount_max is not None:
+        filters.append(Transactions.amount <= amount_max)
+    if external_id is not None:
+        filters.append(Transactions.external_id == external_id)
+        # Секция определяется по created_at из первичного ключа transaction_external_ids
+        filters.append(
+            Transactions.created_at == (
+                select(TransactionExternalIds.created_at)
+                .where(TransactionExternalIds.external_id == external_id)
+                .scalar_subquery()
+            )
+        )
+
+    return filters
+
+
+def _transactions_filters_error(
+        date_from: Optional[datetime],
+        date_to: Optional[datetime],
+        transaction_type: Optional[str],
+        transaction_status: Optional[str],
+        amount_min: Optional[Decimal],
+        amount_max: Optional[Decimal],
+) -> Optional[str]:
+    if transaction_type is not None and transaction_type not in TRANSACTION_TYPES:
+        return f"type must be one of: {', '.join(TRANSACTION_TYPES)}"
+
+    if transaction_status is not None and transaction_status not in TRANSACTION_STATUSES:
+        return f"status must be one of: {', '.join(TRANSACTION_STATUSES)}"
+
+    if date_from is not None and date_to is not None and _as_utc(date_from) >= _as_utc(date_to):
+        return "date_from must be earlier than date_to"
+
+    if amount_min is not None and amount_max is not None and amount_min > amount_max:
+        return "amount_min must not be greater than amount_max"
+
+    return None
+
+
+async def get_account_balance_history(
+        account_id: int,
+        date_from: Optional[date] = Query(default=None),
+        date_to: Optional[date] = Query(default=None),
+        user_session: UserInfoSessionResponse = Depends(user_info_session),
+        db_session: AsyncSession = Depends(async_db_session)
+) -> AccountBalanceHistoryResponse:
+    """
+        Баланс счета на конец каждого дня [date_from, date_to] по account_daily_balances:
+        от текущего баланса назад вычитаются суточные изменения - O(дней), а не O(транзакций)
+    """
+    result: AccountBalanceHistoryResponse = AccountBalanceHistoryResponse(account_id=account_id)
+
+    try:
+        if user_session.error:
+            result.error = ErrorDetail(
+                status_code=user_session.error.status_code,
+                detail=user_session.error.detail
+            )
+            return result
+
+        today: date = datetime.now(timezone.utc).date()
+        date_to = min(date_to or today, today)
+        date_from = date_from or date_to - timedelta(days=BALANCE_HISTORY_DEFAULT_DAYS - 1)
+
+        if date_from > date_to or (date_to - date_from).days >= BALANCE_HISTORY_MAX_DAYS:
+            result.error = ErrorDetail(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"date_from must not be after date_to, range is limited to {BALANCE_HISTORY_MAX_DAYS} days",
+            )
+            return result
+
+        # Текущий баланс и суточные изменения - одним запросом, т.е. из одного снимка: в READ COMMITTED
+        # два отдельных запроса могли разойтись на транзакцию, проведенную между ними.
+        # Изменения с date_from по сегодня: более поздние дни нужны, чтобы откатить текущий баланс до date_to
+        rows = (await db_session.execute(
+            select(account_total_balance(), AccountDailyBalances.day, func.sum(AccountDailyBalances.delta))
+            .select_from(Accounts)
+            .outerjoin(
+                AccountDailyBalances,
+                and_(AccountDailyBalances.account_id == Accounts.id, AccountDailyBalances.day >= date_from),
+            )
+            .where(
+                Accounts.id == account_id,
+                Accounts.user_id == user_session.user.id  # type: ignore
+            )
+            .group_by(Accounts.id, AccountDailyBalances.day)
+        )).all()
+        if not rows:
+            result.error = ErrorDetail(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Account not found",
+            )
+            return result
+
+        total_balance: Decimal = rows[0][0]
+        daily_deltas: Dict[date, Decimal] = {day: delta for _, day, delta in rows if day is not None}
+
+        closing_balance: Decimal = total_balance
+        day: date = today
+        while day >= date_from:
+            delta: Decimal = daily_deltas.get(day, Decimal(0))
+
+            if day <= date_to:
+                result.balance_history.append(  # type: ignore
+                    BalanceHistoryDay(day=day, delta=delta, closing_balance=closing_balance)
+                )
+
+            closing_balance -= delta
+            day -= timedelta(days=1)
+
+        result.balance_history.reverse()  # type: ignore
+
+    except Exception as error:
+        result.error = ErrorDetail(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Oops, something went wrong! {error}",
+        )
+
+    return result
+
+
+async def export_transactions(
+        request: Request,
+        export_format: str = Query(default=EXPORT_FORMAT_NDJSON, alias="format"),
+        user_session: UserInfoSessionResponse = Depends(user_info_session),
+) -> TransactionsExportResponse:
+    result: TransactionsExportResponse = TransactionsExportResponse()
+
+    if user_session.error:
+        result.error = ErrorDetail(
+            status_code=user_session.error.status_code,
+            detail=user_session.error.detail
+        )
+        return result
+
+    if export_format not in (EXPORT_FORMAT_NDJSON, EXPORT_FORMAT_CSV):
+        result.error = ErrorDetail(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Format must be {EXPORT_FORMAT_NDJSON} or {EXPORT_FORMAT_CSV}",
+        )
+        return result
+
+    result.media_type = "text/csv" if export_format == EXPORT_FORMAT_CSV else "application/x-ndjson"
+    result.filename = f"transactions_{user_session.user.id}.{export_format}"  # type: ignore
+    result.content = stream_user_transactions(
+        session_factory=request.app.state.session_factory,
+        user_id=user_session.user.id,  # type: ignore
+        export_format=export_format,
+    )
+
+    return result
@@ -1,14 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
 
 from src.users.core.models import (
     UserInfoSessionResponse,
     UserAccountsInfoResponse,
-    UserTransactionsInfoResponse
+    UserTransactionsInfoResponse,
+    AccountBalanceHistoryResponse,
+    TransactionsExportResponse,
+    TransactionsSummaryResponse
 )
 from src.users.versions.v1.dependencies import (
     user_info_session as user_info_session_dependency,
     get_accounts_with_balances as get_accounts_with_balances_dependency,
-    get_transactions as get_transactions_dependency
+    get_transactions as get_transactions_dependency,
+    get_account_balance_history as get_account_balance_history_dependency,
+    export_transactions as export_transactions_dependency,
+    get_transactions_summary as get_transactions_summary_dependency
 )
 
 router = APIRouter(prefix="/api/v1/users", tags=["USERS_API_V1"])
@@ -29,6 +36,7 @@ async def user_info(
 
 @router.get(path="/accounts")
 async def user_accounts(
+        response: Response,
         result: UserAccountsInfoResponse = Depends(get_accounts_with_balances_dependency)
 ):
     if result.error:
@@ -37,6 +45,12 @@ async def user_accounts(
             detail=result.error.detail,
         )
 
+    headers = {"ETag": result.etag, "Cache-Control": "private, no-cache"}  # Клиент всегда перепроверяет версию
+    if result.not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)  # type: ignore
+
+    response.headers.update(headers)  # type: ignore
+
     return result.accounts
 
 
@@ -51,3 +65,55 @@ async def user_transactions(
         )
 
     return result
+
+
+@router.get(
+    path="/accounts/{account_id}/balance-history",
+    description="Баланс счета на конец каждого дня (UTC) за период, по умолчанию - последние 30 дней"
+)
+async def user_account_balance_history(
+        result: AccountBalanceHistoryResponse = Depends(get_account_balance_history_dependency)
+):
+    if result.error:
+        raise HTTPException(
+            status_code=result.error.status_code,
+            detail=result.error.detail,
+        )
+
+    return result
+
+
+@router.get(
+    path="/summary",
+    description="Суммы credit/debit (completed), число транзакций по статусам и время последней - по счетам и итого"
+)
+async def user_transactions_summary(
+        result: TransactionsSummaryResponse = Depends(get_transactions_summary_dependency)
+):
+    if result.error:
+        raise HTTPException(
+            status_code=result.error.status_code,
+            detail=result.error.detail,
+        )
+
+    return result
+
+
+@router.get(
+    path="/transactions/export",
+    description="Вся история транзакций потоком: format=ndjson (по умолчанию) или csv"
+)
+async def user_transactions_export(
+        result: TransactionsExportResponse = Depends(export_transactions_dependency)
+):
+    if result.error:
+        raise HTTPException(
+            status_code=result.error.status_code,
+            detail=result.error.detail,
+        )
+
+    return StreamingResponse(
+        content=result.content,  # type: ignore
+        media_type=result.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{result.filename}"'},
+    )
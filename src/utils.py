@@ -1,3 +1,5 @@
+from typing import AsyncIterator, Tuple
+
 from bcrypt import (
     gensalt as bcrypt_gensalt,
     hashpw as bcrypt_hashpw,
@@ -17,3 +19,27 @@ def check_password(password: str, hashed_password: bytes) -> bool:
         password=password.encode(),
         hashed_password=hashed_password,
     )
+
+
+class LineTooLongError(ValueError):
+    """Строка потока длиннее max_line_bytes: тело дальше не читается"""
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Tuple[int, bytes]]:
+    """(номер строки, строка без перевода строки) из потока кусков тела запроса; буфер - не больше одной строки"""
+    buffer: bytes = b""
+    line_number: int = 0
+
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+
+        for line in lines:
+            line_number += 1
+            yield line_number, line.rstrip(b"\r")
+
+        if len(buffer) > max_line_bytes:
+            raise LineTooLongError(f"Line {line_number + 1} is longer than {max_line_bytes} bytes")
+
+    if buffer.strip():
+        yield line_number + 1, buffer.rstrip(b"\r")
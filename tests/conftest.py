@@ -0,0 +1,42 @@
+"""
+    Тесты планов запросов: нужен Postgres с примененными миграциями (alembic upgrade head),
+    параметры подключения - те же переменные окружения POSTGRES_*, что у сервиса.
+    Без доступной базы тесты пропускаются
+"""
+from typing import Iterator
+
+import pytest
+from sqlalchemy import Connection, Engine, create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from databases.postgres.config import postgres
+
+
+@pytest.fixture(scope="session")
+def postgres_engine() -> Iterator[Engine]:
+    engine: Engine = create_engine(postgres.DSN)
+
+    try:
+        with engine.connect() as connection:
+            migrated = connection.scalar(text("SELECT to_regclass('alembic_version') IS NOT NULL"))
+    except OperationalError as error:
+        engine.dispose()
+        pytest.skip(f"PostgreSQL is not available: {error.orig}")
+
+    if not migrated:
+        engine.dispose()
+        pytest.skip("PostgreSQL is not migrated: run alembic upgrade head")
+
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def seeded_connection(postgres_engine: Engine) -> Iterator[Connection]:
+    """Соединение с открытой транзакцией: данные модуля засеваются в ней и откатываются после тестов"""
+    with postgres_engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            yield connection
+        finally:
+            transaction.rollback()
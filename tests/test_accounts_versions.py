@@ -0,0 +1,57 @@
+"""Версии счетов пользователя: ETag и кэш ответа /api/v1/users/accounts"""
+from decimal import Decimal
+from typing import List
+
+from src.sso.core.models import UserAccount
+from src.users.core.cache import AccountsVersions
+
+ACCOUNTS: List[UserAccount] = [UserAccount(id=1, name="main", balance=Decimal("10.00"), is_active=1)]
+
+
+def test_etag_is_stable_until_bump() -> None:
+    accounts_versions: AccountsVersions = AccountsVersions(max_users=10, ttl_seconds=60)
+    etag: str = accounts_versions.etag(1)
+
+    assert etag.startswith('"') and etag.endswith('"')
+    assert accounts_versions.etag(1) == etag
+    assert accounts_versions.etag(2) != etag
+
+    accounts_versions.bump([1])
+
+    assert accounts_versions.etag(1) != etag
+
+
+def test_versions_of_different_processes_differ() -> None:
+    first: AccountsVersions = AccountsVersions(max_users=10, ttl_seconds=60)
+    second: AccountsVersions = AccountsVersions(max_users=10, ttl_seconds=60)
+
+    assert first.etag(1) != second.etag(1)
+
+
+def test_response_is_cached_per_version() -> None:
+    accounts_versions: AccountsVersions = AccountsVersions(max_users=10, ttl_seconds=60)
+    accounts_versions.set_response(1, etag=accounts_versions.etag(1), accounts=ACCOUNTS)
+
+    assert accounts_versions.get_response(1) == ACCOUNTS
+
+    accounts_versions.bump([1])
+
+    assert accounts_versions.get_response(1) is None
+
+
+def test_response_for_outdated_version_is_not_cached() -> None:
+    accounts_versions: AccountsVersions = AccountsVersions(max_users=10, ttl_seconds=60)
+    etag: str = accounts_versions.etag(1)
+
+    accounts_versions.bump([1])  # Платеж закоммичен, пока собирался ответ
+    accounts_versions.set_response(1, etag=etag, accounts=ACCOUNTS)
+
+    assert accounts_versions.get_response(1) is None
+
+
+def test_expired_version_is_replaced() -> None:
+    accounts_versions: AccountsVersions = AccountsVersions(max_users=10, ttl_seconds=60)
+    etag: str = accounts_versions.etag(1)
+    accounts_versions._versions.pop(1)  # Версия истекла по TTL
+
+    assert accounts_versions.etag(1) != etag
@@ -0,0 +1,51 @@
+"""Помесячные границы секций transactions"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from databases.postgres.partitions import UPPER_BOUND_PATTERN, add_months, month_partition_name, month_start
+
+
+@pytest.mark.parametrize(
+    ("moment", "expected"),
+    [
+        (datetime(2026, 10, 17, 21, 30, 5, 123, tzinfo=timezone.utc), datetime(2026, 10, 1, tzinfo=timezone.utc)),
+        (datetime(2026, 12, 31, 23, 59, 59, tzinfo=timezone.utc), datetime(2026, 12, 1, tzinfo=timezone.utc)),
+        # Начало месяца - по UTC: в часовом поясе +03:00 это еще предыдущий месяц
+        (
+            datetime(2026, 11, 1, 1, 0, tzinfo=timezone(timedelta(hours=3))),
+            datetime(2026, 10, 1, tzinfo=timezone.utc),
+        ),
+    ],
+)
+def test_month_start(moment: datetime, expected: datetime) -> None:
+    assert month_start(moment) == expected
+    assert month_start(moment).tzinfo == timezone.utc
+
+
+@pytest.mark.parametrize(
+    ("months", "expected"),
+    [
+        (0, datetime(2026, 10, 1, tzinfo=timezone.utc)),
+        (1, datetime(2026, 11, 1, tzinfo=timezone.utc)),
+        (3, datetime(2027, 1, 1, tzinfo=timezone.utc)),
+        (15, datetime(2028, 1, 1, tzinfo=timezone.utc)),
+        (-10, datetime(2025, 12, 1, tzinfo=timezone.utc)),
+        (-22, datetime(2024, 12, 1, tzinfo=timezone.utc)),
+    ],
+)
+def test_add_months(months: int, expected: datetime) -> None:
+    assert add_months(datetime(2026, 10, 1, tzinfo=timezone.utc), months) == expected
+
+
+def test_month_partition_name() -> None:
+    assert month_partition_name("transactions", datetime(2027, 2, 1, tzinfo=timezone.utc)) == "transactions_p202702"
+
+
+def test_upper_bound_pattern() -> None:
+    bound: str = "FOR VALUES FROM ('2026-11-01 00:00:00+00') TO ('2026-12-01 00:00:00+00')"
+    upper_bound = UPPER_BOUND_PATTERN.search(bound)
+
+    assert upper_bound is not None
+    assert datetime.fromisoformat(upper_bound.group(1)) == datetime(2026, 12, 1, tzinfo=timezone.utc)
+    assert UPPER_BOUND_PATTERN.search("DEFAULT") is None
@@ -0,0 +1,69 @@
+"""bcrypt вне event loop: ограничение очереди и доля пула для массового хеширования"""
+from asyncio import gather, run
+from threading import Lock
+from time import sleep
+from typing import Iterator, List, Sequence, Tuple
+
+import pytest
+
+from src.password_hasher import PasswordHasher, PasswordHasherBusyError
+
+
+@pytest.fixture
+def password_hasher() -> Iterator[PasswordHasher]:
+    hasher: PasswordHasher = PasswordHasher(max_workers=3, max_pending=2, use_processes=False)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_hash_and_check(password_hasher: PasswordHasher) -> None:
+    async def scenario() -> List[bool]:
+        hashed_password: bytes = await password_hasher.hash("secret")
+        return [
+            await password_hasher.check("secret", hashed_password),
+            await password_hasher.check("wrong", hashed_password),
+        ]
+
+    assert run(scenario()) == [True, False]
+    assert password_hasher.completed == 3
+    assert password_hasher.in_flight == 0
+
+
+def test_full_queue_is_rejected_immediately(password_hasher: PasswordHasher) -> None:
+    async def scenario() -> List[object]:
+        return await gather(*(password_hasher.hash("secret") for _ in range(3)), return_exceptions=True)
+
+    results: List[object] = run(scenario())
+
+    assert sum(isinstance(result, PasswordHasherBusyError) for result in results) == 1
+    assert password_hasher.rejected == 1
+
+
+def test_hash_many_leaves_a_worker_free(password_hasher: PasswordHasher, monkeypatch: pytest.MonkeyPatch) -> None:
+    lock: Lock = Lock()
+    running: List[int] = [0, 0]  # Сейчас, максимум
+
+    def fake_hash_passwords(passwords: Sequence[str]) -> List[bytes]:
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return [password.encode() for password in passwords]
+
+    monkeypatch.setattr("src.password_hasher.hash_passwords", fake_hash_passwords)
+    password_hasher.max_pending = 100
+    passwords: List[str] = [f"password-{n}" for n in range(10)]
+
+    async def scenario() -> Tuple[List[bytes], List[bytes]]:
+        # Два импорта сразу делят один лимит max_workers - 1
+        return await gather(
+            password_hasher.hash_many(passwords, chunk_size=2),
+            password_hasher.hash_many(passwords, chunk_size=3),
+        )
+
+    first, second = run(scenario())
+
+    assert first == second == [password.encode() for password in passwords]
+    assert running[1] == 2
@@ -0,0 +1,104 @@
+"""Кэш сессий перед users_sessions: TTL/LRU, негативный кэш, инвалидация по пользователю"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.cache import TTLCache
+from src.sso.core.cache import SessionCache
+from src.sso.core.models import SessionPrincipal
+
+
+def principal(user_id: int) -> SessionPrincipal:
+    return SessionPrincipal(id=user_id, email=f"user{user_id}@example.com", role_id=1)
+
+
+def in_minutes(minutes: int) -> datetime:
+    return datetime.now(timezone.utc) + timedelta(minutes=minutes)
+
+
+@pytest.fixture
+def session_cache() -> SessionCache:
+    return SessionCache(max_size=3, ttl_seconds=60, negative_ttl_seconds=5)
+
+
+def test_add_and_get(session_cache: SessionCache) -> None:
+    session_cache.add("token-1", principal(1), expires_at=in_minutes(10))
+
+    cached = session_cache.get("token-1")
+
+    assert cached is not None
+    assert cached.user_id == 1
+    assert session_cache.get("token-2") is None
+
+
+def test_naive_expires_at_is_rejected(session_cache: SessionCache) -> None:
+    with pytest.raises(ValueError):
+        session_cache.add("token-1", principal(1), expires_at=datetime.now() + timedelta(minutes=10))
+
+
+def test_expired_session_is_not_cached(session_cache: SessionCache) -> None:
+    session_cache.add("token-1", principal(1), expires_at=in_minutes(-1))
+
+    assert session_cache.get("token-1") is None
+
+
+def test_session_expiring_before_cache_ttl(session_cache: SessionCache, monkeypatch: pytest.MonkeyPatch) -> None:
+    session_cache.add("token-1", principal(1), expires_at=in_minutes(10))
+
+    # Запись в кэше еще жива (TTL - по monotonic), но сама сессия уже истекла
+    monkeypatch.setattr("src.sso.core.cache.time", lambda: in_minutes(11).timestamp())
+
+    assert session_cache.get("token-1") is None
+    assert 1 not in session_cache._user_tokens
+
+
+def test_unknown_token_is_forgotten_on_add(session_cache: SessionCache) -> None:
+    session_cache.add_unknown("token-1")
+    assert session_cache.is_unknown("token-1")
+
+    session_cache.add("token-1", principal(1), expires_at=in_minutes(10))
+
+    assert not session_cache.is_unknown("token-1")
+
+
+def test_invalidate_user(session_cache: SessionCache) -> None:
+    session_cache.add("token-1", principal(1), expires_at=in_minutes(10))
+    session_cache.add("token-2", principal(1), expires_at=in_minutes(10))
+    session_cache.add("token-3", principal(2), expires_at=in_minutes(10))
+
+    session_cache.invalidate_user(1)
+
+    assert session_cache.get("token-1") is None
+    assert session_cache.get("token-2") is None
+    assert session_cache.get("token-3") is not None
+
+
+def test_evicted_token_leaves_user_index(session_cache: SessionCache) -> None:
+    for n in range(4):
+        session_cache.add(f"token-{n}", principal(n), expires_at=in_minutes(10))
+
+    assert session_cache.get("token-0") is None
+    assert 0 not in session_cache._user_tokens
+    assert session_cache.sessions.stats.evictions == 1
+
+
+def test_ttl_cache_lru_order() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.get("a") == 1  # "a" становится самым свежим
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_non_positive_ttl_drops_key() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("a", 2, ttl_seconds=0)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
@@ -0,0 +1,84 @@
+"""Stateless-сессии: подпись, истечение и список отзыва"""
+from dataclasses import replace
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.sso.core.revocations import SessionRevocations
+from src.sso.core.tokens import SIGNED_TOKEN_VERSION, SignedSessionPayload, SignedSessionTokens, now_ms
+
+
+@pytest.fixture
+def tokens() -> SignedSessionTokens:
+    return SignedSessionTokens(signing_key="test-signing-key")
+
+
+def test_issue_and_verify(tokens: SignedSessionTokens) -> None:
+    session_token: str = tokens.issue(
+        user_id=7, role_id=2, email="user@example.com", full_name="Test User", lifetime_minutes=5
+    )
+
+    payload = tokens.verify(session_token)
+
+    assert session_token.startswith(f"{SIGNED_TOKEN_VERSION}.")
+    assert payload is not None
+    assert (payload.user_id, payload.role_id, payload.email, payload.full_name) == (
+        7, 2, "user@example.com", "Test User"
+    )
+    assert payload.expires_at - payload.issued_at == 5 * 60_000
+
+
+def test_foreign_key_signature_is_rejected(tokens: SignedSessionTokens) -> None:
+    session_token: str = SignedSessionTokens(signing_key="other-key").issue(
+        user_id=7, role_id=None, email="user@example.com", full_name="", lifetime_minutes=5
+    )
+
+    assert tokens.verify(session_token) is None
+
+
+def test_tampered_payload_is_rejected(tokens: SignedSessionTokens) -> None:
+    version, payload, signature = tokens.issue(
+        user_id=7, role_id=None, email="user@example.com", full_name="", lifetime_minutes=5
+    ).split(".")
+    other_payload: str = tokens.issue(
+        user_id=8, role_id=None, email="user@example.com", full_name="", lifetime_minutes=5
+    ).split(".")[1]
+
+    assert tokens.verify(f"{version}.{other_payload}.{signature}") is None
+    assert tokens.verify(f"v0.{payload}.{signature}") is None
+
+
+@pytest.mark.parametrize("session_token", ["", "v1", "v1.a.b.c", "v1.!!!.sig", "opaque-db-session-token"])
+def test_malformed_token_is_rejected(tokens: SignedSessionTokens, session_token: str) -> None:
+    assert tokens.verify(session_token) is None
+
+
+def test_expired_token_is_rejected(tokens: SignedSessionTokens) -> None:
+    session_token: str = tokens.issue(
+        user_id=7, role_id=None, email="user@example.com", full_name="", lifetime_minutes=0
+    )
+
+    assert tokens.verify(session_token) is None
+
+
+def test_revocation_applies_to_tokens_issued_before_it() -> None:
+    revocations: SessionRevocations = SessionRevocations(
+        session_factory=async_sessionmaker(),
+        interval_seconds=60,
+        session_lifetime_minutes=60,
+    )
+    issued_at: int = now_ms()
+    payload: SignedSessionPayload = SignedSessionPayload(
+        user_id=7, role_id=None, email="user@example.com", full_name="", issued_at=issued_at,
+        expires_at=issued_at + 60_000,
+    )
+
+    assert not revocations.is_revoked(payload)
+
+    revocations._remember(user_id=7, not_before=issued_at + 1)
+    revocations._remember(user_id=7, not_before=issued_at - 1_000)  # Более ранний отзыв не отменяет поздний
+
+    assert revocations.is_revoked(payload)
+    assert not revocations.is_revoked(replace(payload, issued_at=issued_at + 1))
+    assert not revocations.is_revoked(replace(payload, user_id=8))
+    assert len(revocations) == 1
@@ -0,0 +1,40 @@
+"""Курсор keyset-пагинации GET /api/v1/users/transactions"""
+from base64 import urlsafe_b64encode
+from datetime import datetime, timezone
+
+import pytest
+
+from src.users.core.utils import decode_transactions_cursor, encode_transactions_cursor
+
+
+def test_cursor_round_trip() -> None:
+    created_at: datetime = datetime(2026, 10, 17, 21, 30, 5, 123456, tzinfo=timezone.utc)
+
+    cursor: str = encode_transactions_cursor(created_at=created_at, transaction_id=823007)
+
+    assert "=" not in cursor
+    assert decode_transactions_cursor(cursor) == (created_at, 823007)
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        b"not json",
+        b"[]",
+        b'["2026-10-17T21:30:05+00:00"]',
+        b'["not a date", 1]',
+        b'[1, 2]',
+        b'["2026-10-17T21:30:05+00:00", "x"]',
+        b'{"a": 1}',
+        b"\xff\xfe",
+    ],
+)
+def test_damaged_cursor_is_rejected(payload: bytes) -> None:
+    with pytest.raises(ValueError):
+        decode_transactions_cursor(urlsafe_b64encode(payload).decode().rstrip("="))
+
+
+@pytest.mark.parametrize("cursor", ["", "!!!", "a"])
+def test_invalid_base64_is_rejected(cursor: str) -> None:
+    with pytest.raises(ValueError):
+        decode_transactions_cursor(cursor)
@@ -0,0 +1,182 @@
+"""
+    Формы планов фильтров GET /api/v1/users/transactions на засеянных данных:
+    каждый фильтр идет по своему индексу, последовательных сканирований нет
+"""
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import pytest
+from sqlalchemy import Connection, text
+
+from src.users.core.utils import transactions_page_statement
+from src.users.versions.v1.dependencies import _transactions_filters
+
+USERS = 200
+ACCOUNTS_PER_USER = 5
+TRANSACTIONS = 300_000
+PAGE_LIMIT = 20
+
+# Даты от года назад до полугода вперед: строки есть и в transactions_legacy, и в помесячных секциях, и в default
+SEED = text(
+    """
+        WITH seeded_users AS (
+            INSERT INTO users (role_id, email, first_name, hash_password, is_active)
+            SELECT 1, 'plan_test_' || n || '@example.com', 'Plan test', '\\x00'::bytea, 1
+            FROM generate_series(1, :users) n
+            RETURNING id
+        ),
+        seeded_accounts AS (
+            INSERT INTO accounts (user_id, name, balance, is_active)
+            SELECT u.id, 'plan_test_' || a, 0, 1
+            FROM seeded_users u, generate_series(1, :accounts_per_user) a
+            RETURNING id
+        ),
+        numbered_accounts AS (
+            SELECT id, row_number() OVER (ORDER BY id) - 1 AS n FROM seeded_accounts
+        )
+        INSERT INTO transactions (account_id, type, amount, status, external_id, created_at)
+        SELECT
+            a.id,
+            CASE WHEN random() < 0.03 THEN 'credit' ELSE 'debit' END,
+            round((random() * 10000)::numeric, 2),
+            CASE WHEN random() < 0.02 THEN 'pending' ELSE 'completed' END,
+            'plan-test-' || t,
+            now() - interval '365 days' + random() * interval '545 days'
+        FROM generate_series(1, :transactions) t
+        JOIN numbered_accounts a ON a.n = t % (:users * :accounts_per_user)
+    """
+)
+PLAN_INDEXES = text(
+    "SELECT coalesce(pg_partition_root(c.oid), c.oid)::regclass::text "
+    "FROM pg_class c WHERE c.relname = ANY(:names)"
+)
+
+
+@pytest.fixture(scope="module")
+def seeded(seeded_connection: Connection) -> Iterator[Tuple[Connection, int, str]]:
+    seeded_connection.execute(
+        SEED,
+        {"users": USERS, "accounts_per_user": ACCOUNTS_PER_USER, "transactions": TRANSACTIONS},
+    )
+    for table in ("users", "accounts", "transactions", "transaction_external_ids"):
+        seeded_connection.execute(text(f"ANALYZE {table}"))
+
+    user_id, external_id = seeded_connection.execute(text(
+        """
+            SELECT a.user_id, t.external_id
+            FROM transactions t JOIN accounts a ON a.id = t.account_id
+            WHERE t.external_id LIKE 'plan-test-%'
+            ORDER BY t.id
+            LIMIT 1
+        """
+    )).one()
+
+    yield seeded_connection, user_id, external_id
+
+
+def _plan(
+        connection: Connection,
+        user_id: int,
+        account_id: Optional[int] = None,
+        **filters: Any,
+) -> Dict[str, Any]:
+    arguments: Dict[str, Any] = {
+        "date_from": None,
+        "date_to": None,
+        "transaction_type": None,
+        "transaction_status": None,
+        "amount_min": None,
+        "amount_max": None,
+        "external_id": None,
+        **filters,
+    }
+    statement = transactions_page_statement(
+        user_id=user_id,
+        account_id=account_id,
+        filters=_transactions_filters(**arguments),
+        cursor_position=None,
+        offset=None,
+        limit=PAGE_LIMIT,
+    )
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True})
+
+    return connection.scalar(text(f"EXPLAIN (FORMAT JSON) {compiled}"))[0]["Plan"]  # type: ignore
+
+
+def _nodes(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _nodes(child)
+
+
+def _assert_plan(connection: Connection, plan: Dict[str, Any], expected_index: str) -> None:
+    nodes: List[Dict[str, Any]] = list(_nodes(plan))
+
+    seq_scans: List[str] = [node["Relation Name"] for node in nodes if node["Node Type"] == "Seq Scan"]
+    assert not seq_scans, f"Seq Scan on {seq_scans}"
+
+    # Индексы секций приводятся к индексу родителя (transactions_p202611_... -> ix_transactions_...)
+    partition_indexes: List[str] = [node["Index Name"] for node in nodes if "Index Name" in node]
+    indexes: Set[str] = set(connection.scalars(PLAN_INDEXES, {"names": partition_indexes}))
+    assert expected_index in indexes, f"{expected_index} not in {sorted(indexes)}"
+
+
+def test_without_filters_uses_keyset_index(seeded: Tuple[Connection, int, str]) -> None:
+    connection, user_id, _ = seeded
+
+    plan = _plan(connection, user_id)
+
+    _assert_plan(connection, plan, "ix_transactions_account_id_created_at_id")
+
+
+def test_date_range_uses_keyset_index(seeded: Tuple[Connection, int, str]) -> None:
+    connection, user_id, _ = seeded
+    now: datetime = datetime.now(timezone.utc)
+
+    plan = _plan(connection, user_id, date_from=now - timedelta(days=30), date_to=now - timedelta(days=20))
+
+    _assert_plan(connection, plan, "ix_transactions_account_id_created_at_id")
+
+
+def test_rare_type_uses_partial_index(seeded: Tuple[Connection, int, str]) -> None:
+    connection, user_id, _ = seeded
+
+    plan = _plan(connection, user_id, transaction_type="credit")
+
+    _assert_plan(connection, plan, "ix_transactions_account_id_type_created_at_id")
+
+
+def test_rare_status_uses_partial_index(seeded: Tuple[Connection, int, str]) -> None:
+    connection, user_id, _ = seeded
+
+    plan = _plan(connection, user_id, transaction_status="pending")
+
+    _assert_plan(connection, plan, "ix_transactions_account_id_status_created_at_id")
+
+
+def test_amount_range_uses_amount_index(seeded: Tuple[Connection, int, str]) -> None:
+    connection, user_id, _ = seeded
+
+    plan = _plan(connection, user_id, amount_min=Decimal("10.00"), amount_max=Decimal("12.00"))
+
+    _assert_plan(connection, plan, "ix_transactions_account_id_amount")
+
+
+def test_account_filter_uses_keyset_index(seeded: Tuple[Connection, int, str]) -> None:
+    connection, user_id, _ = seeded
+    account_id: int = connection.scalar(
+        text("SELECT min(id) FROM accounts WHERE user_id = :user_id"), {"user_id": user_id}
+    )  # type: ignore
+
+    plan = _plan(connection, user_id, account_id=account_id)
+
+    _assert_plan(connection, plan, "ix_transactions_account_id_created_at_id")
+
+
+def test_external_id_uses_primary_keys(seeded: Tuple[Connection, int, str]) -> None:
+    connection, user_id, external_id = seeded
+
+    plan = _plan(connection, user_id, external_id=external_id)
+
+    _assert_plan(connection, plan, "transaction_external_ids_pkey")
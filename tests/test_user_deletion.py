@@ -0,0 +1,127 @@
+"""
+    Фоновое удаление пользователя на живой базе: зависимые строки удаляются пачками, задача завершается,
+    отзыв stateless-сессий остается. Данные коммитятся (воркер работает своими транзакциями),
+    поэтому тест убирает за собой все, что засеял
+"""
+from asyncio import run
+from typing import Iterator, Tuple
+
+import pytest
+from sqlalchemy import Connection, Engine, text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from databases.postgres.config import postgres
+from src.admins.core.deletion import JOB_STATUS_COMPLETED, UserDeletionWorker
+
+EMAIL = "deletion_test@example.com"
+TRANSACTIONS = 5
+
+# external_id удаленных транзакций остаются занятыми в transaction_external_ids: у каждого запуска - свои
+SEED = text(
+    """
+        WITH seeded_user AS (
+            INSERT INTO users (role_id, email, first_name, hash_password, is_active)
+            VALUES (1, :email, 'Deletion test', '\\x00'::bytea, 0)
+            RETURNING id
+        ),
+        seeded_account AS (
+            INSERT INTO accounts (user_id, name, balance, is_active)
+            SELECT id, 'deletion_test', 0, 1 FROM seeded_user
+            RETURNING id
+        ),
+        seeded_transactions AS (
+            INSERT INTO transactions (account_id, type, amount, status, external_id, created_at)
+            SELECT a.id, 'debit', 1, 'completed', 'deletion_test_' || u.id || '_' || n, now()
+            FROM seeded_user u, seeded_account a, generate_series(1, :transactions) n
+        ),
+        seeded_session AS (
+            INSERT INTO users_sessions (session_token, user_id, expires_at)
+            SELECT 'deletion_test_token', id, now() + interval '1 hour' FROM seeded_user
+        ),
+        seeded_revocation AS (
+            INSERT INTO users_sessions_revocations (user_id, not_before)
+            SELECT id, now() FROM seeded_user
+        )
+        INSERT INTO user_deletion_jobs (user_id, email, status, deleted_rows)
+        SELECT id, :email, 'pending', 0 FROM seeded_user
+        RETURNING id, user_id
+    """
+)
+
+
+# Если воркер не дошел до конца, остатки удаляются в обратном порядке зависимостей
+CLEANUP = [
+    text("DELETE FROM user_deletion_jobs WHERE user_id = :user_id"),
+    text("DELETE FROM users_sessions_revocations WHERE user_id = :user_id"),
+    text("DELETE FROM users_sessions WHERE user_id = :user_id"),
+    text("DELETE FROM transactions WHERE account_id IN (SELECT id FROM accounts WHERE user_id = :user_id)"),
+    text("DELETE FROM account_daily_balances WHERE account_id IN (SELECT id FROM accounts WHERE user_id = :user_id)"),
+    text("DELETE FROM account_balance_stripes WHERE account_id IN (SELECT id FROM accounts WHERE user_id = :user_id)"),
+    text("DELETE FROM accounts WHERE user_id = :user_id"),
+    text("DELETE FROM users WHERE id = :user_id"),
+    text("DELETE FROM transaction_external_ids WHERE external_id LIKE 'deletion\\_test\\_' || :user_id || '\\_%'"),
+]
+
+
+@pytest.fixture
+def deletion_job(postgres_engine: Engine) -> Iterator[Tuple[Connection, int, int]]:
+    """(соединение, id задачи, id пользователя) - засеянные и закоммиченные"""
+    with postgres_engine.connect() as connection:
+        job_id, user_id = connection.execute(SEED, {"email": EMAIL, "transactions": TRANSACTIONS}).one()
+        connection.commit()
+
+        try:
+            yield connection, job_id, user_id
+        finally:
+            connection.rollback()
+            for statement in CLEANUP:
+                connection.execute(statement, {"user_id": user_id})
+            connection.commit()
+
+
+def run_worker(batch_size: int) -> None:
+    async def scenario() -> None:
+        engine: AsyncEngine = create_async_engine(postgres.DSN)
+        try:
+            await UserDeletionWorker(
+                session_factory=async_sessionmaker(engine, expire_on_commit=False),
+                interval_seconds=60,
+                batch_size=batch_size,
+                batch_pause_seconds=0,
+                lease_seconds=60,
+            ).run_once()
+        finally:
+            await engine.dispose()
+
+    run(scenario())
+
+
+def test_user_is_deleted_in_batches(deletion_job: Tuple[Connection, int, int]) -> None:
+    connection, job_id, user_id = deletion_job
+
+    run_worker(batch_size=2)
+
+    remaining = connection.execute(
+        text(
+            """
+                SELECT
+                    (SELECT count(*) FROM users WHERE id = :user_id),
+                    (SELECT count(*) FROM accounts WHERE user_id = :user_id),
+                    (SELECT count(*) FROM users_sessions WHERE user_id = :user_id),
+                    (
+                        SELECT count(*) FROM transactions
+                        WHERE external_id LIKE 'deletion\\_test\\_' || :user_id || '\\_%'
+                    ),
+                    (SELECT count(*) FROM users_sessions_revocations WHERE user_id = :user_id)
+            """
+        ),
+        {"user_id": user_id},
+    ).one()
+    status, stage, deleted_rows, error = connection.execute(
+        text("SELECT status, stage, deleted_rows, error FROM user_deletion_jobs WHERE id = :id"),
+        {"id": job_id},
+    ).one()
+
+    assert tuple(remaining) == (0, 0, 0, 0, 1)
+    assert (status, stage, error) == (JOB_STATUS_COMPLETED, None, None)
+    assert deleted_rows >= TRANSACTIONS + 3  # Транзакции, сессия, счет, пользователь
@@ -0,0 +1,70 @@
+"""Массовые действия над пользователями по списку email: проверка запроса и форма UPDATE"""
+from typing import Any, Dict, List, Optional
+
+import pytest
+from sqlalchemy import Compiled
+from sqlalchemy.dialects import postgresql
+
+from src.admins.core.constants import (
+    USERS_BULK_ACTION_DEACTIVATE,
+    USERS_BULK_ACTION_DELETE,
+    USERS_BULK_ACTION_UPDATE,
+    USERS_BULK_MAX_EMAILS
+)
+from src.admins.core.models import BulkUsersRequest
+from src.admins.versions.v1.dependencies import (
+    _bulk_users_payload_error,
+    _bulk_users_statement,
+    _bulk_users_updated_data
+)
+
+EMAILS: List[str] = ["a@example.com", "b@example.com"]
+
+
+def compiled(payload: BulkUsersRequest, emails: List[str]) -> Compiled:
+    return _bulk_users_statement(payload=payload, emails=emails).compile(dialect=postgresql.dialect())  # type: ignore
+
+
+@pytest.mark.parametrize(
+    ("payload", "expected_error"),
+    [
+        (BulkUsersRequest(action=USERS_BULK_ACTION_DELETE, emails=EMAILS), None),
+        (BulkUsersRequest(action=USERS_BULK_ACTION_UPDATE, emails=EMAILS, role_id=2), None),
+        (BulkUsersRequest(action="drop", emails=EMAILS), "Action must be one of: delete, deactivate, update"),
+        (BulkUsersRequest(action=USERS_BULK_ACTION_UPDATE, emails=EMAILS, first_name=" "), "No fields to update"),
+        (
+            BulkUsersRequest(action=USERS_BULK_ACTION_DELETE, emails=["x@example.com"] * (USERS_BULK_MAX_EMAILS + 1)),
+            f"Emails list must not exceed {USERS_BULK_MAX_EMAILS} items",
+        ),
+    ],
+)
+def test_payload_error(payload: BulkUsersRequest, expected_error: Optional[str]) -> None:
+    assert _bulk_users_payload_error(payload) == expected_error
+
+
+@pytest.mark.parametrize(
+    ("payload", "expected"),
+    [
+        # delete - тоже деактивация: строки удаляются в фоне задачами удаления
+        (BulkUsersRequest(action=USERS_BULK_ACTION_DELETE, emails=EMAILS, role_id=2), {"is_active": 0}),
+        (BulkUsersRequest(action=USERS_BULK_ACTION_DEACTIVATE, emails=EMAILS), {"is_active": 0}),
+        (
+            BulkUsersRequest(action=USERS_BULK_ACTION_UPDATE, emails=EMAILS, role_id=0, first_name="Ann", last_name=""),
+            {"role_id": 0, "first_name": "Ann"},
+        ),
+    ],
+)
+def test_updated_data(payload: BulkUsersRequest, expected: Dict[str, Any]) -> None:
+    assert _bulk_users_updated_data(payload) == expected
+
+
+def test_statement_text_does_not_depend_on_chunk_size() -> None:
+    payload: BulkUsersRequest = BulkUsersRequest(action=USERS_BULK_ACTION_DEACTIVATE, emails=EMAILS)
+
+    small: Compiled = compiled(payload=payload, emails=EMAILS)
+    large: Compiled = compiled(payload=payload, emails=[f"user{n}@example.com" for n in range(1000)])
+
+    assert str(small) == str(large)
+    assert "= ANY (%(emails)s::VARCHAR[])" in str(small)
+    assert "RETURNING users.id, users.email" in str(small)
+    assert len(large.params["emails"]) == 1000
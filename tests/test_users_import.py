@@ -0,0 +1,139 @@
+"""Разбор потока массового импорта пользователей: строки, записи CSV/NDJSON, проверка полей"""
+from asyncio import run
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import pytest
+
+from src.admins.core.constants import USERS_IMPORT_FORMAT_CSV, USERS_IMPORT_FORMAT_NDJSON
+from src.admins.core.users_import import (
+    BCRYPT_MAX_PASSWORD_BYTES,
+    INT4_MAX,
+    UsersImportPayloadError,
+    iter_records,
+    validate_record
+)
+from src.utils import LineTooLongError, iter_lines
+
+VALID_RECORD: Dict[str, Any] = {
+    "email": "user@example.com",
+    "role_id": "2",
+    "password": "secret",
+    "first_name": "Test",
+    "last_name": "User",
+}
+
+
+async def as_stream(chunks: Iterable[bytes]) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+async def as_stream_lines(lines: List[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    for line_number, line in enumerate(lines, start=1):
+        yield line_number, line
+
+
+def read_lines(chunks: Iterable[bytes], max_line_bytes: int = 16) -> List[Tuple[int, bytes]]:
+    async def collect() -> List[Tuple[int, bytes]]:
+        return [item async for item in iter_lines(as_stream(chunks), max_line_bytes=max_line_bytes)]
+
+    return run(collect())
+
+
+def read_records(lines: List[bytes], import_format: str) -> List[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    async def collect() -> List[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+        return [item async for item in iter_records(as_stream_lines(lines), import_format=import_format)]
+
+    return run(collect())
+
+
+def test_iter_lines_joins_lines_split_between_chunks() -> None:
+    assert read_lines([b"first\r\nsec", b"ond\n", b"\nthi", b"rd"]) == [
+        (1, b"first"),
+        (2, b"second"),
+        (3, b""),
+        (4, b"third"),
+    ]
+
+
+def test_iter_lines_skips_blank_tail() -> None:
+    assert read_lines([b"first\n", b"  "]) == [(1, b"first")]
+
+
+def test_iter_lines_stops_on_long_line() -> None:
+    lines: List[Tuple[int, bytes]] = []
+
+    async def collect() -> None:
+        async for item in iter_lines(as_stream([b"short\n", b"x" * 10, b"x" * 10, b"\nnever read"]), 16):
+            lines.append(item)
+
+    with pytest.raises(LineTooLongError, match="Line 2"):
+        run(collect())
+
+    assert lines == [(1, b"short")]
+
+
+def test_iter_records_ndjson() -> None:
+    records = read_records(
+        [b'{"email": "a@example.com"}', b"", b"[1]", b"{broken", b"\xff"],
+        USERS_IMPORT_FORMAT_NDJSON,
+    )
+
+    assert records[0] == (1, {"email": "a@example.com"}, None)
+    assert [(line, error) for line, _, error in records[1:]] == [
+        (3, "Line must be a JSON object"),
+        (4, "Invalid JSON: Expecting property name enclosed in double quotes"),
+        (5, "Line is not valid UTF-8"),
+    ]
+
+
+def test_iter_records_csv() -> None:
+    records = read_records(
+        [b"", b"email, role_id,password,first_name", b'a@example.com,1,"p,w",Ann', b"b@example.com,1"],
+        USERS_IMPORT_FORMAT_CSV,
+    )
+
+    assert records == [
+        (3, {"email": "a@example.com", "role_id": "1", "password": "p,w", "first_name": "Ann"}, None),
+        (4, None, "Expected 4 columns, got 2"),
+    ]
+
+
+def test_iter_records_csv_without_required_columns() -> None:
+    with pytest.raises(UsersImportPayloadError, match="password, first_name"):
+        read_records([b"email,role_id"], USERS_IMPORT_FORMAT_CSV)
+
+
+def test_validate_record() -> None:
+    row, error = validate_record(7, {**VALID_RECORD, "email": " user@example.com ", "role_id": 2})
+
+    assert error is None
+    assert row is not None
+    assert (row.line, row.email, row.role_id, row.password, row.last_name) == (
+        7, "user@example.com", 2, "secret", "User"
+    )
+
+
+@pytest.mark.parametrize(
+    ("changes", "expected_error"),
+    [
+        ({"email": " "}, "Field email is required"),
+        ({"first_name": None}, "Field first_name is required"),
+        ({"email": "user.example.com"}, "Invalid email"),
+        ({"role_id": "-1"}, f"role_id must be an integer from 0 to {INT4_MAX}"),
+        ({"role_id": "²"}, f"role_id must be an integer from 0 to {INT4_MAX}"),
+        ({"role_id": str(INT4_MAX + 1)}, f"role_id must be an integer from 0 to {INT4_MAX}"),
+        ({"last_name": "x" * 101}, "first_name and last_name must not exceed 100 characters"),
+        ({"password": "п" * 37}, f"Password must not exceed {BCRYPT_MAX_PASSWORD_BYTES} bytes"),
+    ],
+)
+def test_validate_record_errors(changes: Dict[str, Any], expected_error: str) -> None:
+    assert validate_record(1, {**VALID_RECORD, **changes}) == (None, expected_error)
+
+
+def test_validate_record_keeps_password_spaces_and_max_role_id() -> None:
+    row, error = validate_record(1, {**VALID_RECORD, "password": " secret ", "role_id": str(INT4_MAX), "last_name": ""})
+
+    assert error is None
+    assert row is not None
+    assert (row.password, row.role_id, row.last_name) == (" secret ", INT4_MAX, None)
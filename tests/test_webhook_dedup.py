@@ -0,0 +1,54 @@
+"""Префильтр повторных вебхуков: фильтр Блума и точный LRU по external_id"""
+from src.mock_transactions.dedup import BloomFilter, ExternalIdPrefilter
+
+
+def test_bloom_filter_has_no_false_negatives() -> None:
+    bloom: BloomFilter = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [f"tx-{n}" for n in range(1000)]
+
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    assert bloom.count == 1000
+
+
+def test_bloom_filter_false_positive_rate() -> None:
+    bloom: BloomFilter = BloomFilter(capacity=10_000, error_rate=0.01)
+    for n in range(10_000):
+        bloom.add(f"tx-{n}")
+
+    false_positives: int = sum(f"other-{n}" in bloom for n in range(10_000))
+
+    assert false_positives < 10_000 * 0.02  # С запасом на разброс
+
+
+def test_bloom_filter_sizing() -> None:
+    bloom: BloomFilter = BloomFilter(capacity=1000, error_rate=0.01)
+
+    assert bloom.size_bits == 9586
+    assert bloom.hashes == 7
+
+
+def test_prefilter_recent_ids_are_known_duplicates() -> None:
+    prefilter: ExternalIdPrefilter = ExternalIdPrefilter(lru_size=2, bloom_capacity=100, bloom_error_rate=0.01)
+    prefilter.remember(["tx-1", "tx-2", "tx-3"])
+
+    assert not prefilter.is_known_duplicate("tx-1")  # Вытеснен из LRU
+    assert prefilter.is_known_duplicate("tx-3")
+    assert prefilter.maybe_seen("tx-1")  # Но остался в фильтре Блума
+    assert not prefilter.maybe_seen("tx-new")
+    assert (prefilter.known_duplicates, prefilter.bloom_hits) == (1, 1)
+
+
+def test_prefilter_keeps_previous_bloom_generation() -> None:
+    prefilter: ExternalIdPrefilter = ExternalIdPrefilter(lru_size=1, bloom_capacity=10, bloom_error_rate=0.01)
+    first_generation = [f"old-{n}" for n in range(10)]
+    prefilter.remember(first_generation)
+    prefilter.remember([f"new-{n}" for n in range(10)])
+
+    assert all(prefilter.maybe_seen(external_id) for external_id in first_generation)
+
+    prefilter.remember([f"newest-{n}" for n in range(10)])  # Первое поколение отброшено
+
+    assert sum(prefilter.maybe_seen(external_id) for external_id in first_generation) < 5
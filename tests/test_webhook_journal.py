@@ -0,0 +1,86 @@
+"""Журнал вебхуков: групповая запись, сегменты под flock при общем каталоге, чтение только целых строк"""
+from asyncio import gather, run
+from decimal import Decimal
+from pathlib import Path
+from typing import List
+
+from src.mock_transactions.journal import WebhookJournal, WebhookJournalReplayer
+from src.mock_transactions.models import PaymentWebhookData
+
+
+def webhook(n: int) -> PaymentWebhookData:
+    return PaymentWebhookData(
+        transaction_id=f"tx-{n}", account_id=1, user_id=1, amount=Decimal("10.00"), signature="sig"
+    )
+
+
+def test_append_writes_group_to_current_segment(tmp_path: Path) -> None:
+    async def scenario() -> WebhookJournal:
+        journal: WebhookJournal = WebhookJournal(directory=str(tmp_path), flush_interval_seconds=0.01)
+        await gather(*(journal.append(webhook(n)) for n in range(5)))
+        await journal.close()
+        return journal
+
+    journal: WebhookJournal = run(scenario())
+    lines: List[bytes] = journal.current_segment.read_bytes().splitlines()
+
+    assert [PaymentWebhookData.model_validate_json(line).transaction_id for line in lines] == [
+        f"tx-{n}" for n in range(5)
+    ]
+
+
+def test_rotate_starts_next_segment(tmp_path: Path) -> None:
+    async def scenario() -> List[Path]:
+        journal: WebhookJournal = WebhookJournal(directory=str(tmp_path), flush_interval_seconds=0.01)
+        await journal.rotate()
+        await journal.rotate()
+        segments: List[Path] = journal.segments()
+        await journal.close()
+        return segments
+
+    assert [segment.name for segment in run(scenario())] == [
+        "webhooks-0000000001.ndjson",
+        "webhooks-0000000002.ndjson",
+        "webhooks-0000000003.ndjson",
+    ]
+
+
+def test_shared_directory_keeps_other_current_segment(tmp_path: Path) -> None:
+    first: WebhookJournal = WebhookJournal(directory=str(tmp_path), flush_interval_seconds=0.01)
+    second: WebhookJournal = WebhookJournal(directory=str(tmp_path), flush_interval_seconds=0.01)
+
+    assert first.current_segment != second.current_segment
+
+    # Текущий сегмент другого процесса под его flock: воспроизводить и удалять его нельзя
+    with second.locked_segment(first.current_segment) as locked:
+        assert not locked
+
+    run(first.rotate())
+    closed_segment: Path = first.segments()[0]
+
+    with second.locked_segment(closed_segment) as locked:
+        assert locked
+        with first.locked_segment(closed_segment) as locked_twice:
+            assert not locked_twice  # Один закрытый сегмент не воспроизводят двое сразу
+
+        second.remove_segment(closed_segment)
+
+    with first.locked_segment(closed_segment) as locked:
+        assert not locked  # Уже удален
+
+    run(first.close())
+    run(second.close())
+
+
+def test_read_lines_stops_before_unfinished_tail(tmp_path: Path) -> None:
+    segment: Path = tmp_path / "webhooks-0000000001.ndjson"
+    segment.write_bytes(b'{"a":1}\n\n{"a":2}\n{"a":3}\n{"a":')
+
+    lines, offset = WebhookJournalReplayer._read_lines(segment, 0, 2)
+    assert lines == [b'{"a":1}\n', b'{"a":2}\n']
+
+    lines, offset = WebhookJournalReplayer._read_lines(segment, offset, 10)
+    assert lines == [b'{"a":3}\n']
+    assert offset == len(b'{"a":1}\n\n{"a":2}\n{"a":3}\n')
+
+    assert WebhookJournalReplayer._read_lines(segment, offset, 10) == ([], offset)